@@ -0,0 +1,177 @@
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+import pandas as pd
+from psycopg2.pool import ThreadedConnectionPool
+from conexion_bd import PARAMETROS_BD
+
+# Estado compartido por todo el proceso: Streamlit importa el módulo una sola vez por
+# servidor, así que el pool y el caché son comunes a todas las sesiones y reruns.
+_pool = None
+_pool_lock = threading.Lock()
+
+# Resultados por (consulta, parámetros), del menos al más usado recientemente. Cada
+# combinación de filtros y cursor de página es una entrada, así que el caché se acota:
+# se descartan las vencidas y, pasado MAXIMO_CACHE, las menos usadas.
+MAXIMO_CACHE = 256
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+# Lock de carga de cada consulta y cuántos hilos lo tienen (esperando o cargando)
+_locks_carga = {}
+_version = {'valor': None, 'verificado': 0.0}
+
+metricas = {'hits': 0, 'misses': 0, 'invalidaciones': 0, 'consultas': 0, 'segundos_consulta': 0.0}
+
+CONSULTA_VERSION = """
+    SELECT COALESCE(sum(n_tup_ins + n_tup_upd + n_tup_del), 0)
+    FROM pg_stat_user_tables WHERE relname = 'locales_comerciales'
+"""
+
+
+def obtener_pool(minconn=1, maxconn=10):
+    """
+    Devuelve el pool de conexiones del proceso, creándolo la primera vez.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadedConnectionPool(minconn, maxconn, **PARAMETROS_BD)
+    return _pool
+
+
+@contextmanager
+def conexion():
+    """
+    Presta una conexión del pool y la devuelve al terminar.
+    """
+    pool = obtener_pool()
+    conn = pool.getconn()
+    try:
+        yield conn
+        conn.rollback()  # No dejar transacciones abiertas en conexiones del pool
+    except Exception:
+        pool.putconn(conn, close=True)
+        raise
+    else:
+        pool.putconn(conn)
+
+
+def _version_datos(intervalo=10):
+    """
+    Número de filas insertadas/actualizadas/borradas en locales_comerciales según las
+    estadísticas de PostgreSQL. Si cambia, los resultados en caché ya no son válidos.
+    Se consulta como máximo una vez cada 'intervalo' segundos; PostgreSQL publica estas
+    estadísticas con algunos segundos de retraso, que es el desfase máximo esperado.
+    """
+    ahora = time.monotonic()
+    if ahora - _version['verificado'] >= intervalo:
+        with conexion() as conn, conn.cursor() as cursor:
+            cursor.execute(CONSULTA_VERSION)
+            _version['valor'] = cursor.fetchone()[0]
+        _version['verificado'] = ahora
+    return _version['valor']
+
+
+def version_datos():
+    """
+    Versión actual de locales_comerciales (ver _version_datos), para invalidar otros
+    cachés derivados de la tabla.
+    """
+    return _version_datos()
+
+
+def consultar_df(query, params=None, ttl=300):
+    """
+    Ejecuta 'query' y devuelve un DataFrame, reutilizando el resultado en caché mientras
+    no hayan pasado 'ttl' segundos ni haya cambiado la tabla. El DataFrame se comparte
+    entre sesiones, así que no se debe modificar en el lugar.
+    """
+    llave = (query, tuple(params) if params else None)
+    version = _version_datos()
+
+    with _cache_lock:
+        entrada = _cache.get(llave)
+        if entrada and time.monotonic() - entrada['cargado'] < ttl and entrada['version'] == version:
+            metricas['hits'] += 1
+            _cache.move_to_end(llave)
+            return entrada['datos']
+        # Se registra como usuario junto con el setdefault: _podar no borra el lock entre
+        # este punto y el momento en que el hilo lo adquiere
+        carga = _locks_carga.setdefault(llave, {'lock': threading.Lock(), 'usuarios': 0})
+        carga['usuarios'] += 1
+
+    # Un solo hilo recarga cada consulta; los demás esperan y usan su resultado
+    try:
+        with carga['lock']:
+            with _cache_lock:
+                entrada = _cache.get(llave)
+                if entrada and time.monotonic() - entrada['cargado'] < ttl and entrada['version'] == version:
+                    metricas['hits'] += 1
+                    _cache.move_to_end(llave)
+                    return entrada['datos']
+                if entrada:
+                    metricas['invalidaciones'] += 1
+                metricas['misses'] += 1
+
+            inicio = time.perf_counter()
+            with conexion() as conn:
+                datos = pd.read_sql(query, conn, params=params)
+            with _cache_lock:
+                metricas['consultas'] += 1
+                metricas['segundos_consulta'] += time.perf_counter() - inicio
+                _cache[llave] = {'datos': datos, 'cargado': time.monotonic(), 'version': version, 'ttl': ttl}
+                _cache.move_to_end(llave)
+                _podar(version)
+    finally:
+        with _cache_lock:
+            carga['usuarios'] -= 1
+    return datos
+
+
+def _podar(version):
+    """
+    Descarta las entradas vencidas o de otra versión de la tabla, luego las menos usadas
+    hasta dejar MAXIMO_CACHE, y los locks de carga que ya no tienen entrada ni hilos que
+    los usen. Se llama con _cache_lock tomado.
+    """
+    ahora = time.monotonic()
+    for llave in [llave for llave, entrada in _cache.items()
+                  if ahora - entrada['cargado'] >= entrada['ttl'] or entrada['version'] != version]:
+        del _cache[llave]
+    while len(_cache) > MAXIMO_CACHE:
+        _cache.popitem(last=False)
+    for llave in [llave for llave, carga in _locks_carga.items() if llave not in _cache and not carga['usuarios']]:
+        del _locks_carga[llave]
+
+
+def obtener_locales(ttl=300):
+    """
+    Devuelve la tabla completa de locales comerciales desde el caché compartido.
+    """
+    return consultar_df("SELECT * FROM locales_comerciales", ttl=ttl)
+
+
+def invalidar_cache():
+    """
+    Descarta todos los resultados en caché (por ejemplo, después de una carga de datos).
+    """
+    with _cache_lock:
+        _cache.clear()
+        for llave in [llave for llave, carga in _locks_carga.items() if not carga['usuarios']]:
+            del _locks_carga[llave]
+        _version['verificado'] = 0.0
+        metricas['invalidaciones'] += 1
+
+
+def metricas_cache():
+    """
+    Devuelve una copia de las métricas del caché con la tasa de aciertos calculada.
+    """
+    with _cache_lock:
+        resultado = dict(metricas)
+        resultado['entradas'] = len(_cache)
+    total = resultado['hits'] + resultado['misses']
+    resultado['hit_rate'] = resultado['hits'] / total if total else 0.0
+    return resultado
@@ -0,0 +1,167 @@
+from conexion_bd import conectar
+
+NUM_BINS = 15
+
+ESQUEMA = """
+    CREATE TABLE IF NOT EXISTS resumen_barrio (
+        ciudad TEXT NOT NULL,
+        barrio TEXT NOT NULL,
+        {columnas},
+        PRIMARY KEY (ciudad, barrio)
+    );
+    CREATE TABLE IF NOT EXISTS resumen_ciudad (
+        ciudad TEXT PRIMARY KEY,
+        {columnas}
+    );
+    CREATE TABLE IF NOT EXISTS histograma (
+        variable TEXT NOT NULL,
+        bin INTEGER NOT NULL,
+        limite_inferior NUMERIC,
+        limite_superior NUMERIC,
+        n INTEGER NOT NULL,
+        PRIMARY KEY (variable, bin)
+    );
+""".format(columnas="""
+        n INTEGER NOT NULL,
+        n_prioritarios INTEGER NOT NULL,
+        n_precio INTEGER NOT NULL,
+        precio_promedio NUMERIC,
+        precio_mediana NUMERIC,
+        precio_p25 NUMERIC,
+        precio_p75 NUMERIC,
+        precio_p90 NUMERIC,
+        n_area INTEGER NOT NULL,
+        area_promedio NUMERIC,
+        area_mediana NUMERIC,
+        area_p25 NUMERIC,
+        area_p75 NUMERIC,
+        precio_m2_promedio NUMERIC,
+        precio_m2_mediana NUMERIC,
+        actualizado_en TIMESTAMPTZ DEFAULT now()
+""")
+
+# Estadísticas por grupo; el área solo cuenta si es válida (no negativa), como en el dashboard.
+# Se calculan sobre locales_unicos para que una propiedad publicada varias veces cuente una sola.
+ESTADISTICAS = """
+    count(*),
+    count(*) FILTER (WHERE prioridad = 1),
+    count(valorarriendo),
+    avg(valorarriendo),
+    percentile_cont(0.5) WITHIN GROUP (ORDER BY valorarriendo),
+    percentile_cont(0.25) WITHIN GROUP (ORDER BY valorarriendo),
+    percentile_cont(0.75) WITHIN GROUP (ORDER BY valorarriendo),
+    percentile_cont(0.9) WITHIN GROUP (ORDER BY valorarriendo),
+    count(areacuadrada) FILTER (WHERE areacuadrada >= 0),
+    avg(areacuadrada) FILTER (WHERE areacuadrada >= 0),
+    percentile_cont(0.5) WITHIN GROUP (ORDER BY areacuadrada) FILTER (WHERE areacuadrada >= 0),
+    percentile_cont(0.25) WITHIN GROUP (ORDER BY areacuadrada) FILTER (WHERE areacuadrada >= 0),
+    percentile_cont(0.75) WITHIN GROUP (ORDER BY areacuadrada) FILTER (WHERE areacuadrada >= 0),
+    avg(valorarriendo / areacuadrada) FILTER (WHERE areacuadrada > 0),
+    percentile_cont(0.5) WITHIN GROUP (ORDER BY valorarriendo / areacuadrada) FILTER (WHERE areacuadrada > 0),
+    now()
+"""
+
+CIUDAD = "COALESCE(ciudad, 'N/A')"
+BARRIO = "COALESCE(barrio, 'N/A')"
+
+
+def _refrescar_barrios(cursor, barrios):
+    if barrios is None:
+        cursor.execute("TRUNCATE resumen_barrio")
+        filtro, params = "", []
+    else:
+        ciudades = [ciudad for ciudad, _ in barrios]
+        nombres = [barrio for _, barrio in barrios]
+        cursor.execute(
+            "DELETE FROM resumen_barrio WHERE (ciudad, barrio) IN (SELECT * FROM unnest(%s::text[], %s::text[]))",
+            (ciudades, nombres)
+        )
+        filtro = f"""
+            WHERE barrio = ANY(%s::text[])
+              AND ({CIUDAD}, {BARRIO}) IN (SELECT * FROM unnest(%s::text[], %s::text[]))
+        """
+        params = [nombres, ciudades, nombres]
+    cursor.execute(f"""
+        INSERT INTO resumen_barrio
+        SELECT {CIUDAD}, {BARRIO}, {ESTADISTICAS}
+        FROM locales_unicos {filtro}
+        GROUP BY 1, 2
+    """, params)
+
+
+def _refrescar_ciudades(cursor, ciudades):
+    if ciudades is None:
+        cursor.execute("TRUNCATE resumen_ciudad")
+        filtro, params = "", []
+    else:
+        cursor.execute("DELETE FROM resumen_ciudad WHERE ciudad = ANY(%s::text[])", (ciudades,))
+        filtro, params = "WHERE ciudad = ANY(%s::text[])", [ciudades]
+    cursor.execute(f"""
+        INSERT INTO resumen_ciudad
+        SELECT {CIUDAD}, {ESTADISTICAS}
+        FROM locales_unicos {filtro}
+        GROUP BY 1
+    """, params)
+
+
+def _refrescar_histograma(cursor, variable, bins=NUM_BINS):
+    # Los límites de los bins dependen del mínimo y máximo global, así que se recalcula completo
+    cursor.execute("DELETE FROM histograma WHERE variable = %s", (variable,))
+    cursor.execute(f"""
+        WITH limites AS (
+            SELECT min({variable}) AS minimo, max({variable}) AS maximo
+            FROM locales_unicos WHERE {variable} >= 0
+        ),
+        conteos AS (
+            SELECT LEAST(width_bucket({variable}, minimo, maximo, %s), %s) AS bin, count(*) AS n
+            FROM locales_unicos, limites
+            WHERE {variable} >= 0 AND maximo > minimo
+            GROUP BY 1
+        )
+        INSERT INTO histograma
+        SELECT %s, bin,
+               minimo + (bin - 1) * (maximo - minimo) / %s,
+               minimo + bin * (maximo - minimo) / %s,
+               n
+        FROM conteos, limites
+    """, (bins, bins, variable, bins, bins))
+
+
+def refrescar_agregados(conn, barrios=None, commit=True):
+    """
+    Recalcula las tablas de resumen. Con 'barrios' (lista de tuplas (ciudad, barrio)) solo se
+    recalculan esos barrios y sus ciudades, que es lo que cambia después de una carga;
+    sin 'barrios' se recalcula todo. Los histogramas siempre se recalculan completos.
+    Solo modifica datos: las tablas se crean antes con cargador_bd.asegurar_esquema, así la
+    actualización dentro de una carga no toma los bloqueos de los cambios de esquema.
+    """
+    if barrios is not None:
+        barrios = sorted({(ciudad or 'N/A', barrio or 'N/A') for ciudad, barrio in barrios})
+        # Los grupos sin ciudad o barrio no se pueden filtrar por índice; se recalcula todo
+        if any('N/A' in grupo for grupo in barrios):
+            barrios = None
+
+    if barrios == []:
+        if commit:
+            conn.commit()
+        return
+
+    with conn.cursor() as cursor:
+        _refrescar_barrios(cursor, barrios)
+        _refrescar_ciudades(cursor, None if barrios is None else sorted({ciudad for ciudad, _ in barrios}))
+        _refrescar_histograma(cursor, 'areacuadrada')
+        _refrescar_histograma(cursor, 'valorarriendo')
+    if commit:
+        conn.commit()
+
+
+if __name__ == "__main__":
+    from cargador_bd import asegurar_esquema
+
+    conexion = conectar()
+    try:
+        asegurar_esquema(conexion)
+        refrescar_agregados(conexion)
+    finally:
+        conexion.close()
+    print("Tablas de resumen recalculadas")
@@ -0,0 +1,168 @@
+import threading
+import time
+from decimal import Decimal
+import numpy as np
+import pandas as pd
+from acceso_datos import conexion, version_datos
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+# Columnas de texto que siempre se guardan como categóricas (se filtra por ellas)
+CATEGORICAS = ['barrio', 'ciudad', 'localidad', 'tipo', 'fuente']
+# Otras columnas de texto se vuelven categóricas si tienen a lo más esta proporción de valores distintos
+PROPORCION_CATEGORICA = 0.5
+
+TIPOS_ENTEROS = ['UInt8', 'Int8', 'UInt16', 'Int16', 'UInt32', 'Int32', 'Int64']
+
+_almacen = {'valor': None, 'version': None, 'cargado': 0.0}
+_almacen_lock = threading.Lock()
+
+
+def _reducir_numero(serie):
+    """
+    Convierte una columna numérica (incluidos los Decimal de NUMERIC) al tipo más pequeño
+    que la representa: entero con nulos si no tiene decimales, float32 si los tiene.
+    """
+    valores = pd.to_numeric(serie, errors='coerce')
+    validos = valores.dropna()
+    if validos.empty:
+        return valores.astype('Float32')
+    if (validos % 1 == 0).all():
+        minimo, maximo = validos.min(), validos.max()
+        for tipo in TIPOS_ENTEROS:
+            info = np.iinfo(tipo.lower())
+            if info.min <= minimo and maximo <= info.max:
+                return valores.astype(tipo)
+    return valores.astype('float32')
+
+
+def _primer_valor(serie):
+    validos = serie.dropna()
+    return validos.iloc[0] if len(validos) else None
+
+
+def _es_texto(serie):
+    return serie.dtype == object or pd.api.types.is_string_dtype(serie.dtype)
+
+
+def compactar(datos):
+    """
+    Devuelve una copia de 'datos' con los textos repetidos como categóricas, el resto de
+    textos en columnas de Arrow (si pyarrow está instalado) y los números en el tipo más
+    pequeño que los contiene.
+    """
+    columnas = {}
+    for nombre, serie in datos.items():
+        if nombre in CATEGORICAS:
+            columnas[nombre] = serie.astype('category')
+        elif isinstance(_primer_valor(serie), Decimal):
+            columnas[nombre] = _reducir_numero(serie)
+        elif _es_texto(serie):
+            if serie.nunique(dropna=True) <= PROPORCION_CATEGORICA * len(serie):
+                columnas[nombre] = serie.astype('category')
+            elif pyarrow is not None:
+                columnas[nombre] = serie.astype('string[pyarrow]')
+            else:
+                columnas[nombre] = serie
+        elif pd.api.types.is_numeric_dtype(serie.dtype) and not pd.api.types.is_bool_dtype(serie.dtype):
+            columnas[nombre] = _reducir_numero(serie)
+        else:
+            columnas[nombre] = serie
+    return pd.DataFrame(columnas, index=pd.RangeIndex(len(datos)))
+
+
+class AlmacenLocales:
+    """
+    Tabla de locales en memoria, en formato compacto, con un índice barrio -> filas.
+
+    Se comparte entre todas las sesiones del proceso (ver obtener_almacen), así que los
+    DataFrames que devuelve no se deben modificar en el lugar.
+    """
+
+    def __init__(self, datos):
+        self.bytes_originales = int(datos.memory_usage(deep=True).sum())
+        if 'punto' in datos:
+            # El POINT llega como texto '(longitud,latitud)': se guarda como dos float32
+            partes = datos['punto'].str.strip('()').str.split(',', expand=True).reindex(columns=[0, 1])
+            datos = datos.drop(columns='punto').assign(
+                latitud=pd.to_numeric(partes[1], errors='coerce').astype('float32'),
+                longitud=pd.to_numeric(partes[0], errors='coerce').astype('float32')
+            )
+        self.datos = compactar(datos)
+        self.indice_barrio = self._indice('barrio')
+
+    def _indice(self, columna):
+        """
+        Posiciones de las filas de cada valor de 'columna', ordenadas, en arreglos de numpy.
+        """
+        if columna not in self.datos:
+            return {}
+        codigos = self.datos[columna].cat.codes.to_numpy()
+        orden = np.argsort(codigos, kind='stable')
+        limites = np.searchsorted(codigos[orden], np.arange(len(self.datos[columna].cat.categories) + 1))
+        return {
+            valor: orden[limites[i]:limites[i + 1]]
+            for i, valor in enumerate(self.datos[columna].cat.categories)
+            if limites[i + 1] > limites[i]
+        }
+
+    def __len__(self):
+        return len(self.datos)
+
+    def barrios(self):
+        """
+        Lista ordenada de barrios con al menos un local.
+        """
+        return sorted(self.indice_barrio)
+
+    def filas(self, barrio=None, ciudad=None, prioridad=None):
+        """
+        Posiciones de las filas que cumplen los filtros. El barrio se resuelve con el índice;
+        la ciudad y la prioridad se comparan solo sobre esas filas, por código de categoría.
+        """
+        if barrio is not None:
+            posiciones = self.indice_barrio.get(barrio, np.array([], dtype=np.intp))
+        else:
+            posiciones = np.arange(len(self.datos))
+        if ciudad is not None:
+            ciudades = self.datos['ciudad'].cat.categories
+            codigo = ciudades.get_loc(ciudad) if ciudad in ciudades else -2
+            posiciones = posiciones[self.datos['ciudad'].cat.codes.to_numpy()[posiciones] == codigo]
+        if prioridad is not None:
+            valores = self.datos['prioridad'].to_numpy(dtype='float64', na_value=np.nan)
+            posiciones = posiciones[valores[posiciones] == prioridad]
+        return posiciones
+
+    def filtrar(self, barrio=None, ciudad=None, prioridad=None, columnas=None):
+        """
+        DataFrame con las filas que cumplen los filtros (y solo 'columnas', si se indican).
+        """
+        datos = self.datos if columnas is None else self.datos[columnas]
+        return datos.take(self.filas(barrio, ciudad, prioridad))
+
+    def memoria(self):
+        """
+        Bytes en memoria de la tabla compacta y de la original, por comparación.
+        """
+        return {'bytes': int(self.datos.memory_usage(deep=True).sum()), 'bytes_originales': self.bytes_originales}
+
+
+def obtener_almacen(ttl=300):
+    """
+    Devuelve el almacén de locales del proceso, sin los listados duplicados. Se recarga desde la base de datos cuando
+    pasan 'ttl' segundos o la tabla cambia; mientras tanto todas las sesiones usan el mismo.
+    """
+    version = version_datos()
+    with _almacen_lock:
+        vigente = (
+            _almacen['valor'] is not None and _almacen['version'] == version
+            and time.monotonic() - _almacen['cargado'] < ttl
+        )
+        if not vigente:
+            with conexion() as conn:
+                datos = pd.read_sql("SELECT * FROM locales_unicos", conn)
+            _almacen.update(valor=AlmacenLocales(datos), version=version, cargado=time.monotonic())
+        return _almacen['valor']
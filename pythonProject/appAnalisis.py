@@ -1,8 +1,19 @@
 import streamlit as st
-import psycopg2
-import pandas as pd
-import plotly.express as px
 import locale
+from acceso_datos import consultar_df, metricas_cache
+from almacen import obtener_almacen
+from instantaneas import abrir_instantanea, instantanea_actual, ruta_csv, ruta_parquet
+
+
+def _plotly_express():
+    """
+    Importa plotly.express. Es una importación diferida a propósito: se llama después de
+    mostrar la tabla, para que en el primer arranque del servidor la tabla aparezca sin
+    esperar la importación de plotly.
+    """
+    import plotly.express as px
+    return px
+
 
 # Configuración de la página (nombre de pestaña, ícono y layout)
 st.set_page_config(
@@ -14,21 +25,14 @@ st.set_page_config(
 # Configuración para formato de moneda
 locale.setlocale(locale.LC_ALL, 'es_CO.UTF-8')
 
-# Conexión a la base de datos PostgreSQL
-def get_data_from_db():
-    conn = psycopg2.connect(
-        host="localhost",
-        database="arrendamiento_comercial",
-        user="postgres",
-        password="123456"
-    )
-    query = "SELECT * FROM locales_comerciales"
-    data = pd.read_sql(query, conn)
-    conn.close()
-    return data
+# Cargar datos desde el almacén compacto compartido entre sesiones (sin reconectar en cada rerun)
+almacen = obtener_almacen()
+data = almacen.datos
 
-# Cargar datos
-data = get_data_from_db()
+# Resúmenes precalculados por el cargador (ver agregados.py): unas cientos de filas en lugar de la tabla completa
+resumen_barrio = consultar_df("SELECT * FROM resumen_barrio")
+resumen_ciudad = consultar_df("SELECT * FROM resumen_ciudad")
+histograma_area = consultar_df("SELECT * FROM histograma WHERE variable = 'areacuadrada' ORDER BY bin")
 
 # Título de la aplicación
 st.title("Análisis de Locales Comerciales en Arriendo en Bogotá")
@@ -75,26 +79,67 @@ with col3:
     st.image("p4sretina-resaltado-2-fotor-bg-remover-20241016223938.png", use_column_width=False)
     st.markdown('</div>', unsafe_allow_html=True)
 
-# Mostrar la tabla completa
+# Mostrar la tabla: se lee la última instantánea (ver instantaneas.py) mapeada en memoria
+# y solo se envían al navegador las primeras FILAS_VISTA filas
+FILAS_VISTA = 1000
+instantanea = instantanea_actual()
 st.subheader("Datos completos de locales comerciales")
-st.dataframe(data)
-
-# Función para descargar los datos en formato CSV
-def descargar_csv(df):
-    return df.to_csv(index=False).encode('utf-8')
-
-# Botón para descargar el archivo CSV
-csv = descargar_csv(data)
-st.download_button(
-    label="Descargar datos en CSV",
-    data=csv,
-    file_name="locales_comerciales.csv",
-    mime="text/csv"
-)
+barrio_tabla = st.selectbox("Filtrar la tabla por barrio:", ["Todos"] + almacen.barrios())
+if barrio_tabla != "Todos":
+    st.dataframe(almacen.filtrar(barrio=barrio_tabla))
+elif instantanea is not None:
+    tabla = abrir_instantanea(instantanea['version'])
+    st.dataframe(tabla.slice(0, FILAS_VISTA))
+    st.caption(f"Primeras {min(FILAS_VISTA, tabla.num_rows)} de {tabla.num_rows} filas · instantánea {instantanea['version']}")
+else:
+    st.dataframe(data.head(FILAS_VISTA))
+    st.caption(f"Primeras {min(FILAS_VISTA, len(data))} de {len(data)} filas")
+
+# Función para leer un archivo de descarga (solo se llama cuando alguien hace clic)
+def leer_archivo(ruta):
+    with open(ruta, 'rb') as f:
+        return f.read()
+
+# Botones de descarga: el CSV se genera la primera vez que se pide y queda guardado por versión
+if instantanea is not None:
+    version = instantanea['version']
+    col_csv, col_parquet = st.columns(2)
+    with col_csv:
+        st.download_button(
+            label="Descargar datos en CSV",
+            data=lambda: leer_archivo(ruta_csv(version)),
+            file_name=f"locales_comerciales_{version}.csv",
+            mime="text/csv",
+            on_click='ignore'
+        )
+    with col_parquet:
+        st.download_button(
+            label="Descargar datos en Parquet",
+            data=lambda: leer_archivo(ruta_parquet(version)),
+            file_name=f"locales_comerciales_{version}.parquet",
+            mime="application/vnd.apache.parquet",
+            on_click='ignore'
+        )
+else:
+    st.download_button(
+        label="Descargar datos en CSV",
+        data=lambda: data.to_csv(index=False).encode('utf-8'),
+        file_name="locales_comerciales.csv",
+        mime="text/csv",
+        on_click='ignore'
+    )
+
+px = _plotly_express()
 
 # Análisis 1: Precio promedio por barrio
 st.subheader("Análisis del valor promedio de arriendo por barrio")
-precios_barrio = data.groupby('barrio')['valorarriendo'].mean().reset_index()
+# Promedio ponderado por número de locales con precio, por si un barrio aparece en varias ciudades
+# (assign devuelve una copia: los DataFrames de consultar_df son compartidos por todas las sesiones)
+precios_barrio = resumen_barrio.assign(
+    suma_precio=resumen_barrio['precio_promedio'].astype(float) * resumen_barrio['n_precio']
+).groupby('barrio')[['suma_precio', 'n_precio']].sum()
+precios_barrio['valorarriendo'] = precios_barrio['suma_precio'] / precios_barrio['n_precio']
+precios_barrio = precios_barrio[['valorarriendo']].dropna().reset_index()
 
 # Ordenar los precios promedio de mayor a menor
 precios_barrio = precios_barrio.sort_values(by='valorarriendo', ascending=False)
@@ -117,25 +162,29 @@ st.plotly_chart(fig_precios_barrio)
 # Análisis 2: Distribución del tamaño de locales (área en m²)
 st.subheader("Distribución del tamaño de locales (área en m²)")
 
-# Filtrar valores nulos y erróneos
-data_filtrada = data[data['areacuadrada'].notnull() & (data['areacuadrada'] >= 0)]
+# Bins precalculados (solo áreas válidas); se dibujan como barras contiguas
+barras_area = histograma_area.assign(
+    centro=(histograma_area['limite_inferior'].astype(float) + histograma_area['limite_superior'].astype(float)) / 2,
+    ancho=histograma_area['limite_superior'].astype(float) - histograma_area['limite_inferior'].astype(float),
+    porcentaje=histograma_area['n'] / histograma_area['n'].sum()
+)
 
-# Crear el histograma
-fig_tamano = px.histogram(
-    data_filtrada,
-    x='areacuadrada',
-    nbins=15,  # Ajustar el número de bins
+fig_tamano = px.bar(
+    barras_area,
+    x='centro',
+    y='porcentaje',
     title="Distribución del tamaño de locales (área en m²)",
-    labels={'areacuadrada': 'Área (m²)'},
-    histnorm='percent'  # Normaliza el histograma para mostrar porcentajes
+    labels={'centro': 'Área (m²)', 'porcentaje': 'Porcentaje (%)'}
 )
+fig_tamano.update_traces(width=barras_area['ancho'])
 
 # Ajustar el rango de valores del eje x
 fig_tamano.update_layout(
     xaxis_title='Área (m²)',
     yaxis_title='Porcentaje (%)',
-    xaxis=dict(range=[data_filtrada['areacuadrada'].min(), data_filtrada['areacuadrada'].max()]),  # Ajustar rango del eje x
-    yaxis=dict(tickformat='%')
+    xaxis=dict(range=[histograma_area['limite_inferior'].astype(float).min(), histograma_area['limite_superior'].astype(float).max()]),
+    yaxis=dict(tickformat='%'),
+    bargap=0
 )
 
 st.plotly_chart(fig_tamano)
@@ -143,7 +192,7 @@ st.plotly_chart(fig_tamano)
 
 # Análisis 3: Tendencia de locales prioritarios
 st.subheader("Tendencia de locales prioritarios")
-prioritarios = data[data['prioridad'] == 1]
+prioritarios = almacen.filtrar(prioridad=1, columnas=['barrio', 'ciudad', 'valorarriendo', 'areacuadrada'])
 fig_prioritarios = px.scatter(
     prioritarios,
     x='barrio',
@@ -169,10 +218,15 @@ st.markdown("""
 
 # Función para mostrar insights adicionales
 def mostrar_insights():
-    num_locales = data.shape[0]
-    valor_promedio = locale.currency(data['valorarriendo'].mean(), grouping=True)
-    area_promedio = data['areacuadrada'].mean()
-    locales_prioritarios = prioritarios.shape[0]
+    num_locales = int(resumen_ciudad['n'].sum())
+    n_precio = resumen_ciudad['n_precio'].sum()
+    n_area = resumen_ciudad['n_area'].sum()
+    valor_promedio = locale.currency(
+        (resumen_ciudad['precio_promedio'].astype(float) * resumen_ciudad['n_precio']).sum() / n_precio if n_precio else 0,
+        grouping=True
+    )
+    area_promedio = (resumen_ciudad['area_promedio'].astype(float) * resumen_ciudad['n_area']).sum() / n_area if n_area else 0
+    locales_prioritarios = int(resumen_ciudad['n_prioritarios'].sum())
 
     st.markdown(f"**Total de locales comerciales:** {num_locales}")
     st.markdown(f"**Valor de arriendo promedio:** {valor_promedio}")
@@ -182,3 +236,7 @@ def mostrar_insights():
 # Mostrar insights adicionales
 mostrar_insights()
 
+# Métricas del caché de datos compartido entre sesiones
+with st.sidebar.expander("Métricas del caché de datos"):
+    st.json({**metricas_cache(), 'almacen': almacen.memoria()})
+
@@ -1,41 +1,12 @@
 import streamlit as st
-import psycopg2
-import pandas as pd
 import locale
-import re
+from busqueda import barrios_disponibles, buscar_locales, contar_locales, rangos_filtros
+from gazetteer import obtener_gazetteer
+from tarjetas import tarjetas_en_cache
 
 # Configuración de la localización para formateo de moneda
 locale.setlocale(locale.LC_ALL, 'es_CO.UTF-8')
 
-# Conexión a la base de datos PostgreSQL
-def get_data_from_db():
-    # Conexión a la base de datos PostgreSQL
-    conn = psycopg2.connect(
-        host="localhost",
-        database="arrendamiento_comercial",
-        user="postgres",
-        password="123456"
-    )
-    query = "SELECT * FROM locales_comerciales"
-    data = pd.read_sql(query, conn)
-    conn.close()
-    return data
-
-# Función para validar si un enlace es una URL válida
-def es_url_valido(url):
-    regex = re.compile(
-        r'^(?:http|ftp)s?://'  # esquema
-        r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+(?:[A-Z]{2,6}\.?|[A-Z0-9-]{2,}\.?)|'  # dominio...
-        r'localhost|'  # localhost...
-        r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}|'  # dirección IP
-        r'\[?[A-F0-9]*:[A-F0-9:]+\]?)'  # dirección IPv6
-        r'(?::\d+)?'  # puerto
-        r'(?:/?|[/?]\S+)$', re.IGNORECASE)
-    return re.match(regex, url) is not None
-
-# Cargar datos
-data = get_data_from_db()
-
 # Ajustar las imágenes en una fila: izquierda, centro, derecha
 col1, col2, col3 = st.columns([1, 1, 1])
 
@@ -51,60 +22,86 @@ with col3:
 # Título de la aplicación debajo de las imágenes
 st.title("Búsqueda de Locales Comerciales en Arriendo en Bogotá")
 
-# Filtro de búsqueda por barrio
-barrios_unicos = data['barrio'].unique()
-barrio_seleccionado = st.selectbox("Selecciona un barrio:", ["Todos"] + list(barrios_unicos))
-
-# Función para mostrar los locales comerciales
-def mostrar_locales(data, barrio):
-    # Filtrar locales por barrio si se selecciona uno específico
-    if barrio != "Todos":
-        data = data[data['barrio'] == barrio]
-
-    # Filtrar los locales prioritarios
-    prioritarios = data[data['prioridad'] == 1]
-    no_prioritarios = data[data['prioridad'] != 1]
-
-    # Mostrar locales prioritarios primero
-    for idx, row in prioritarios.iterrows():
-        st.markdown(
-            f"""
-            <div style="border: 4px solid gold; padding: 15px; margin-bottom: 20px; border-radius: 10px;">
-                <h3>{row['barrio']}, {row['ciudad']}</h3>
-                <img src="{row['fotolocal']}" style="width: 100%; height: auto;">
-                <p><strong>Valor Arriendo:</strong> {locale.currency(row['valorarriendo'], grouping=True)}</p>
-                <p><strong>Tamaño:</strong> {row['areacuadrada']} m²</p>
-                {'<p><strong>Garajes:</strong> ' + str(row['garajes']) + '</p>' if row['garajes'] > 0 else ''}
-                <p><strong>Baños:</strong> {row['banios']}</p>  <!-- Campo de baños añadido -->
-                {f'<p><a href="{row["link"].strip()}" target="_blank" style="text-decoration: none;">Ver detalles</a></p>' if es_url_valido(row["link"].strip()) else "<p>Enlace no disponible</p>"}
-                <p><a href="https://wa.me/+57{row['telefonocontacto'].strip()}" target="_blank" style="text-decoration: none;">Contactar vía WhatsApp</a></p>
-                {f'<p><a href="https://www.google.com/maps/place/{row["coordenadas"].strip()}" target="_blank" style="text-decoration: none;">Ver en el mapa</a></p>' if row['coordenadas'] and ',' in row['coordenadas'] else ''}
-            </div>
-            """,
-            unsafe_allow_html=True
-        )
-
-    # Mostrar locales no prioritarios
-    for idx, row in no_prioritarios.iterrows():
-        st.markdown(
-            f"""
-            <div style="border: 4px solid gray; padding: 15px; margin-bottom: 20px; border-radius: 10px;">
-                <h3>{row['barrio']}, {row['ciudad']}</h3>
-                <img src="{row['fotolocal']}" style="width: 100%; height: auto;">
-                <p><strong>Valor Arriendo:</strong> {locale.currency(row['valorarriendo'], grouping=True)}</p>
-                <p><strong>Tamaño:</strong> {row['areacuadrada']} m²</p>
-                {'<p><strong>Garajes:</strong> ' + str(row['garajes']) + '</p>' if row['garajes'] > 0 else ''}
-                <p><strong>Baños:</strong> {row['banios']}</p>  <!-- Campo de baños añadido -->
-                {f'<p><a href="{row["link"].strip()}" target="_blank" style="text-decoration: none;">Ver detalles</a></p>' if es_url_valido(row["link"].strip()) else "<p>Enlace no disponible</p>"}
-                <p><a href="https://wa.me/+57{row['telefonocontacto'].strip()}" target="_blank" style="text-decoration: none;">Contactar vía WhatsApp</a></p>
-                {f'<p><a href="https://www.google.com/maps/place/{row["coordenadas"].strip()}" target="_blank" style="text-decoration: none;">Ver en el mapa</a></p>' if row['coordenadas'] and ',' in row['coordenadas'] else ''}
-            </div>
-            """,
-            unsafe_allow_html=True
-        )
+# Filtros de búsqueda: se aplican en la base de datos, no sobre la tabla completa en memoria
+rangos = rangos_filtros()
+barrio_seleccionado = st.selectbox("Selecciona un barrio:", ["Todos"] + barrios_disponibles())
+col_precio, col_area = st.columns(2)
+with col_precio:
+    precio_min, precio_max = st.slider(
+        "Valor del arriendo (COP):",
+        min_value=int(rangos['precio_min'] or 0),
+        max_value=int(rangos['precio_max'] or 0) + 1,
+        value=(int(rangos['precio_min'] or 0), int(rangos['precio_max'] or 0) + 1),
+        step=50000
+    )
+with col_area:
+    area_min, area_max = st.slider(
+        "Tamaño (m²):",
+        min_value=int(rangos['area_min'] or 0),
+        max_value=int(rangos['area_max'] or 0) + 1,
+        value=(int(rangos['area_min'] or 0), int(rangos['area_max'] or 0) + 1)
+    )
+solo_prioritarios = st.checkbox("Solo locales prioritarios")
+
+# Filtro por distancia a un punto: un barrio o localidad del gazetteer, o coordenadas escritas
+centro, radio_m = None, None
+if st.checkbox("Filtrar por distancia a un punto"):
+    lugares = obtener_gazetteer().lugares
+    col_lugar, col_radio = st.columns(2)
+    with col_lugar:
+        lugar = st.selectbox("Punto de referencia:", ["Coordenadas"] + sorted(lugares))
+        if lugar == "Coordenadas":
+            centro = (
+                st.number_input("Latitud:", value=4.6486, format="%.4f"),
+                st.number_input("Longitud:", value=-74.0628, format="%.4f")
+            )
+        else:
+            centro = tuple(lugares[lugar])
+    with col_radio:
+        radio_m = st.slider("Radio (m):", min_value=100, max_value=10000, value=1000, step=100)
+
+# Un rango que no se movió de sus extremos no filtra (así se incluyen locales sin precio o área)
+filtros = {
+    'barrio': None if barrio_seleccionado == "Todos" else barrio_seleccionado,
+    'precio_min': precio_min if precio_min > int(rangos['precio_min'] or 0) else None,
+    'precio_max': precio_max if precio_max <= int(rangos['precio_max'] or 0) else None,
+    'area_min': area_min if area_min > int(rangos['area_min'] or 0) else None,
+    'area_max': area_max if area_max <= int(rangos['area_max'] or 0) else None,
+    'solo_prioritarios': solo_prioritarios,
+    'centro': centro,
+    'radio_m': radio_m
+}
+
+# Paginación por llave: se guarda el cursor de inicio de cada página visitada
+# y se vuelve a la primera página cuando cambian los filtros
+if st.session_state.get('filtros') != filtros:
+    st.session_state['filtros'] = filtros
+    st.session_state['cursores'] = [None]
+LOCALES_POR_PAGINA = 20
+
+# Función para mostrar los locales comerciales: todas las tarjetas van en un solo bloque
+# HTML, armado por columnas y guardado en caché por filtros y página
+def mostrar_locales(data, llave):
+    st.markdown(tarjetas_en_cache(llave, data), unsafe_allow_html=True)
 
 # Título principal
 st.title("Locales Comerciales en Arriendo en Bogotá")
 
-# Mostrar locales comerciales
-mostrar_locales(data, barrio_seleccionado)
+# Mostrar solo la página actual de locales comerciales
+cursores = st.session_state['cursores']
+pagina, siguiente = buscar_locales(filtros, cursor=cursores[-1], limite=LOCALES_POR_PAGINA)
+total = contar_locales(filtros)
+st.caption(f"{total} locales encontrados · página {len(cursores)} de {max(1, -(-total // LOCALES_POR_PAGINA))}")
+if centro is not None:
+    st.map(pagina.dropna(subset=['latitud', 'longitud']), latitude='latitud', longitude='longitud')
+mostrar_locales(pagina, (tuple(sorted(filtros.items())), cursores[-1], LOCALES_POR_PAGINA))
+
+col_anterior, col_siguiente = st.columns(2)
+with col_anterior:
+    if st.button("← Anterior", disabled=len(cursores) == 1):
+        cursores.pop()
+        st.rerun()
+with col_siguiente:
+    if st.button("Siguiente →", disabled=siguiente is None):
+        cursores.append(siguiente)
+        st.rerun()
@@ -0,0 +1,56 @@
+import argparse
+import glob
+import os
+import time
+from extractor import extraer_tarjetas_bs4, extraer_tarjetas_lxml
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'ciencuadras')
+
+
+def cargar_fixtures(directorio=FIXTURES):
+    """
+    Lee las páginas de resultados guardadas que se usan como entrada del benchmark.
+    """
+    paginas = []
+    for ruta in sorted(glob.glob(os.path.join(directorio, '*.html'))):
+        with open(ruta, encoding='utf-8') as f:
+            paginas.append(f.read())
+    return paginas
+
+
+def medir(extractor, paginas, repeticiones):
+    """
+    Ejecuta parseo + extracción sobre todas las páginas 'repeticiones' veces.
+    Devuelve (tarjetas procesadas, segundos).
+    """
+    tarjetas = 0
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        for pagina in paginas:
+            for _tarjeta in extractor(pagina):
+                tarjetas += 1
+    return tarjetas, time.perf_counter() - inicio
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Micro-benchmark del extractor de tarjetas de ciencuadras")
+    parser.add_argument('--fixtures', default=FIXTURES, help="Directorio con páginas HTML guardadas")
+    parser.add_argument('--repeticiones', type=int, default=20)
+    args = parser.parse_args()
+
+    paginas = cargar_fixtures(args.fixtures)
+    if not paginas:
+        raise SystemExit(f"No hay páginas .html en {args.fixtures}")
+
+    # Ambos extractores deben producir exactamente los mismos registros
+    for pagina in paginas:
+        if list(extraer_tarjetas_bs4(pagina)) != list(extraer_tarjetas_lxml(pagina)):
+            raise SystemExit("Los extractores bs4 y lxml producen resultados distintos")
+
+    resultados = {}
+    for nombre, extractor in [('bs4 (html.parser)', extraer_tarjetas_bs4), ('lxml + XPath', extraer_tarjetas_lxml)]:
+        tarjetas, segundos = medir(extractor, paginas, args.repeticiones)
+        resultados[nombre] = tarjetas / segundos
+        print(f"{nombre:<20} {tarjetas} tarjetas en {segundos:.3f}s -> {tarjetas / segundos:,.0f} tarjetas/s")
+
+    print(f"Aceleración: {resultados['lxml + XPath'] / resultados['bs4 (html.parser)']:.1f}x")
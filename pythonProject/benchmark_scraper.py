@@ -0,0 +1,122 @@
+import argparse
+import contextlib
+import csv
+import io
+import json
+import os
+import platform
+import resource
+import tempfile
+import time
+import ciencuadras
+import geocodificacion
+from metricas import metricas_scraper
+from servidor_local import ServidorFixtures
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+
+# Métricas que no deben empeorar más que la tolerancia respecto al baseline (True: más alto es mejor)
+METRICAS_COMPARADAS = {'paginas_por_segundo': True, 'tarjetas_por_segundo': True, 'llamadas_geocodificacion': False}
+
+
+def ejecutar(paginas=10, categorias=('local', 'oficina'), workers=4, retardo=0.0, fetcher='http', verbose=False):
+    """
+    Corre scrape_properties completo contra el servidor local (páginas y Nominatim guardados)
+    en un directorio temporal, con el caché de geocodificación vacío. Devuelve las métricas;
+    los tiempos por etapa son los que registra el propio scraper en metricas_scraper.
+    """
+    servidor = ServidorFixtures(retardo=retardo).iniciar()
+    directorio_original = os.getcwd()
+    url_nominatim, tasa = geocodificacion.NOMINATIM_URL, geocodificacion.limitador_nominatim.tasa
+    try:
+        geocodificacion.NOMINATIM_URL = servidor.url + '/search'
+        geocodificacion.limitador_nominatim.tasa = 1000.0  # El servidor local no tiene política de uso
+        with tempfile.TemporaryDirectory() as directorio:
+            os.chdir(directorio)
+            consola = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+            inicio = time.perf_counter()
+            with consola:
+                ciencuadras.scrape_properties(
+                    num_pages=paginas, workers=workers, categorias=list(categorias),
+                    base_url=servidor.url + '/{categoria}?page={page}', fetcher=fetcher,
+                    csv_file='propiedades.csv'
+                )
+            segundos = time.perf_counter() - inicio
+            with open('propiedades.csv', newline='', encoding='utf-8') as f:
+                tarjetas = sum(1 for _ in csv.DictReader(f))
+    finally:
+        os.chdir(directorio_original)
+        geocodificacion.NOMINATIM_URL, geocodificacion.limitador_nominatim.tasa = url_nominatim, tasa
+        servidor.shutdown()
+        servidor.server_close()
+
+    total_paginas = paginas * len(categorias)
+    return {
+        'fecha': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'parametros': {'paginas': paginas, 'categorias': list(categorias), 'workers': workers,
+                       'retardo': retardo, 'fetcher': fetcher},
+        'paginas': total_paginas,
+        'tarjetas': tarjetas,
+        'segundos': round(segundos, 4),
+        'paginas_por_segundo': round(total_paginas / segundos, 2),
+        'tarjetas_por_segundo': round(tarjetas / segundos, 2),
+        'llamadas_geocodificacion': servidor.solicitudes['nominatim'],
+        'rss_maximo_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'etapas': {nombre: {'segundos': round(etapa['segundos'], 4), 'llamadas': etapa['llamadas']}
+                   for nombre, etapa in metricas_scraper.resumen()['etapas'].items()}
+    }
+
+
+def comparar(resultado, baseline, tolerancia=0.2):
+    """
+    Devuelve la lista de regresiones de 'resultado' frente a 'baseline'.
+    """
+    regresiones = []
+    for metrica, mas_alto_es_mejor in METRICAS_COMPARADAS.items():
+        actual, referencia = resultado[metrica], baseline.get(metrica)
+        if referencia is None:
+            continue
+        if mas_alto_es_mejor and actual < referencia * (1 - tolerancia):
+            regresiones.append(f"{metrica}: {actual} < {referencia} (-{tolerancia:.0%})")
+        elif not mas_alto_es_mejor and actual > referencia:
+            regresiones.append(f"{metrica}: {actual} > {referencia}")
+    return regresiones
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de punta a punta del scraper contra fixtures locales")
+    parser.add_argument('--pages', type=int, default=10, help="Páginas por categoría")
+    parser.add_argument('--categorias', nargs='+', default=['local', 'oficina'])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--retardo', type=float, default=0.0, help="Latencia simulada por solicitud, en segundos")
+    parser.add_argument('--fetcher', choices=['http', 'selenium'], default='http',
+                        help="'selenium' requiere Chrome instalado")
+    parser.add_argument('--salida', default='benchmark_scraper.json', help="Archivo JSON con el resultado")
+    parser.add_argument('--baseline', default=BASELINE, help="Baseline JSON contra el que se compara")
+    parser.add_argument('--tolerancia', type=float, default=0.2, help="Caída relativa permitida en el rendimiento")
+    parser.add_argument('--guardar-baseline', action='store_true', help="Guardar este resultado como nuevo baseline")
+    parser.add_argument('--verbose', action='store_true', help="Mostrar la salida del scraper")
+    args = parser.parse_args()
+
+    resultado = ejecutar(args.pages, args.categorias, args.workers, args.retardo, args.fetcher, args.verbose)
+    print(json.dumps(resultado, indent=2, ensure_ascii=False))
+    with open(args.salida, 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, indent=2, ensure_ascii=False)
+
+    if args.guardar_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(resultado, f, indent=2, ensure_ascii=False)
+        print(f"Baseline guardado en '{args.baseline}'")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('parametros') != resultado['parametros']:
+            print("Aviso: el baseline se generó con otros parámetros; la comparación no es directa")
+        regresiones = comparar(resultado, baseline, args.tolerancia)
+        if regresiones:
+            print("Regresiones frente al baseline:")
+            for regresion in regresiones:
+                print(f"  {regresion}")
+            raise SystemExit(1)
+        print("Sin regresiones frente al baseline")
@@ -0,0 +1,131 @@
+from acceso_datos import conexion, consultar_df
+from espacial import LAT_LON, asegurar_esquema_espacial, condicion_radio
+
+# Columnas que necesita la vista de búsqueda (evita traer la tabla completa). Las consultas
+# leen locales_unicos: un local publicado en varios portales aparece una sola vez.
+COLUMNAS = [
+    'id_local', 'barrio', 'ciudad', 'fotolocal', 'valorarriendo', 'areacuadrada',
+    'garajes', 'banios', 'link', 'telefonocontacto', 'coordenadas', 'prioridad'
+]
+
+# Grupo de orden: 0 para los prioritarios, 1 para el resto. Se indexa como expresión
+# para que el orden y la paginación por llave usen el índice.
+GRUPO = "(CASE WHEN prioridad = 1 THEN 0 ELSE 1 END)"
+
+INDICES = f"""
+    CREATE INDEX IF NOT EXISTS locales_comerciales_orden_idx ON locales_comerciales ({GRUPO}, id_local);
+    CREATE INDEX IF NOT EXISTS locales_comerciales_barrio_orden_idx ON locales_comerciales (barrio, {GRUPO}, id_local);
+    CREATE INDEX IF NOT EXISTS locales_comerciales_valorarriendo_idx ON locales_comerciales (valorarriendo);
+    CREATE INDEX IF NOT EXISTS locales_comerciales_areacuadrada_idx ON locales_comerciales (areacuadrada);
+"""
+
+
+def crear_indices(conn):
+    """
+    Crea los índices que usan los filtros, el filtro por distancia y la paginación de la búsqueda.
+    """
+    asegurar_esquema_espacial(conn)
+    with conn.cursor() as cursor:
+        cursor.execute(INDICES)
+    conn.commit()
+
+
+def _condiciones(filtros):
+    condiciones, params = [], []
+    if filtros.get('barrio'):
+        condiciones.append("barrio = %s")
+        params.append(filtros['barrio'])
+    if filtros.get('precio_min') is not None:
+        condiciones.append("valorarriendo >= %s")
+        params.append(filtros['precio_min'])
+    if filtros.get('precio_max') is not None:
+        condiciones.append("valorarriendo <= %s")
+        params.append(filtros['precio_max'])
+    if filtros.get('area_min') is not None:
+        condiciones.append("areacuadrada >= %s")
+        params.append(filtros['area_min'])
+    if filtros.get('area_max') is not None:
+        condiciones.append("areacuadrada <= %s")
+        params.append(filtros['area_max'])
+    if filtros.get('solo_prioritarios'):
+        condiciones.append("prioridad = 1")
+    if filtros.get('centro') is not None and filtros.get('radio_m'):
+        condicion, params_radio = condicion_radio(*filtros['centro'], filtros['radio_m'])
+        condiciones.append(condicion)
+        params.extend(params_radio)
+    return condiciones, params
+
+
+def construir_consulta(filtros, cursor=None, limite=20):
+    """
+    Arma la consulta parametrizada de una página de resultados: prioritarios primero y luego
+    por 'id_local'. 'cursor' es la llave (grupo, id_local) de la última fila de la página
+    anterior; con ella la siguiente página continúa por índice sin usar OFFSET.
+    Con 'centro' (latitud, longitud) y 'radio_m' en los filtros, solo se incluyen los locales
+    a esa distancia; la condición usa el índice espacial en lugar de recorrer la tabla.
+    """
+    condiciones, params = _condiciones(filtros)
+    if cursor is not None:
+        condiciones.append(f"({GRUPO}, id_local) > (%s, %s)")
+        params.extend(cursor)
+
+    where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+    query = f"""
+        SELECT {', '.join(COLUMNAS)}, {LAT_LON}, {GRUPO} AS grupo
+        FROM locales_unicos
+        {where}
+        ORDER BY {GRUPO}, id_local
+        LIMIT %s
+    """
+    params.append(limite)
+    return query, params
+
+
+def buscar_locales(filtros, cursor=None, limite=20):
+    """
+    Devuelve (página de resultados, cursor de la página siguiente). El cursor es None
+    cuando no hay más resultados. Los resultados se cachean por filtros y cursor.
+    """
+    query, params = construir_consulta(filtros, cursor, limite + 1)
+    datos = consultar_df(query, params)
+    siguiente = None
+    if len(datos) > limite:
+        datos = datos.iloc[:limite]
+        ultima = datos.iloc[-1]
+        siguiente = (int(ultima['grupo']), int(ultima['id_local']))
+    return datos, siguiente
+
+
+def contar_locales(filtros):
+    """
+    Número total de locales que cumplen los filtros.
+    """
+    condiciones, params = _condiciones(filtros)
+    where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+    return int(consultar_df(f"SELECT count(*) AS total FROM locales_unicos {where}", params)['total'].iloc[0])
+
+
+def barrios_disponibles():
+    """
+    Lista ordenada de barrios con al menos un local.
+    """
+    datos = consultar_df("SELECT DISTINCT barrio FROM locales_unicos WHERE barrio IS NOT NULL ORDER BY barrio")
+    return datos['barrio'].tolist()
+
+
+def rangos_filtros():
+    """
+    Valores mínimos y máximos de precio y área para configurar los filtros de la vista.
+    """
+    datos = consultar_df("""
+        SELECT min(valorarriendo) AS precio_min, max(valorarriendo) AS precio_max,
+               min(areacuadrada) AS area_min, max(areacuadrada) AS area_max
+        FROM locales_unicos
+    """)
+    return datos.iloc[0].to_dict()
+
+
+if __name__ == "__main__":
+    with conexion() as conn:
+        crear_indices(conn)
+    print("Índices de búsqueda creados")
@@ -0,0 +1,201 @@
+import argparse
+import csv
+import io
+import time
+from collections import Counter
+import pandas as pd
+from agregados import ESQUEMA as ESQUEMA_AGREGADOS, refrescar_agregados
+from conexion_bd import conectar
+from listados import id_listado
+from normalizacion import normalizar_propiedades
+
+# Columnas que llena el cargador, en el orden en que se envían por COPY
+COLUMNAS = [
+    'id_listado', 'descripcion', 'barrio', 'localidad', 'ciudad', 'tipo', 'fuente',
+    'valorarriendo', 'areacuadrada', 'banios', 'fotolocal', 'coordenadas'
+]
+
+# Columnas que se actualizan cuando un listado ya existe. 'prioridad', 'garajes',
+# 'telefonocontacto' y 'link' se administran a mano y no se tocan.
+COLUMNAS_ACTUALIZABLES = ['descripcion', 'tipo', 'valorarriendo', 'areacuadrada', 'banios', 'fotolocal', 'coordenadas']
+
+ESQUEMA = """
+    CREATE TABLE IF NOT EXISTS locales_comerciales (
+        barrio TEXT,
+        ciudad TEXT,
+        fotolocal TEXT,
+        valorarriendo NUMERIC,
+        areacuadrada NUMERIC,
+        garajes INTEGER DEFAULT 0,
+        banios INTEGER,
+        link TEXT DEFAULT '',
+        telefonocontacto TEXT DEFAULT '',
+        coordenadas TEXT,
+        prioridad INTEGER DEFAULT 0
+    );
+    ALTER TABLE locales_comerciales
+        ADD COLUMN IF NOT EXISTS id_listado TEXT,
+        ADD COLUMN IF NOT EXISTS descripcion TEXT,
+        ADD COLUMN IF NOT EXISTS localidad TEXT,
+        ADD COLUMN IF NOT EXISTS tipo TEXT,
+        ADD COLUMN IF NOT EXISTS fuente TEXT,
+        ADD COLUMN IF NOT EXISTS actualizado_en TIMESTAMPTZ DEFAULT now(),
+        ADD COLUMN IF NOT EXISTS id_local BIGSERIAL,
+        -- Punto (longitud, latitud) derivado de 'coordenadas' para las consultas espaciales (espacial.py)
+        ADD COLUMN IF NOT EXISTS punto POINT GENERATED ALWAYS AS (
+            CASE WHEN coordenadas ~ '^ *-?[0-9]+([.][0-9]+)? *, *-?[0-9]+([.][0-9]+)? *$'
+                 THEN point(btrim(split_part(coordenadas, ',', 2))::float8, btrim(split_part(coordenadas, ',', 1))::float8)
+            END
+        ) STORED,
+        -- id_listado del listado principal cuando es la misma propiedad publicada otra vez (duplicados.py)
+        ADD COLUMN IF NOT EXISTS id_canonico TEXT;
+    CREATE UNIQUE INDEX IF NOT EXISTS locales_comerciales_id_listado_key ON locales_comerciales (id_listado);
+    -- Un listado por propiedad: lo que leen los resúmenes y los tableros de análisis
+    CREATE OR REPLACE VIEW locales_unicos AS
+        SELECT * FROM locales_comerciales WHERE id_canonico IS NULL OR id_canonico = id_listado;
+"""
+
+CAMPOS_TEXTO = ['Nombre', 'Barrio', 'Localidad', 'Ciudad', 'Tipo', 'Imagen', 'Latitud', 'Longitud', 'Portal']
+
+
+def asegurar_esquema(conn):
+    """
+    Crea la tabla si no existe, agrega las columnas e índice que necesita el upsert y crea las
+    tablas de resumen (ver agregados.py). Se confirma en su propia transacción, antes de la
+    carga: los ALTER TABLE toman un bloqueo exclusivo que no debe durar toda la carga.
+    """
+    with conn.cursor() as cursor:
+        cursor.execute(ESQUEMA)
+        cursor.execute(ESQUEMA_AGREGADOS)
+    conn.commit()
+
+
+def filas_desde_propiedades(propiedades, fuente='ciencuadras'):
+    """
+    Convierte una lista de propiedades del scraper (filas del CSV) en un DataFrame con las
+    columnas de locales_comerciales. Precio, tamaño y baños se limpian por columna con
+    normalizacion.py. Si las filas traen 'Portal' (salida de planificador.py), ese es su
+    'fuente'; si no, se usa 'fuente'. Devuelve (filas, rechazos por campo).
+    """
+    datos = pd.DataFrame.from_records(propiedades)
+    datos = datos.reindex(columns=datos.columns.union(CAMPOS_TEXTO, sort=False))
+    datos, rechazos = normalizar_propiedades(datos)
+
+    latitud, longitud = datos['Latitud'], datos['Longitud']
+    validas = (
+        latitud.notna() & longitud.notna()
+        & ~latitud.isin(['N/A', '']) & ~longitud.isin(['N/A', ''])
+    )
+    filas = pd.DataFrame({
+        'id_listado': [id_listado(prop) for prop in propiedades],
+        'descripcion': datos['Nombre'],
+        'barrio': datos['Barrio'],
+        'localidad': datos['Localidad'],
+        'ciudad': datos['Ciudad'],
+        'tipo': datos['Tipo'],
+        'fuente': datos['Portal'].fillna(fuente),
+        'valorarriendo': datos['valorarriendo'],
+        'areacuadrada': datos['areacuadrada'],
+        'banios': datos['banios'],
+        'fotolocal': datos['Imagen'],
+        'coordenadas': (latitud.astype(str) + ',' + longitud.astype(str)).where(validas),
+    }, columns=COLUMNAS)
+    return filas, rechazos
+
+
+def _copiar_lote(cursor, propiedades, fuente):
+    filas, rechazos = filas_desde_propiedades(propiedades, fuente)
+    buffer = io.StringIO()
+    filas.to_csv(buffer, header=False, index=False)  # los nulos quedan como campo vacío (NULL en COPY)
+    buffer.seek(0)
+    cursor.copy_expert(
+        f"COPY staging_locales ({', '.join(COLUMNAS)}) FROM STDIN WITH (FORMAT csv)",
+        buffer
+    )
+    return rechazos
+
+
+def cargar_propiedades(conn, propiedades, fuente='ciencuadras', tamano_lote=50000):
+    """
+    Carga un iterable de propiedades en locales_comerciales: las envía por COPY FROM STDIN
+    a una tabla temporal en lotes de 'tamano_lote' filas y luego hace un upsert por
+    'id_listado', de modo que un re-scraping actualiza precios en lugar de duplicar filas.
+    En la misma transacción se recalculan las tablas de resumen de los barrios afectados.
+    Devuelve (insertados, actualizados). 'conn' puede ser cualquier conexión psycopg2.
+    """
+    asegurar_esquema(conn)
+    with conn.cursor() as cursor:
+        # Solo las columnas que se cargan, con sus tipos y sin restricciones ni valores por defecto
+        cursor.execute(
+            f"CREATE TEMP TABLE IF NOT EXISTS staging_locales ON COMMIT DROP AS "
+            f"SELECT {', '.join(COLUMNAS)} FROM locales_comerciales WITH NO DATA"
+        )
+
+        lote, rechazos = [], Counter()
+        for prop in propiedades:
+            lote.append(prop)
+            if len(lote) >= tamano_lote:
+                rechazos.update(_copiar_lote(cursor, lote, fuente))
+                lote = []
+        if lote:
+            rechazos.update(_copiar_lote(cursor, lote, fuente))
+
+        columnas = ', '.join(COLUMNAS)
+        actualizaciones = ', '.join(f"{col} = EXCLUDED.{col}" for col in COLUMNAS_ACTUALIZABLES)
+        cambiaron = ' OR '.join(
+            f"locales_comerciales.{col} IS DISTINCT FROM EXCLUDED.{col}" for col in COLUMNAS_ACTUALIZABLES
+        )
+        cursor.execute(f"""
+            INSERT INTO locales_comerciales ({columnas})
+            SELECT DISTINCT ON (id_listado) {columnas} FROM staging_locales
+            ORDER BY id_listado, ctid DESC  -- si un listado se repite en la carga gana la última fila
+            ON CONFLICT (id_listado) DO UPDATE SET {actualizaciones}, actualizado_en = now()
+            WHERE {cambiaron}
+            RETURNING (xmax = 0) AS insertado, ciudad, barrio
+        """)
+        resultado = cursor.fetchall()
+
+    refrescar_agregados(conn, barrios={(ciudad, barrio) for _, ciudad, barrio in resultado}, commit=False)
+    conn.commit()
+
+    if sum(rechazos.values()):
+        print(f"Valores descartados por no ser numéricos válidos: {dict(rechazos)}")
+    insertados = sum(1 for insertado, _, _ in resultado if insertado)
+    return insertados, len(resultado) - insertados
+
+
+def leer_csv(rutas):
+    """
+    Recorre las filas de uno o varios CSV generados por los scrapers sin cargarlos completos en memoria.
+    """
+    for ruta in rutas:
+        with open(ruta, newline='', encoding='utf-8') as f:
+            yield from csv.DictReader(f)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Carga los CSV de los scrapers en locales_comerciales")
+    parser.add_argument('csv', nargs='+', help="Archivos CSV generados por ciencuadras.py")
+    parser.add_argument('--fuente', default='ciencuadras', help="Portal de origen de los datos")
+    parser.add_argument('--sin-duplicados', action='store_true',
+                        help="No marcar los listados duplicados después de la carga (ver duplicados.py)")
+    parser.add_argument('--sin-instantanea', action='store_true',
+                        help="No exportar la instantánea Arrow/Parquet que leen los tableros (ver instantaneas.py)")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    conexion = conectar()
+    try:
+        insertados, actualizados = cargar_propiedades(conexion, leer_csv(args.csv), fuente=args.fuente)
+        if not args.sin_duplicados:
+            from duplicados import marcar_duplicados
+
+            listados, duplicados, _ = marcar_duplicados(conexion)
+            print(f"{duplicados} de {listados} listados marcados como duplicados")
+        if not args.sin_instantanea:
+            from instantaneas import exportar_instantanea  # pyarrow solo se importa al exportar
+
+            print(f"Instantánea {exportar_instantanea(conexion)} exportada")
+    finally:
+        conexion.close()
+    print(f"Carga terminada en {time.perf_counter() - inicio:.1f}s: {insertados} nuevos, {actualizados} actualizados")
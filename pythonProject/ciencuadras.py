@@ -1,31 +1,112 @@
+import argparse
+import json
+import os
+import queue
+import threading
 import time
-import csv
-import requests
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
-from bs4 import BeautifulSoup
+from esperas import cargar_con_reintentos, guardar_pagina_fallida, medir_carga
+from extractor import extraer_tarjetas
+from geocache import GeocodeCache
+from driver_pool import scrape_pages_concurrently
+from http_fetcher import scrape_pages_http
+from geocodificacion import geocodificar_propiedades, proveedores_por_defecto, resolver_tripletas
+from huellas import RegistroListados
+from metricas import metricas_scraper
+from salida import Checkpoint, EscritorPropiedades
 
-def setup_driver(headless=True):
+# Recursos que no se usan para extraer las tarjetas (de las imágenes solo se lee el atributo 'src')
+URLS_BLOQUEADAS = [
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.avif', '*.svg', '*.ico',
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+    '*.mp4', '*.webm', '*.mp3', '*.m3u8',
+    '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*', '*googlesyndication.com*',
+    '*facebook.net*', '*facebook.com/tr*', '*hotjar.com*', '*clarity.ms*', '*tiktok.com*', '*adservice.google.*'
+]
+
+# Perfiles de navegador para setup_driver. 'completo' es el comportamiento original.
+PERFILES = {
+    'completo': {
+        'bloquear': False,
+        'page_load_strategy': 'normal',
+        'ventana': '1920,1080',
+        'sin_extensiones': False
+    },
+    'ligero': {
+        'bloquear': True,
+        'page_load_strategy': 'eager',  # No esperar imágenes ni subrecursos para devolver el control
+        'ventana': '1280,800',
+        'sin_extensiones': True
+    }
+}
+
+# Ruta del chromedriver descargado por webdriver-manager, guardada para no consultar la red en cada arranque
+CACHE_CHROMEDRIVER = os.path.join(
+    os.environ.get('XDG_CACHE_HOME', os.path.expanduser('~/.cache')), 'arrendamiento_comercial', 'chromedriver.json'
+)
+
+
+def ruta_chromedriver(renovar=False):
     """
-    Configura y devuelve una instancia de WebDriver para Chrome utilizando webdriver-manager.
+    Ruta del ejecutable de chromedriver: la variable de entorno CHROMEDRIVER_PATH si está
+    definida, o la guardada en CACHE_CHROMEDRIVER mientras el archivo exista. webdriver-manager
+    (que consulta la red) solo se usa la primera vez o con 'renovar'.
     """
+    if os.environ.get('CHROMEDRIVER_PATH'):
+        return os.environ['CHROMEDRIVER_PATH']
+    if not renovar:
+        try:
+            with open(CACHE_CHROMEDRIVER, encoding='utf-8') as f:
+                ruta = json.load(f)['ruta']
+            if os.path.isfile(ruta) and os.access(ruta, os.X_OK):
+                return ruta
+        except (OSError, ValueError, KeyError):
+            pass
+
+    from webdriver_manager.chrome import ChromeDriverManager
+
+    ruta = ChromeDriverManager().install()
+    os.makedirs(os.path.dirname(CACHE_CHROMEDRIVER), exist_ok=True)
+    with open(CACHE_CHROMEDRIVER, 'w', encoding='utf-8') as f:
+        json.dump({'ruta': ruta, 'guardado': time.strftime('%Y-%m-%dT%H:%M:%S')}, f)
+    return ruta
+
+
+def setup_driver(headless=True, perfil='completo'):
+    """
+    Configura y devuelve una instancia de WebDriver para Chrome con el chromedriver de ruta_chromedriver().
+    'perfil' (ver PERFILES) define si se bloquean imágenes, fuentes, multimedia y analítica por CDP,
+    la estrategia de carga de página, el tamaño de la ventana y si se deshabilitan las extensiones.
+    """
+    # Selenium se importa aquí: las corridas con fetcher='http' no lo necesitan
+    from selenium import webdriver
+    from selenium.common.exceptions import SessionNotCreatedException
+    from selenium.webdriver.chrome.service import Service
+
+    config = PERFILES[perfil]
     options = webdriver.ChromeOptions()
     if headless:
         options.add_argument("--headless")  # Ejecutar en modo headless (sin interfaz gráfica)
     options.add_argument("--disable-gpu")  # Deshabilitar la aceleración por GPU
     options.add_argument("--no-sandbox")  # Bypass OS security model
     options.add_argument("--disable-dev-shm-usage")  # Soluciona problemas en algunos entornos
-    options.add_argument("--window-size=1920,1080")  # Definir el tamaño de la ventana
+    options.add_argument(f"--window-size={config['ventana']}")  # Definir el tamaño de la ventana
     options.add_experimental_option("excludeSwitches", ["enable-automation"])  # Evita mensajes de automatización
     options.add_experimental_option('useAutomationExtension', False)  # Evita extensiones de automatización
+    options.page_load_strategy = config['page_load_strategy']
+    # Guarda los eventos de red de CDP en el registro 'performance' para medir_carga
+    options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+    if config['sin_extensiones']:
+        options.add_argument("--disable-extensions")
+        options.add_argument("--disable-component-extensions-with-background-pages")
+    if config['bloquear']:
+        options.add_argument("--blink-settings=imagesEnabled=false")
 
-    # Inicializar el WebDriver con webdriver-manager
-    service = Service(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service, options=options)
+    # Inicializar el WebDriver con el chromedriver guardado; si Chrome se actualizó y ya no es
+    # compatible, se descarga uno nuevo con webdriver-manager
+    try:
+        driver = webdriver.Chrome(service=Service(ruta_chromedriver()), options=options)
+    except SessionNotCreatedException:
+        driver = webdriver.Chrome(service=Service(ruta_chromedriver(renovar=True)), options=options)
 
     # Evitar la detección de Selenium
     driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
@@ -35,193 +116,322 @@ def setup_driver(headless=True):
             })
         """
     })
-    
+
+    if config['bloquear']:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": URLS_BLOQUEADAS})
+
     return driver
 
-def get_coordinates_nominatim(ciudad, localidad, barrio):
+def get_coordinates_nominatim(ciudad, localidad, barrio, cache=None):
     """
-    Obtiene las coordenadas geográficas (latitud y longitud) usando Nominatim de OpenStreetMap.
+    Obtiene las coordenadas geográficas (latitud y longitud) de un barrio: primero con los centroides
+    locales de Bogotá y, si no está, con Nominatim de OpenStreetMap (ver proveedores_por_defecto).
+    Si se pasa un 'cache', se consulta antes de ir a la red y se guarda el resultado;
+    las consultas reales respetan el límite de 1 solicitud por segundo.
     """
-    direccion = f"{barrio}, {localidad}, {ciudad}, Colombia"
-    geocode_url = "https://nominatim.openstreetmap.org/search"
-    params = {
-        'q': direccion,
-        'format': 'json',
-        'limit': 1
-    }
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (compatible; TuNombre/1.0; tuemail@example.com)'  # Reemplaza con tu información
+    [(_, coordenadas, _)] = resolver_tripletas([(barrio, localidad, ciudad)], proveedores_por_defecto(cache))
+    return coordenadas
+
+FIELDNAMES = ['Nombre', 'Precio', 'Tamaño', 'Imagen', 'Ciudad', 'Localidad', 'Barrio', 'Baños', 'Tipo', 'Categoria',
+              'Latitud', 'Longitud']
+
+# Categorías de propiedad que recorre el scraper. Cada una define la URL de resultados
+# y las reglas (palabra en el nombre -> tipo) para clasificar las propiedades.
+CATEGORIAS = {
+    'local': {
+        'url': "https://www.ciencuadras.com/arriendo/bogota/local?q=bogota&page={page}",
+        'reglas_tipo': [('oficina', 'Oficina'), ('local', 'Local')],
+        'tipo_por_defecto': 'Otro'
+    },
+    'oficina': {
+        'url': "https://www.ciencuadras.com/arriendo/bogota/oficina?q=bogota&page={page}",
+        'reglas_tipo': [('consultorio', 'Consultorio'), ('local', 'Local')],
+        'tipo_por_defecto': 'Oficina'
+    },
+    'consultorio': {
+        'url': "https://www.ciencuadras.com/arriendo/bogota/consultorio?q=bogota&page={page}",
+        'reglas_tipo': [('oficina', 'Oficina'), ('local', 'Local')],
+        'tipo_por_defecto': 'Consultorio'
+    },
+    'bodega': {
+        'url': "https://www.ciencuadras.com/arriendo/bogota/bodega?q=bogota&page={page}",
+        'reglas_tipo': [('local', 'Local'), ('oficina', 'Oficina')],
+        'tipo_por_defecto': 'Bodega'
     }
-    try:
-        response = requests.get(geocode_url, params=params, headers=headers)
-        response.raise_for_status()
-        data = response.json()
-        if len(data) > 0:
-            latitud = data[0]['lat']
-            longitud = data[0]['lon']
-            return latitud, longitud
-        else:
-            print(f"No se encontraron coordenadas para la dirección: {direccion}")
-            return 'N/A', 'N/A'
-    except Exception as e:
-        print(f"Error al obtener coordenadas para {direccion}: {e}")
-        return 'N/A', 'N/A'
+}
+
+def parse_location(ubicacion):
+    """
+    Separa el texto de ubicación de una tarjeta en (ciudad, localidad, barrio).
+    """
+    partes = [parte.strip() for parte in ubicacion.split(',')]
+    if len(partes) >= 4:
+        # Asumiendo que la última parte es "Colombia" y la penúltima es la ciudad
+        return partes[-2], partes[-3], ', '.join(partes[:-3])
+    elif len(partes) == 3:
+        return partes[-1], partes[-2], partes[0]
+    elif len(partes) == 2:
+        return partes[-1], partes[-2], 'N/A'
+    return 'N/A', 'N/A', 'N/A'
 
-def scrape_properties(headless=True, num_pages=5):
+def tipo_de_propiedad(nombre, categoria='local'):
     """
-    Realiza el scraping de las propiedades en las primeras 'num_pages' páginas y guarda los datos en un CSV.
+    Clasifica la propiedad a partir de su nombre según las reglas de su categoría.
     """
-    driver = setup_driver(headless=headless)
-    base_url = "https://www.ciencuadras.com/arriendo/bogota/local?q=bogota&page={}"
+    config = CATEGORIAS[categoria]
+    nombre = nombre.lower()
+    for palabra, tipo in config['reglas_tipo']:
+        if palabra in nombre:
+            return tipo
+    return config['tipo_por_defecto']
+
+def parse_page(page_source, categoria='local'):
+    """
+    Extrae las propiedades de las tarjetas 'ciencuadras-card' del HTML de una página de resultados.
+    """
+    with metricas_scraper.medir('extraccion', categoria=categoria):
+        tarjetas = list(extraer_tarjetas(page_source))
+    metricas_scraper.contar('tarjetas', len(tarjetas), categoria=categoria)
 
     properties = []
-    failed_addresses = []
+    for tarjeta in tarjetas:
+        if tarjeta.ubicacion != 'N/A':
+            ciudad, localidad, barrio = parse_location(tarjeta.ubicacion)
+        else:
+            ciudad = localidad = barrio = 'N/A'
 
-    for page in range(1, num_pages + 1):
-        url = base_url.format(page)
-        print(f"Scraping página {page}: {url}")
-        driver.get(url)
+        # Colectar información en un diccionario
+        properties.append({
+            'Nombre': tarjeta.nombre,
+            'Precio': tarjeta.precio,
+            'Tamaño': tarjeta.tamano,
+            'Imagen': tarjeta.imagen,
+            'Ciudad': ciudad,
+            'Localidad': localidad,
+            'Barrio': barrio,
+            'Baños': tarjeta.banios,
+            'Tipo': tipo_de_propiedad(tarjeta.nombre, categoria),
+            'Categoria': categoria,
+            'Latitud': 'N/A',  # Se completa en la etapa de geocodificación
+            'Longitud': 'N/A'
+        })
 
-        try:
-            # Esperar a que se carguen los elementos
-            WebDriverWait(driver, 30).until(
-                EC.presence_of_all_elements_located((By.CSS_SELECTOR, "ciencuadras-card"))
-            )
-        except Exception as e:
-            print(f"Error al esperar elementos en la página {page}: {e}")
-            print("Contenido de la página:")
-            print(driver.page_source)  # Imprime el HTML para verificar
-            continue  # Pasar a la siguiente página
-        
-        time.sleep(2)  # Esperar un poco más para asegurar que se cargue todo
-        soup = BeautifulSoup(driver.page_source, 'html.parser')
-
-        # Extraer tarjetas de propiedades
-        cards = soup.find_all('ciencuadras-card')
-        
-        if not cards:
-            print(f"No se encontraron propiedades en la página {page}. Verifica los selectores o la estructura de la página.")
-            print("Contenido de la página:")
-            print(driver.page_source)  # Imprimir el HTML completo para verificar
-            continue  # Pasar a la siguiente página
-
-        for card in cards:
-            # Nombre y ubicación
-            location_label = card.find('span', class_='card__location-label')
-            if location_label:
-                ubicacion = location_label.text.strip()
-                partes = [parte.strip() for parte in ubicacion.split(',')]
-                if len(partes) >= 4:
-                    # Asumiendo que la última parte es "Colombia" y la penúltima es la ciudad
-                    ciudad = partes[-2]
-                    localidad = partes[-3]
-                    barrio = ', '.join(partes[:-3])
-                elif len(partes) == 3:
-                    ciudad = partes[-1]
-                    localidad = partes[-2]
-                    barrio = partes[0]
-                elif len(partes) == 2:
-                    ciudad = partes[-1]
-                    localidad = partes[-2]
-                    barrio = 'N/A'
-                else:
-                    ciudad = localidad = barrio = 'N/A'
-            else:
-                ciudad = localidad = barrio = 'N/A'
-
-            # Nombre (asume que 'p' tag con class 'card__location' tiene más info)
-            nombre_tag = card.find('p', class_='card__location')
-            nombre = nombre_tag.text.strip() if nombre_tag else 'N/A'
-
-            # Precio
-            precio_tag = card.find('span', class_='card__price-big')
-            precio = precio_tag.text.strip() if precio_tag else 'N/A'
-
-            # Imagen
-            img_tag = card.find('img')
-            imagen = img_tag['src'] if img_tag and 'src' in img_tag.attrs else 'N/A'
-
-            # Tipo de Propiedad
-            if 'oficina' in nombre.lower():
-                tipo_propiedad = 'Oficina'
-            elif 'local' in nombre.lower():
-                tipo_propiedad = 'Local'
-            else:
-                tipo_propiedad = 'Otro'
-                
-                # Extraer el tamaño en m2
-            specs_results = card.find('ciencuadras-specs-results')
-            if specs_results:
-                specs_div = specs_results.find('div', class_='specs')
-                if specs_div:
-                    tamano_tag = specs_div.find('p')  
-                    if tamano_tag:
-                        span_tamano = tamano_tag.find('span')
-                        tamano = span_tamano.text.strip() if span_tamano else 'N/A'
-                    else:
-                        tamano = 'N/A'
-                else:
-                    tamano = 'N/A'
-            else:
-                tamano = 'N/A'
-
-            # Baños
-            baños = 'N/A'
-            specs = card.find('ciencuadras-specs-results')
-            if specs:
-                span_tags = specs.find_all('span')
-                for span in span_tags:
-                    texto = span.text.strip()
-                    if texto.startswith('Baños'):
-                        # Extraer el número después de 'Baños'
-                        baños = texto.replace('Baños', '').strip()
-                        break
-
-            # Obtener coordenadas
-            if barrio != 'N/A' and localidad != 'N/A' and ciudad != 'N/A':
-                latitud, longitud = get_coordinates_nominatim(ciudad, localidad, barrio)
-                if latitud == 'N/A' or longitud == 'N/A':
-                    failed_addresses.append(f"{barrio}, {localidad}, {ciudad}, Colombia")
-                time.sleep(1)  # Esperar 1 segundo entre solicitudes para evitar sobrecargar la API
-            else:
-                latitud = longitud = 'N/A'
-
-            # Colectar información en un diccionario
-            properties.append({
-                'Nombre': nombre,                
-                'Precio': precio,
-                'Tamaño': tamano,
-                'Imagen': imagen,
-                'Ciudad': ciudad,
-                'Localidad': localidad,
-                'Barrio': barrio,
-                'Baños': baños,
-                'Tipo': tipo_propiedad,
-                'Latitud': latitud,
-                'Longitud': longitud
-            })
+    return properties
 
-    driver.quit()
+def scrape_page(driver, url, clave):
+    """
+    Carga una página de resultados en 'driver' y devuelve sus propiedades (lista vacía si falla).
+    'clave' es la tupla (categoria, page) de la página. En lugar de una espera fija se espera
+    a que el número de tarjetas se estabilice, con un timeout que se adapta al sitio (ver esperas.py).
+    Si la página falla, su HTML se guarda comprimido en 'paginas_fallidas/'.
+    """
+    from selenium.common.exceptions import TimeoutException
 
+    categoria, page = clave
+    try:
+        with metricas_scraper.medir('carga_pagina', fetcher='selenium', categoria=categoria):
+            tarjetas = cargar_con_reintentos(driver, url, "ciencuadras-card")
+    except TimeoutException as e:
+        metricas_scraper.contar('paginas', fetcher='selenium', resultado='fallida')
+        ruta = guardar_pagina_fallida(driver.page_source, clave)
+        print(f"Error al esperar elementos en la página {page} de '{categoria}': {e}. HTML guardado en '{ruta}'")
+        return []
+
+    carga = medir_carga(driver)
+    metricas_scraper.contar('bytes_transferidos', carga['bytes'], fetcher='selenium')
+    metricas_scraper.evento('pagina', categoria=categoria, page=page, tarjetas=tarjetas, **carga)
+    print(f"Página {page} de '{categoria}': {tarjetas} tarjetas, {carga['bytes'] / 1024:.0f} KB transferidos "
+          f"en {carga['recursos']} recursos, carga en {carga['segundos']:.2f}s")
+    properties = parse_page(driver.page_source, categoria)
+
+    metricas_scraper.contar('paginas', fetcher='selenium', resultado='ok' if properties else 'vacia')
     if not properties:
-        print("No se encontraron propiedades en las páginas especificadas.")
-        return
+        ruta = guardar_pagina_fallida(driver.page_source, clave)
+        print(f"No se encontraron propiedades en la página {page} de '{categoria}'. "
+              f"Verifica los selectores o la estructura de la página en '{ruta}'.")
+    return properties
+
+def scrape_properties(headless=True, num_pages=5, workers=1, categorias=('local',), base_url=None,
+                      fetcher='selenium', csv_file='propiedades_arriendo.csv', parquet_dir=None,
+                      resume=False, checkpoint_file=None, incremental=False, registro_file='listados.sqlite',
+                      cortar_sin_cambios=True, perfil='completo', log_json=None, metricas_prom=None):
+    """
+    Realiza el scraping de las propiedades en las primeras 'num_pages' páginas de cada una de las
+    'categorias' (ver CATEGORIAS) y guarda los datos en un solo CSV. Todas las categorías se recorren
+    en una sola pasada, compartiendo las sesiones de Chrome, la geocodificación y el archivo de salida.
+    Con 'workers' > 1 las páginas se reparten entre varias sesiones de Chrome en paralelo.
+    'base_url' (con los campos {categoria} y {page}) reemplaza las URLs de CATEGORIAS, por ejemplo
+    para apuntar a un servidor HTTP local con páginas guardadas para pruebas.
+    Con fetcher='http' las páginas se descargan sin navegador y solo las que no traen
+    los listados en el HTML o en su estado JSON se vuelven a pedir con Selenium.
+
+    Cada página se geocodifica y se escribe a disco (CSV y, con 'parquet_dir', Parquet) apenas
+    termina, en el orden de las páginas. El checkpoint registra las páginas completadas y las
+    direcciones geocodificadas; con resume=True se omiten las páginas ya escritas.
+
+    Con incremental=True cada tarjeta se compara con el registro de listados de corridas
+    anteriores ('registro_file', ver huellas.py): solo las nuevas o cambiadas se geocodifican y
+    se escriben, y se registran eventos de cambio. Con 'cortar_sin_cambios', una categoría deja
+    de paginar en cuanto una página trae solo listados ya vistos. Los listados eliminados solo se
+    detectan cuando la categoría se recorre completa (sin corte, sin páginas fallidas y sin resume).
+    'perfil' es el perfil de navegador de setup_driver (ver PERFILES).
+
+    Los tiempos y contadores de cada etapa se registran en metricas.metricas_scraper y se
+    resumen al final. 'log_json' escribe cada medición como evento JSON Lines y 'metricas_prom'
+    guarda al terminar un archivo de texto en formato Prometheus.
+
+    Devuelve la lista de páginas fallidas (claves (categoria, page) sin propiedades, que no
+    quedan en el checkpoint y se reintentan con resume=True).
+    """
+    metricas_scraper.reiniciar()
+    metricas_scraper.configurar(log_json)
+    inicio_corrida = time.perf_counter()
+
+    paginas = []
+    for categoria in categorias:
+        plantilla = base_url or CATEGORIAS[categoria]['url']
+        for page in range(1, num_pages + 1):
+            paginas.append(((categoria, page), plantilla.format(categoria=categoria, page=page)))
 
-    # Guardar en CSV
-    csv_file = 'propiedades_arriendo.csv'
-    fieldnames = ['Nombre', 'Precio', 'Tamaño', 'Imagen', 'Ciudad', 'Localidad', 'Barrio', 'Baños', 'Tipo', 'Latitud', 'Longitud']
+    checkpoint = Checkpoint(checkpoint_file or csv_file + '.checkpoint.json', reanudar=resume)
+    if resume:
+        print(f"Reanudando: {len(checkpoint.paginas_completadas)} páginas ya completadas")
+        paginas = [(clave, url) for clave, url in paginas if not checkpoint.completada(clave)]
 
+    escritor = EscritorPropiedades(csv_file, FIELDNAMES, parquet_dir=parquet_dir, reanudar=resume)
+    geocache = GeocodeCache()
+    registro = RegistroListados(registro_file) if incremental else None
+    terminadas = queue.Queue()
+    detenidas = {}  # Categoría -> página sin cambios en la que dejó de paginar
+    lock_detenidas = threading.Lock()
+    incompletas = set()  # Categorías con páginas sin procesar; no se pueden detectar eliminados
+    fallidas = []  # Páginas sin propiedades (error, timeout o página vacía)
+    corte = registro is not None and cortar_sin_cambios
+
+    def detener(clave):
+        with lock_detenidas:
+            detenidas[clave[0]] = min(detenidas.get(clave[0], clave[1]), clave[1])
+
+    def despues_del_corte(clave):
+        return clave[1] > detenidas.get(clave[0], clave[1])
+
+    def al_completar_http(clave, propiedades):
+        # El corte se decide al descargar la página, antes de pedir la siguiente de su categoría
+        if propiedades and corte and not registro.clasificar(propiedades)[0]:
+            detener(clave)
+        terminadas.put((clave, propiedades))
+
+    def crear_driver():
+        with metricas_scraper.medir('inicio_driver', perfil=perfil):
+            return setup_driver(headless=headless, perfil=perfil)
+
+    def descargar():
+        try:
+            pendientes = paginas
+            if fetcher == 'http':
+                # Con corte, las páginas de cada categoría se piden en orden y una a la vez
+                resueltas = scrape_pages_http(
+                    paginas, parse_page, tipo_de_propiedad, workers=max(workers, 4),
+                    al_completar=al_completar_http, omitir=despues_del_corte, por_categoria=corte
+                )
+                print(f"Páginas resueltas por HTTP: {len(resueltas)} de {len(paginas)}")
+                pendientes = [(clave, url) for clave, url in paginas
+                              if clave not in resueltas and not despues_del_corte(clave)]
+            if pendientes:
+                scrape_pages_concurrently(
+                    pendientes,
+                    scrape_page,
+                    crear_driver,
+                    workers=workers,
+                    al_completar=lambda clave, propiedades: terminadas.put((clave, propiedades)),
+                    omitir=despues_del_corte
+                )
+        finally:
+            terminadas.put(None)
+
+    hilo = threading.Thread(target=descargar, daemon=True)
+    hilo.start()
+
+    def procesar(clave, propiedades):
+        if not propiedades or despues_del_corte(clave):
+            incompletas.add(clave[0])
+            if not despues_del_corte(clave):
+                fallidas.append(clave)
+            return  # Se reintentará en la próxima corrida con --resume
+
+        nuevas, eventos = propiedades, ()
+        if registro is not None:
+            nuevas, eventos = registro.clasificar(propiedades)
+            print(f"Página {clave}: {len(nuevas)} de {len(propiedades)} listados nuevos o cambiados")
+        if nuevas:
+            with metricas_scraper.medir('geocodificacion', categoria=clave[0]):
+                geocodificar_propiedades(nuevas, cache=geocache, resueltas=checkpoint.direcciones)
+        with metricas_scraper.medir('escritura', categoria=clave[0]):
+            escritor.escribir(nuevas, clave)
+        if registro is not None:
+            registro.registrar(propiedades, eventos)
+            if not nuevas and cortar_sin_cambios:
+                print(f"Sin cambios en la página {clave}: se deja de paginar '{clave[0]}'")
+                detener(clave)
+        checkpoint.marcar_completada(clave)
+
+    # Geocodificar y escribir cada página en orden a medida que los trabajadores la terminan
+    orden = [clave for clave, _ in paginas]
+    en_espera = {}
+    siguiente = 0
     try:
-        with open(csv_file, 'w', newline='', encoding='utf-8') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-            for prop in properties:
-                writer.writerow(prop)
-        print(f"Datos guardados en '{csv_file}'. Total propiedades: {len(properties)}")
-    except Exception as e:
-        print(f"Error al guardar el archivo CSV: {e}")
+        while True:
+            item = terminadas.get()
+            if item is None:
+                break
+            en_espera[item[0]] = item[1]
+            while siguiente < len(orden) and orden[siguiente] in en_espera:
+                procesar(orden[siguiente], en_espera.pop(orden[siguiente]))
+                siguiente += 1
+        hilo.join()
+        # Si una página nunca llegó, las siguientes se escriben igual y ella queda fallida
+        for clave in orden[siguiente:]:
+            procesar(clave, en_espera.pop(clave, None))
+
+        if registro is not None and not resume:
+            for categoria in categorias:
+                if categoria not in incompletas and categoria not in detenidas:
+                    print(f"Listados eliminados en '{categoria}': {registro.cerrar_categoria(categoria)}")
+    finally:
+        escritor.close()
+        if registro is not None:
+            print(f"Eventos de cambio en esta corrida: {registro.resumen_corrida()}")
+            registro.close()
+        stats = geocache.stats()
+        print(f"Caché de geocodificación: {stats['hits']} aciertos, {stats['misses']} consultas a Nominatim")
+        geocache.close()
+
+        metricas_scraper.registrar_tiempo('corrida', time.perf_counter() - inicio_corrida)
+        metricas_scraper.contar('propiedades_escritas', escritor.total)
+        metricas_scraper.imprimir_resumen()
+        if metricas_prom:
+            metricas_scraper.guardar_prometheus(metricas_prom)
+            print(f"Métricas en formato Prometheus guardadas en '{metricas_prom}'")
+        metricas_scraper.configurar(None)
+
+    if fallidas:
+        print(f"Páginas fallidas ({len(fallidas)}): {', '.join(f'{c}/{p}' for c, p in fallidas)}. "
+              f"Se reintentan con --resume")
+    if not escritor.total:
+        print("No se encontraron propiedades nuevas o cambiadas." if incremental
+              else "No se encontraron propiedades en las páginas especificadas.")
+        return fallidas
+
+    print(f"Datos guardados en '{csv_file}'. Propiedades en esta corrida: {escritor.total}")
+    if parquet_dir:
+        print(f"Archivos Parquet guardados en '{parquet_dir}'")
 
     # Guardar direcciones fallidas
+    failed_addresses = [
+        direccion for direccion, (latitud, longitud) in checkpoint.direcciones.items()
+        if latitud == 'N/A' or longitud == 'N/A'
+    ]
     if failed_addresses:
         with open('direcciones_fallidas.txt', 'w', encoding='utf-8') as f:
             for address in failed_addresses:
@@ -229,10 +439,38 @@ def scrape_properties(headless=True, num_pages=5):
         print(f"Direcciones fallidas guardadas en 'direcciones_fallidas.txt'")
 
     # Imprimir algunas propiedades
-    for prop in properties[:5]:  # Imprimir las primeras 5 para verificar
+    for prop in escritor.muestra:  # Imprimir las primeras 5 para verificar
         print(prop)
+    return fallidas
 
 if __name__ == "__main__":
-    # Ejecutar con headless=False para ver el navegador durante la depuración
-    scrape_properties(headless=False, num_pages=5)
+    parser = argparse.ArgumentParser(description="Scraping de propiedades en arriendo de ciencuadras")
+    parser.add_argument('--pages', type=int, default=5, help="Número de páginas a recorrer")
+    parser.add_argument('--workers', type=int, default=1, help="Sesiones de Chrome en paralelo")
+    parser.add_argument('--categorias', nargs='+', choices=sorted(CATEGORIAS), default=['local'],
+                        help="Categorías de propiedad a recorrer en la misma pasada")
+    parser.add_argument('--output', default='propiedades_arriendo.csv', help="Archivo CSV de salida")
+    parser.add_argument('--base-url', help="URL con {categoria} y {page} en lugar de las de ciencuadras (ver servidor_local.py)")
+    parser.add_argument('--parquet-dir', help="Directorio donde escribir también la salida en Parquet")
+    parser.add_argument('--resume', action='store_true', help="Continuar desde el checkpoint de la corrida anterior")
+    parser.add_argument('--fetcher', choices=['selenium', 'http'], default='selenium',
+                        help="'http' intenta primero sin navegador y usa Selenium como respaldo")
+    parser.add_argument('--headless', action='store_true', help="Ejecutar Chrome sin interfaz gráfica")
+    parser.add_argument('--perfil', choices=sorted(PERFILES), default='completo',
+                        help="'completo' carga todo; 'ligero' bloquea imágenes, fuentes y analítica")
+    parser.add_argument('--log-json', help="Archivo JSON Lines con un evento por etapa medida")
+    parser.add_argument('--metricas-prom', help="Archivo donde guardar las métricas en formato Prometheus al terminar")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Procesar solo listados nuevos o cambiados desde la corrida anterior")
+    parser.add_argument('--sin-corte', action='store_true',
+                        help="Con --incremental, recorrer todas las páginas aunque no haya cambios (detecta eliminados)")
+    args = parser.parse_args()
 
+    # Sin --headless se ve el navegador durante la depuración
+    fallidas = scrape_properties(headless=args.headless, num_pages=args.pages, workers=args.workers,
+                      categorias=args.categorias, base_url=args.base_url, fetcher=args.fetcher, csv_file=args.output,
+                      parquet_dir=args.parquet_dir, resume=args.resume, incremental=args.incremental,
+                      cortar_sin_cambios=not args.sin_corte, perfil=args.perfil, log_json=args.log_json,
+                      metricas_prom=args.metricas_prom)
+    if fallidas:
+        raise SystemExit(1)
@@ -0,0 +1,129 @@
+import argparse
+import os
+import re
+import runpy
+import subprocess
+import sys
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+
+# Subcomando -> (módulo que se ejecuta como script, descripción). Cada subcomando importa
+# solo su módulo, y los argumentos siguientes los interpreta el propio módulo.
+COMANDOS = {
+    'scraper': ('ciencuadras', "Recorre ciencuadras y guarda las propiedades en CSV"),
+    'oficinas': ('ciencuadrasoficinas', "Igual que 'scraper', solo para oficinas"),
+    'planificador': ('planificador', "Recorre varios portales, ciudades y categorías a la vez"),
+    'locales': ('scraping_locales', "Scraper de locales de metrocuadrado directo a la base de datos"),
+    'cargar': ('cargador_bd', "Carga CSV de los scrapers en locales_comerciales"),
+    'agregados': ('agregados', "Recalcula las tablas de resumen"),
+    'duplicados': ('duplicados', "Marca los listados repetidos entre portales y categorías"),
+    'indices': ('busqueda', "Crea los índices de la búsqueda"),
+    'espacial': ('espacial', "Índice espacial, polígonos de localidades y consultas de prueba"),
+    'instantanea': ('instantaneas', "Exporta una instantánea Arrow/Parquet de la tabla"),
+    'servidor': ('servidor_local', "Servidor HTTP local con las páginas guardadas"),
+    'benchmark': ('benchmark_scraper', "Benchmark de punta a punta del scraper"),
+    'benchmark-extractor': ('benchmark_extractor', "Benchmark de los extractores de tarjetas"),
+}
+
+# Tableros de Streamlit y los módulos que importan (para el perfil de importación)
+TABLEROS = {
+    'busqueda': ('appBusqueda.py', ['streamlit', 'busqueda', 'gazetteer', 'tarjetas']),
+    'analisis': ('appAnalisis.py', ['streamlit', 'plotly.express', 'acceso_datos', 'almacen', 'instantaneas']),
+}
+
+LINEA_IMPORTTIME = re.compile(r'^import time:\s+(\d+) \|\s+\d+ \|\s+(\S+)')
+
+
+def ejecutar_modulo(modulo, argumentos):
+    """
+    Ejecuta 'modulo' como si se hubiera llamado 'python modulo.py argumentos'.
+    """
+    sys.argv = [modulo + '.py'] + list(argumentos)
+    runpy.run_module(modulo, run_name='__main__', alter_sys=True)
+
+
+def abrir_tablero(nombre, argumentos):
+    """
+    Equivale a 'streamlit run appX.py argumentos'.
+    """
+    from streamlit.web import cli as streamlit_cli
+
+    sys.argv = ['streamlit', 'run', os.path.join(DIRECTORIO, TABLEROS[nombre][0])] + list(argumentos)
+    sys.exit(streamlit_cli.main())
+
+
+def perfil_importacion(modulos):
+    """
+    Importa 'modulos' en un intérprete nuevo con 'python -X importtime' y devuelve
+    (milisegundos totales, [(milisegundos, paquete)]), con el tiempo propio de cada módulo
+    sumado por paquete raíz (pandas, selenium...) de mayor a menor.
+    """
+    resultado = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f"import {', '.join(modulos)}"],
+        cwd=DIRECTORIO, capture_output=True, text=True
+    )
+    if resultado.returncode != 0:
+        raise RuntimeError(resultado.stderr.strip().splitlines()[-1])
+    por_paquete = {}
+    for linea in resultado.stderr.splitlines():
+        coincidencia = LINEA_IMPORTTIME.match(linea)
+        if coincidencia is not None:
+            propio, modulo = coincidencia.groups()
+            raiz = modulo.split('.')[0]
+            por_paquete[raiz] = por_paquete.get(raiz, 0) + int(propio)
+    pesados = sorted(((microsegundos / 1000, paquete) for paquete, microsegundos in por_paquete.items()), reverse=True)
+    return sum(por_paquete.values()) / 1000, pesados
+
+
+def imprimir_perfil(objetivos, top=5):
+    """
+    Imprime el tiempo de importación de cada subcomando o tablero de 'objetivos' (todos
+    si está vacío) con sus 'top' importaciones más pesadas.
+    """
+    objetivos = objetivos or list(COMANDOS) + [f'tablero-{nombre}' for nombre in TABLEROS]
+    for objetivo in objetivos:
+        if objetivo.startswith('tablero-'):
+            modulos = TABLEROS[objetivo[len('tablero-'):]][1]
+        elif objetivo in COMANDOS:
+            modulos = [COMANDOS[objetivo][0]]
+        else:
+            modulos = [objetivo]
+        try:
+            total, pesadas = perfil_importacion(modulos)
+        except RuntimeError as e:
+            print(f"{objetivo:<22} error: {e}")
+            continue
+        detalle = ', '.join(f"{paquete} {ms:.0f}" for ms, paquete in pesadas[:top])
+        print(f"{objetivo:<22} {total:>7.0f} ms  ({detalle})")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in COMANDOS:
+        return ejecutar_modulo(COMANDOS[argv[0]][0], argv[1:])
+    if argv[:1] == ['tablero'] and len(argv) > 1 and argv[1] in TABLEROS:
+        return abrir_tablero(argv[1], argv[2:])
+
+    parser = argparse.ArgumentParser(
+        prog='arriendos',
+        description="Scrapers, carga y tableros de locales comerciales en arriendo",
+        epilog="Los argumentos después del comando se pasan al módulo (use 'arriendos COMANDO --help')."
+    )
+    subparsers = parser.add_subparsers(dest='comando', metavar='COMANDO')
+    for nombre, (_, descripcion) in COMANDOS.items():
+        subparsers.add_parser(nombre, help=descripcion, add_help=False)
+    tablero = subparsers.add_parser('tablero', help="Abre un tablero de Streamlit")
+    tablero.add_argument('nombre', choices=sorted(TABLEROS))
+    perfil = subparsers.add_parser('perfil-importacion', help="Tiempo de importación de cada comando y tablero")
+    perfil.add_argument('objetivos', nargs='*', help="Comandos, 'tablero-NOMBRE' o módulos (por defecto, todos)")
+    perfil.add_argument('--top', type=int, default=5, help="Importaciones más pesadas a mostrar")
+    args = parser.parse_args(argv)
+
+    if args.comando == 'perfil-importacion':
+        imprimir_perfil(args.objetivos, args.top)
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
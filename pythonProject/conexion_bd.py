@@ -0,0 +1,17 @@
+import os
+import psycopg2
+
+# Parámetros de conexión a PostgreSQL; se pueden sobrescribir con las variables de entorno estándar
+PARAMETROS_BD = {
+    'host': os.environ.get('PGHOST', 'localhost'),
+    'database': os.environ.get('PGDATABASE', 'arrendamiento_comercial'),
+    'user': os.environ.get('PGUSER', 'postgres'),
+    'password': os.environ.get('PGPASSWORD', '123456')
+}
+
+
+def conectar():
+    """
+    Abre una conexión nueva a la base de datos de arrendamiento comercial.
+    """
+    return psycopg2.connect(**PARAMETROS_BD)
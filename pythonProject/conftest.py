@@ -0,0 +1,30 @@
+import uuid
+import pytest
+
+
+@pytest.fixture
+def bd():
+    """
+    Conexión a PostgreSQL (ver conexion_bd.py) con un esquema propio y vacío para la prueba,
+    que se borra al terminar. La prueba se omite si no hay una base de datos disponible.
+    """
+    import psycopg2
+    from conexion_bd import conectar
+
+    try:
+        conn = conectar()
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"Sin PostgreSQL: {e}")
+    esquema = f"prueba_{uuid.uuid4().hex[:12]}"
+    with conn.cursor() as cursor:
+        cursor.execute(f"CREATE SCHEMA {esquema}")
+        cursor.execute(f"SET search_path TO {esquema}")
+    conn.commit()
+    try:
+        yield conn
+    finally:
+        conn.rollback()
+        with conn.cursor() as cursor:
+            cursor.execute(f"DROP SCHEMA {esquema} CASCADE")
+        conn.commit()
+        conn.close()
@@ -0,0 +1,96 @@
+import queue
+import threading
+
+
+def _cerrar_driver(driver):
+    if driver is None:
+        return
+    try:
+        driver.quit()
+    except Exception as e:
+        print(f"Error al cerrar el driver: {e}")
+
+
+def scrape_pages_concurrently(paginas, scrape_page, driver_factory, workers=1, max_reintentos=1, al_completar=None,
+                              omitir=None):
+    """
+    Reparte las páginas (clave, url) de 'paginas' entre un pool acotado de 'workers' sesiones de WebDriver.
+
+    Cada trabajador crea su propio driver con 'driver_factory', lo reutiliza para todas las
+    páginas que toma de la cola y lo cierra al terminar. Si la sesión se cae (WebDriverException)
+    el driver se descarta, se crea uno nuevo y la página se reintenta hasta 'max_reintentos' veces.
+    Cualquier otro error de 'scrape_page' o 'driver_factory' se registra y la página queda fallida
+    (lista vacía), sin detener al trabajador.
+    'scrape_page(driver, url, clave)' debe devolver la lista de propiedades de la página.
+    Si se pasa 'al_completar(clave, propiedades)', se llama desde el trabajador apenas termina cada página.
+    Si 'omitir(clave)' devuelve True cuando un trabajador toma una página, esta no se carga y se
+    reporta con propiedades None (por ejemplo, para dejar de paginar una categoría sin cambios).
+    Devuelve un diccionario {clave: propiedades}; ver 'merge_pages' para unirlos en orden.
+    """
+    # Selenium se importa aquí: quien importa este módulo sin usar el navegador no lo carga
+    from selenium.common.exceptions import WebDriverException
+
+    tareas = queue.Queue()
+    for clave, url in paginas:
+        tareas.put((clave, url))
+
+    resultados = {}
+    lock = threading.Lock()
+
+    def trabajador(numero):
+        driver = None
+        try:
+            while True:
+                try:
+                    clave, url = tareas.get_nowait()
+                except queue.Empty:
+                    return
+
+                if omitir is not None and omitir(clave):
+                    if al_completar is not None:
+                        al_completar(clave, None)
+                    continue
+
+                propiedades = []
+                for intento in range(max_reintentos + 1):
+                    try:
+                        if driver is None:
+                            driver = driver_factory()
+                        print(f"[worker {numero}] Scraping página {clave}: {url}")
+                        propiedades = scrape_page(driver, url, clave)
+                        break
+                    except WebDriverException as e:
+                        print(f"[worker {numero}] Sesión caída en la página {clave} (intento {intento + 1}): {e}")
+                        _cerrar_driver(driver)
+                        driver = None
+                    except Exception as e:
+                        print(f"[worker {numero}] Error en la página {clave}: {type(e).__name__}: {e}")
+                        break
+
+                with lock:
+                    resultados[clave] = propiedades
+                if al_completar is not None:
+                    al_completar(clave, propiedades)
+        finally:
+            _cerrar_driver(driver)
+
+    hilos = [
+        threading.Thread(target=trabajador, args=(numero,), daemon=True)
+        for numero in range(1, min(workers, len(paginas)) + 1)
+    ]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    return resultados
+
+
+def merge_pages(resultados):
+    """
+    Une los resultados {clave: propiedades} en una sola lista, en el orden de las claves.
+    """
+    propiedades = []
+    for clave in sorted(resultados):
+        propiedades.extend(resultados[clave])
+    return propiedades
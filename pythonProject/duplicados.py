@@ -0,0 +1,326 @@
+import argparse
+import csv
+import io
+import re
+import time
+import numpy as np
+import pandas as pd
+from agregados import refrescar_agregados
+from cargador_bd import asegurar_esquema, filas_desde_propiedades, leer_csv
+from conexion_bd import conectar
+from espacial import RADIO_TIERRA
+from gazetteer import obtener_gazetteer
+from geocache import normalizar_direccion
+
+PRECISION_GEOHASH = 6  # Celdas de unos 1,2 km x 0,6 km
+ANCHO_BANDA_PRECIO = 0.10  # Bandas de precio de 10 % en escala logarítmica
+VENTANA = 20  # Vecinos por área que se comparan dentro de cada bloque
+DISTANCIA_MAXIMA = 150  # Metros entre dos publicaciones del mismo local
+DISTANCIA_MISMO_PUNTO = 30  # Metros para que el área exacta baste sin imagen ni nombre en común
+REPETICIONES_CENTROIDE = 2  # Listados con el mismo punto a partir de los cuales es el centro de una zona
+
+# Un par es duplicado si comparte imagen, el área es casi igual y sus coordenadas (si son
+# precisas) no los separan más de DISTANCIA_MAXIMA metros. Sin imagen común hace falta que
+# ambos tengan coordenadas precisas a menos de DISTANCIA_MAXIMA metros, precio casi igual y
+# además el área exacta a menos de DISTANCIA_MISMO_PUNTO metros o un área casi igual con un
+# nombre distintivo parecido (similitud 1 = idénticos).
+UMBRALES = {'area_con_imagen': 0.9, 'area': 0.97, 'precio': 0.97, 'nombre': 0.8}
+
+SIGNOS = re.compile(r'[^a-z0-9ñ ]+')
+
+# Palabras de los títulos generados por los portales ("Local en arriendo en Chapinero"):
+# junto con el barrio y la ciudad del listado no distinguen un local de otro
+PALABRAS_PLANTILLA = {
+    'local', 'locales', 'oficina', 'oficinas', 'consultorio', 'consultorios', 'bodega', 'bodegas',
+    'comercial', 'arriendo', 'arrienda', 'se', 'venta', 'en', 'de', 'del', 'la', 'el', 'los', 'las', 'y'
+}
+
+
+def celdas_geohash(latitud, longitud, precision=PRECISION_GEOHASH):
+    """
+    Número de la celda geohash de 'precision' caracteres de cada punto (NaN sin coordenadas).
+    Son las mismas celdas que el geohash en texto: la longitud y la latitud divididas en
+    2^bits partes iguales, calculadas por columna con numpy.
+    """
+    bits = 5 * precision
+    bits_longitud, bits_latitud = (bits + 1) // 2, bits // 2
+    columna = np.floor((longitud + 180) / 360 * 2 ** bits_longitud)
+    fila = np.floor((latitud + 90) / 180 * 2 ** bits_latitud)
+    return fila * 2 ** bits_longitud + columna
+
+
+def _normalizar_texto(serie):
+    """
+    Texto en minúsculas, sin tildes ni signos, con los espacios compactados.
+    """
+    codigos, unicos = pd.factorize(serie.fillna('').astype(str))
+    normalizados = np.array([' '.join(SIGNOS.sub(' ', normalizar_direccion(texto)).split()) for texto in unicos], dtype=object)
+    return pd.Series(normalizados[codigos], index=serie.index)
+
+
+def _normalizar_imagen(serie):
+    """
+    URL de la imagen sin esquema ni parámetros, para comparar la misma foto servida de distintas formas.
+    """
+    imagen = serie.fillna('').astype(str).str.strip().str.lower()
+    imagen = imagen.str.replace(r'^https?://', '', regex=True).str.replace(r'[?#].*$', '', regex=True)
+    return imagen.where(~imagen.isin(['', 'n/a']))
+
+
+def _coordenadas(serie):
+    partes = serie.fillna('').astype(str).str.split(',', n=1, expand=True).reindex(columns=[0, 1])
+    return pd.to_numeric(partes[0], errors='coerce').to_numpy(), pd.to_numeric(partes[1], errors='coerce').to_numpy()
+
+
+def coordenadas_precisas(latitud, longitud, repeticiones=REPETICIONES_CENTROIDE):
+    """
+    True para las filas cuyas coordenadas ubican el local y no el centro de su zona. Se
+    descartan las que faltan, los centroides del gazetteer y los puntos que comparten
+    'repeticiones' o más listados (el mismo barrio geocodificado por Nominatim).
+    """
+    gazetteer = obtener_gazetteer()
+    centroides = {
+        (round(lat, 4), round(lon, 4))
+        for lat, lon in list(gazetteer.barrios.values()) + list(gazetteer.localidades.values())
+    }
+    en_gazetteer = pd.MultiIndex.from_arrays([np.round(latitud, 4), np.round(longitud, 4)]).isin(centroides)
+    puntos = pd.MultiIndex.from_arrays([np.round(latitud, 6), np.round(longitud, 6)])
+    veces = pd.Series(1, index=puntos).groupby(level=[0, 1], dropna=False).transform('size').to_numpy()
+    return ~np.isnan(latitud) & ~np.isnan(longitud) & ~en_gazetteer & (veces < repeticiones)
+
+
+def _distancia(lat1, lon1, lat2, lon2):
+    """
+    Distancia en metros por haversine, por elemento (NaN si falta alguna coordenada).
+    """
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * RADIO_TIERRA * np.arcsin(np.sqrt(np.minimum(1.0, a)))
+
+
+def _similitud(a, b):
+    """
+    1 - diferencia relativa entre a y b, por elemento (NaN si falta alguno o ambos son 0).
+    """
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return 1 - np.abs(a - b) / np.maximum(a, b)
+
+
+def _pares_vecinos(bloque, area, precio, ventana):
+    """
+    Pares (i, j) de filas del mismo bloque que quedan a menos de 'ventana' posiciones al
+    ordenar por área y precio: en bloques pequeños son todos los pares; en los grandes, los
+    de área más parecida. Las filas con bloque -1 no se comparan.
+    """
+    validas = np.flatnonzero(bloque >= 0)
+    orden = validas[np.lexsort((precio[validas], area[validas], bloque[validas]))]
+    bloques = bloque[orden]
+    pares_i, pares_j = [], []
+    for distancia in range(1, min(ventana, len(orden) - 1) + 1):
+        mismo_bloque = bloques[:-distancia] == bloques[distancia:]
+        pares_i.append(orden[:-distancia][mismo_bloque])
+        pares_j.append(orden[distancia:][mismo_bloque])
+    if not pares_i:
+        return np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+    return np.concatenate(pares_i), np.concatenate(pares_j)
+
+
+def pares_candidatos(zonas, precio, area, ventana=VENTANA):
+    """
+    Pares de filas que vale la pena comparar. Se bloquea por cada zona de 'zonas' (códigos
+    por fila, NaN si no tiene) y banda de precio; cada fila entra también en la banda
+    inferior para no perder pares en el borde de dos bandas. Devuelve (i, j) con i < j,
+    sin repetidos.
+    """
+    n = len(precio)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        banda = np.floor(np.log(precio) / np.log1p(ANCHO_BANDA_PRECIO))
+    finitas = np.isfinite(banda)
+    banda = np.where(finitas, banda - (banda[finitas].min() if finitas.any() else 0) + 1, 0)  # Sin precio: banda 0
+    bandas = banda.max(initial=0) + 2
+
+    # Cada fila aparece dos veces: en su banda y en la inferior
+    filas = np.tile(np.arange(n), 2)
+    bandas_filas = np.concatenate([banda, np.maximum(banda - 1, 0)])
+    pares = []
+    for zona in zonas:
+        llave = zona[filas] * bandas + bandas_filas
+        bloque = np.where(np.isnan(llave), -1, pd.factorize(llave)[0])
+        i, j = _pares_vecinos(bloque, area[filas], precio[filas], ventana)
+        i, j = filas[i], filas[j]
+        distintas = i != j
+        pares.append(np.minimum(i, j)[distintas] * n + np.maximum(i, j)[distintas])
+    pares = np.sort(np.concatenate(pares))
+    pares = pares[np.r_[True, pares[1:] != pares[:-1]]]
+    return pares // n, pares % n
+
+
+def nombres_distintivos(nombres, zonas):
+    """
+    Nombre de cada listado (ya normalizado) sin las palabras de plantilla ni las de su zona
+    ('zonas': barrio y ciudad normalizados). Queda vacío si el título es solo la plantilla.
+    """
+    codigos, unicos = pd.factorize(nombres + '|' + zonas)
+    distintivos = []
+    for texto in unicos:
+        nombre, zona = texto.split('|', 1)
+        comunes = PALABRAS_PLANTILLA | set(zona.split())
+        distintivos.append(' '.join(palabra for palabra in nombre.split() if palabra not in comunes))
+    return pd.Series(np.array(distintivos, dtype=object)[codigos], index=nombres.index)
+
+
+def _tejas(texto, n=3):
+    return {texto[k:k + n] for k in range(max(1, len(texto) - n + 1))}
+
+
+def similitud_nombres(codigos_i, codigos_j, nombres):
+    """
+    Similitud de Jaccard entre los trigramas de caracteres de los nombres de cada par
+    (los nombres vienen factorizados: 'nombres' son los valores únicos).
+    """
+    tejas = {}
+    resultado = np.ones(len(codigos_i))
+    for posicion, (a, b) in enumerate(zip(codigos_i.tolist(), codigos_j.tolist())):
+        if a == b:
+            continue
+        for codigo in (a, b):
+            if codigo not in tejas:
+                tejas[codigo] = _tejas(nombres[codigo])
+        union = len(tejas[a] | tejas[b])
+        resultado[posicion] = len(tejas[a] & tejas[b]) / union if union else 0.0
+    return resultado
+
+
+class UnionFind:
+    """
+    Conjuntos disjuntos sobre posiciones 0..n-1; la raíz de cada grupo es su menor posición.
+    """
+
+    def __init__(self, n):
+        self.padre = list(range(n))
+
+    def raiz(self, x):
+        padre = self.padre
+        while padre[x] != x:
+            padre[x] = padre[padre[x]]
+            x = padre[x]
+        return x
+
+    def unir(self, a, b):
+        a, b = self.raiz(a), self.raiz(b)
+        if a != b:
+            self.padre[max(a, b)] = min(a, b)
+
+
+def detectar_duplicados(datos, ventana=VENTANA, umbrales=UMBRALES, distancia_maxima=DISTANCIA_MAXIMA):
+    """
+    Agrupa los listados de 'datos' (columnas de locales_comerciales: id_listado, descripcion,
+    barrio, ciudad, valorarriendo, areacuadrada, fotolocal y coordenadas) que son la misma
+    propiedad, aunque vengan de otro portal o categoría. Devuelve una serie 'id_canonico' con
+    el id_listado de la primera fila de cada grupo (la misma fila si no tiene duplicados).
+    Los títulos de plantilla y las coordenadas de centroide no cuentan como coincidencia.
+    """
+    n = len(datos)
+    ids = datos['id_listado'].to_numpy(dtype=object)
+    if n < 2:
+        return pd.Series(ids, index=datos.index, name='id_canonico')
+
+    precio = pd.to_numeric(datos['valorarriendo'], errors='coerce').to_numpy(dtype='float64')
+    area = pd.to_numeric(datos['areacuadrada'], errors='coerce').to_numpy(dtype='float64')
+    latitud, longitud = _coordenadas(datos['coordenadas'])
+    precisas = coordenadas_precisas(latitud, longitud)
+    barrios = _normalizar_texto(datos['barrio']) + ' ' + _normalizar_texto(datos['ciudad'])
+    # Dos pasadas de bloqueo: por celda geohash y por barrio y ciudad, para los listados sin coordenadas
+    # o con el local justo en el borde de una celda
+    zonas = [celdas_geohash(latitud, longitud), pd.factorize(barrios)[0].astype('float64')]
+    i, j = pares_candidatos(zonas, precio, area, ventana)
+    imagenes = pd.factorize(_normalizar_imagen(datos['fotolocal']))[0]
+
+    distancia = _distancia(latitud[i], longitud[i], latitud[j], longitud[j])
+    # Cerca solo con coordenadas precisas; un centroide o un punto faltante no prueba nada
+    ambas_precisas = precisas[i] & precisas[j]
+    cerca = ambas_precisas & (distancia <= distancia_maxima)
+    similitud_area = _similitud(area[i], area[j])
+    misma_imagen = (imagenes[i] == imagenes[j]) & (imagenes[i] >= 0)
+    por_imagen = (
+        misma_imagen & ~(ambas_precisas & (distancia > distancia_maxima))
+        & ((similitud_area >= umbrales['area_con_imagen']) | np.isnan(similitud_area))
+    )
+    # Sin imagen común: cerca, precio casi igual y el área exacta o un nombre distintivo parecido.
+    # El nombre, que es lo más costoso, solo se compara en los pares que pasan lo demás.
+    por_numeros = cerca & ~por_imagen & (_similitud(precio[i], precio[j]) >= umbrales['precio'])
+    por_area = por_numeros & (area[i] == area[j]) & (distancia <= DISTANCIA_MISMO_PUNTO)
+    candidatos = por_numeros & ~por_area & (similitud_area >= umbrales['area'])
+    codigos, nombres = pd.factorize(nombres_distintivos(_normalizar_texto(datos['descripcion']), barrios))
+    con_nombre = nombres != ''
+    candidatos &= con_nombre[codigos[i]] & con_nombre[codigos[j]]
+    por_nombre = np.zeros(len(i), dtype=bool)
+    por_nombre[candidatos] = similitud_nombres(codigos[i[candidatos]], codigos[j[candidatos]], nombres) >= umbrales['nombre']
+
+    grupos = UnionFind(n)
+    duplicados = por_imagen | por_area | por_nombre
+    for a, b in zip(i[duplicados].tolist(), j[duplicados].tolist()):
+        grupos.unir(a, b)
+    raices = np.fromiter((grupos.raiz(x) for x in range(n)), dtype=np.int64, count=n)
+    return pd.Series(ids[raices], index=datos.index, name='id_canonico')
+
+
+def marcar_duplicados(conn):
+    """
+    Calcula 'id_canonico' de todos los listados de locales_comerciales (en orden de 'id_local',
+    así que el canónico de un grupo es su listado más antiguo y no cambia al llegar otros) y
+    actualiza solo las filas que cambiaron. Luego recalcula los resúmenes de los barrios
+    afectados, que cuentan una sola vez cada grupo. Devuelve (listados, duplicados, actualizados).
+    """
+    asegurar_esquema(conn)
+    datos = pd.read_sql("""
+        SELECT id_listado, descripcion, barrio, ciudad, valorarriendo, areacuadrada, fotolocal, coordenadas
+        FROM locales_comerciales WHERE id_listado IS NOT NULL ORDER BY id_local
+    """, conn)
+    canonicos = detectar_duplicados(datos)
+
+    buffer = io.StringIO()
+    pd.DataFrame({'id_listado': datos['id_listado'], 'id_canonico': canonicos}).to_csv(buffer, header=False, index=False)
+    buffer.seek(0)
+    with conn.cursor() as cursor:
+        cursor.execute("CREATE TEMP TABLE canonicos (id_listado TEXT, id_canonico TEXT) ON COMMIT DROP")
+        cursor.copy_expert("COPY canonicos FROM STDIN WITH (FORMAT csv)", buffer)
+        cursor.execute("""
+            UPDATE locales_comerciales l SET id_canonico = c.id_canonico
+            FROM canonicos c
+            WHERE l.id_listado = c.id_listado AND l.id_canonico IS DISTINCT FROM c.id_canonico
+            RETURNING l.ciudad, l.barrio
+        """)
+        afectados = cursor.fetchall()
+    refrescar_agregados(conn, barrios=set(afectados), commit=False)
+    conn.commit()
+    return len(datos), int((canonicos != datos['id_listado']).sum()), len(afectados)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Detecta listados duplicados entre portales y categorías")
+    parser.add_argument('--csv', nargs='+', help="CSV de los scrapers a revisar en lugar de la base de datos")
+    parser.add_argument('--salida', default='propiedades_canonicas.csv', help="CSV de salida con --csv")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    if args.csv:
+        propiedades = list(leer_csv(args.csv))
+        filas, _ = filas_desde_propiedades(propiedades)
+        filas['id_canonico'] = detectar_duplicados(filas)
+        campos = list(propiedades[0]) + ['id_listado', 'id_canonico'] if propiedades else ['id_listado', 'id_canonico']
+        with open(args.salida, 'w', newline='', encoding='utf-8') as f:
+            escritor = csv.DictWriter(f, fieldnames=campos)
+            escritor.writeheader()
+            for prop, id_listado, id_canonico in zip(propiedades, filas['id_listado'], filas['id_canonico']):
+                escritor.writerow({**prop, 'id_listado': id_listado, 'id_canonico': id_canonico})
+        duplicados = int((filas['id_canonico'] != filas['id_listado']).sum())
+        print(f"{len(filas)} listados, {duplicados} duplicados; resultado en '{args.salida}'")
+    else:
+        conexion = conectar()
+        try:
+            listados, duplicados, actualizados = marcar_duplicados(conexion)
+        finally:
+            conexion.close()
+        print(f"{listados} listados, {duplicados} duplicados, {actualizados} filas actualizadas")
+    print(f"Tiempo: {time.perf_counter() - inicio:.1f}s")
@@ -0,0 +1,208 @@
+import argparse
+import json
+import math
+import time
+from acceso_datos import conexion, consultar_df
+from cargador_bd import asegurar_esquema
+from geocache import normalizar_direccion
+
+# Radio medio de la Tierra en metros (el mismo de la fórmula de haversine)
+RADIO_TIERRA = 6371000.0
+
+# Columnas que devuelven las consultas espaciales; 'punto' es un POINT (longitud, latitud).
+# Como la búsqueda, se consulta locales_unicos (sin los listados duplicados de otros portales).
+COLUMNAS_ESPACIALES = [
+    'id_local', 'barrio', 'localidad', 'ciudad', 'valorarriendo', 'areacuadrada', 'link', 'coordenadas', 'prioridad'
+]
+LAT_LON = "punto[1] AS latitud, punto[0] AS longitud"
+
+# Índice GiST (árbol R) sobre la columna 'punto' de locales_comerciales, más la tabla de
+# polígonos de localidades. Son tipos geométricos propios de PostgreSQL: no requieren PostGIS.
+ESQUEMA_ESPACIAL = """
+    CREATE INDEX IF NOT EXISTS locales_comerciales_punto_idx ON locales_comerciales USING gist (punto);
+    CREATE TABLE IF NOT EXISTS localidades_poligonos (
+        id SERIAL PRIMARY KEY,
+        nombre TEXT NOT NULL,
+        clave TEXT NOT NULL,
+        poligono POLYGON NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS localidades_poligonos_clave_idx ON localidades_poligonos (clave);
+"""
+
+# Distancia de haversine en metros entre 'punto' y otro punto. Parámetros: latitud,
+# coseno de la latitud y longitud del punto (el coseno se calcula en Python una sola vez).
+DISTANCIA = f"""(2 * {RADIO_TIERRA} * asin(sqrt(least(1.0,
+    sin(radians(punto[1] - %s) / 2) ^ 2
+    + %s * cos(radians(punto[1])) * sin(radians(punto[0] - %s) / 2) ^ 2))))"""
+
+
+def asegurar_esquema_espacial(conn):
+    """
+    Crea el índice espacial de los locales y la tabla de polígonos de localidades.
+    """
+    asegurar_esquema(conn)
+    with conn.cursor() as cursor:
+        cursor.execute(ESQUEMA_ESPACIAL)
+    conn.commit()
+
+
+def _params_distancia(lat, lon):
+    return [lat, math.cos(math.radians(lat)), lon]
+
+
+def caja_radio(lat, lon, metros):
+    """
+    Caja (lon_min, lat_min, lon_max, lat_max) que contiene el círculo de 'metros' alrededor
+    del punto. Es el filtro que resuelve el índice; la distancia exacta se revisa después.
+    """
+    angulo = metros / RADIO_TIERRA
+    dlat = math.degrees(angulo)
+    coseno = math.cos(math.radians(lat))
+    dlon = 180.0 if coseno < 1e-9 or math.sin(angulo) >= coseno else math.degrees(math.asin(math.sin(angulo) / coseno))
+    return lon - dlon, lat - dlat, lon + dlon, lat + dlat
+
+
+def condicion_radio(lat, lon, metros):
+    """
+    Devuelve (condición SQL, parámetros) para los locales a menos de 'metros' del punto:
+    la caja usa el índice GiST y la distancia de haversine descarta las esquinas.
+    """
+    lon_min, lat_min, lon_max, lat_max = caja_radio(lat, lon, metros)
+    condicion = f"punto <@ box(point(%s, %s), point(%s, %s)) AND {DISTANCIA} <= %s"
+    return condicion, [lon_min, lat_min, lon_max, lat_max] + _params_distancia(lat, lon) + [metros]
+
+
+def locales_en_radio(lat, lon, metros, limite=500):
+    """
+    Locales a menos de 'metros' del punto, del más cercano al más lejano, con la
+    columna 'distancia_m'.
+    """
+    condicion, params = condicion_radio(lat, lon, metros)
+    query = f"""
+        SELECT {', '.join(COLUMNAS_ESPACIALES)}, {LAT_LON}, {DISTANCIA} AS distancia_m
+        FROM locales_unicos
+        WHERE {condicion}
+        ORDER BY distancia_m
+        LIMIT %s
+    """
+    return consultar_df(query, _params_distancia(lat, lon) + params + [limite])
+
+
+def locales_cercanos(lat, lon, n=10, candidatos=4):
+    """
+    Los 'n' locales más cercanos al punto, con 'distancia_m'. El índice ordena por distancia
+    en grados (búsqueda KNN con <->); se toman n * 'candidatos' y se reordenan por la
+    distancia real, lo que corrige la diferencia de escala entre latitud y longitud.
+    """
+    query = f"""
+        SELECT * FROM (
+            SELECT {', '.join(COLUMNAS_ESPACIALES)}, {LAT_LON}, {DISTANCIA} AS distancia_m
+            FROM locales_unicos
+            WHERE punto IS NOT NULL
+            ORDER BY punto <-> point(%s, %s)
+            LIMIT %s
+        ) AS candidatos
+        ORDER BY distancia_m
+        LIMIT %s
+    """
+    return consultar_df(query, _params_distancia(lat, lon) + [lon, lat, n * candidatos, n])
+
+
+def _poligono_sql(vertices):
+    """
+    Texto de un POLYGON de PostgreSQL a partir de vértices (longitud, latitud).
+    """
+    return '(' + ','.join(f'({lon!r},{lat!r})' for lon, lat in vertices) + ')'
+
+
+def locales_en_poligono(vertices, limite=5000):
+    """
+    Locales dentro del polígono dado por sus vértices (longitud, latitud), como en GeoJSON.
+    """
+    query = f"""
+        SELECT {', '.join(COLUMNAS_ESPACIALES)}, {LAT_LON}
+        FROM locales_unicos
+        WHERE punto <@ %s::polygon
+        ORDER BY id_local
+        LIMIT %s
+    """
+    return consultar_df(query, [_poligono_sql(vertices), limite])
+
+
+def locales_en_localidad(nombre, limite=5000):
+    """
+    Locales dentro del polígono de la localidad 'nombre' (ver cargar_localidades). Se usa
+    la ubicación, no la columna 'localidad', así que incluye locales sin localidad escrita.
+    """
+    columnas = ', '.join(f'l.{columna}' for columna in COLUMNAS_ESPACIALES)
+    query = f"""
+        SELECT DISTINCT ON (l.id_local) {columnas}, l.punto[1] AS latitud, l.punto[0] AS longitud
+        FROM localidades_poligonos p
+        JOIN locales_unicos l ON l.punto <@ p.poligono
+        WHERE p.clave = %s
+        ORDER BY l.id_local
+        LIMIT %s
+    """
+    return consultar_df(query, [normalizar_direccion(nombre), limite])
+
+
+def _anillos_exteriores(geometria):
+    if geometria['type'] == 'Polygon':
+        return [geometria['coordinates'][0]]
+    if geometria['type'] == 'MultiPolygon':
+        return [poligono[0] for poligono in geometria['coordinates']]
+    return []
+
+
+def cargar_localidades(conn, ruta, campo_nombre='LocNombre'):
+    """
+    Carga los polígonos de localidades desde un GeoJSON en WGS84 (por ejemplo, la capa de
+    localidades de Datos Abiertos Bogotá), reemplazando los que había. Cada parte de un
+    MultiPolygon se guarda como un polígono; los huecos se ignoran. Devuelve cuántos se cargaron.
+    """
+    with open(ruta, encoding='utf-8') as f:
+        capa = json.load(f)
+
+    filas = []
+    for elemento in capa['features']:
+        propiedades = elemento.get('properties') or {}
+        nombre = propiedades.get(campo_nombre) or propiedades.get('nombre') or propiedades.get('NOMBRE')
+        if not nombre or not elemento.get('geometry'):
+            continue
+        for anillo in _anillos_exteriores(elemento['geometry']):
+            filas.append((nombre, normalizar_direccion(nombre), _poligono_sql(punto[:2] for punto in anillo)))
+
+    asegurar_esquema_espacial(conn)
+    with conn.cursor() as cursor:
+        cursor.execute("TRUNCATE localidades_poligonos")
+        cursor.executemany(
+            "INSERT INTO localidades_poligonos (nombre, clave, poligono) VALUES (%s, %s, %s::polygon)", filas
+        )
+    conn.commit()
+    return len(filas)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Índice y consultas espaciales de locales comerciales")
+    parser.add_argument('--localidades', help="GeoJSON con los polígonos de las localidades a cargar")
+    parser.add_argument('--campo-nombre', default='LocNombre', help="Propiedad del GeoJSON con el nombre de la localidad")
+    parser.add_argument('--cerca', nargs=2, type=float, metavar=('LAT', 'LON'), help="Punto de referencia para probar consultas")
+    parser.add_argument('--radio', type=float, default=1000, help="Radio en metros alrededor de --cerca")
+    parser.add_argument('--n', type=int, default=10, help="Cantidad de locales más cercanos a --cerca")
+    args = parser.parse_args()
+
+    with conexion() as conn:
+        asegurar_esquema_espacial(conn)
+        if args.localidades:
+            print(f"{cargar_localidades(conn, args.localidades, args.campo_nombre)} polígonos de localidades cargados")
+    print("Índice espacial creado")
+
+    if args.cerca:
+        lat, lon = args.cerca
+        for descripcion, consulta in [
+            (f"a menos de {args.radio:.0f} m", lambda: locales_en_radio(lat, lon, args.radio)),
+            (f"{args.n} más cercanos", lambda: locales_cercanos(lat, lon, args.n))
+        ]:
+            inicio = time.perf_counter()
+            datos = consulta()
+            print(f"{descripcion}: {len(datos)} locales en {(time.perf_counter() - inicio) * 1000:.1f} ms")
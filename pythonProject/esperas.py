@@ -0,0 +1,163 @@
+import gzip
+import json
+import os
+import random
+import re
+import threading
+import time
+from urllib.parse import urlparse
+
+# Número de tarjetas, recursos descargados y estado del documento en una sola llamada al navegador
+SCRIPT_ESTADO = """
+    return [
+        document.querySelectorAll(arguments[0]).length,
+        performance.getEntriesByType('resource').length,
+        document.readyState
+    ];
+"""
+
+
+class TiemposAdaptativos:
+    """
+    Timeouts por sitio que se ajustan según los tiempos de carga observados: el timeout es
+    'factor' veces el promedio móvil de las cargas exitosas, acotado entre 'minimo' y 'maximo'.
+    Mientras un sitio no tiene observaciones se usa 'maximo'. Es seguro compartirlo entre hilos.
+    """
+
+    def __init__(self, minimo=5.0, maximo=30.0, factor=3.0, alfa=0.3):
+        self.minimo = minimo
+        self.maximo = maximo
+        self.factor = factor
+        self.alfa = alfa
+        self._promedios = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def sitio(url):
+        return urlparse(url).netloc
+
+    def timeout(self, url):
+        with self._lock:
+            promedio = self._promedios.get(self.sitio(url))
+        if promedio is None:
+            return self.maximo
+        return min(self.maximo, max(self.minimo, self.factor * promedio))
+
+    def registrar(self, url, segundos):
+        sitio = self.sitio(url)
+        with self._lock:
+            anterior = self._promedios.get(sitio)
+            self._promedios[sitio] = segundos if anterior is None else (1 - self.alfa) * anterior + self.alfa * segundos
+
+
+tiempos_por_sitio = TiemposAdaptativos()
+
+
+def esperar_tarjetas_estables(driver, selector, timeout, intervalo=0.2, estable=0.6):
+    """
+    Espera a que la página tenga al menos una tarjeta y a que el número de tarjetas y de
+    recursos descargados no cambie durante 'estable' segundos con el documento ya cargado
+    (la lista terminó de renderizar y la red quedó quieta). Devuelve el número de tarjetas;
+    lanza TimeoutException si no se cumple en 'timeout' segundos.
+    """
+    from selenium.common.exceptions import TimeoutException  # Solo se necesita con el navegador
+
+    limite = time.monotonic() + timeout
+    anterior, desde = None, None
+    while True:
+        tarjetas, recursos, estado = driver.execute_script(SCRIPT_ESTADO, selector)
+        ahora = time.monotonic()
+        if tarjetas and estado == 'complete':
+            if (tarjetas, recursos) != anterior:
+                anterior, desde = (tarjetas, recursos), ahora
+            elif ahora - desde >= estable:
+                return tarjetas
+        else:
+            anterior, desde = None, None
+        if ahora >= limite:
+            raise TimeoutException(f"{tarjetas} tarjetas y documento '{estado}' después de {timeout:.1f}s")
+        time.sleep(intervalo)
+
+
+def cargar_con_reintentos(driver, url, selector, reintentos=2, espera_base=1.0, tiempos=tiempos_por_sitio):
+    """
+    Carga 'url' y espera las tarjetas con el timeout adaptativo del sitio. Si se vence, reintenta
+    hasta 'reintentos' veces con backoff exponencial (y un poco de azar) y duplicando el timeout.
+    Devuelve el número de tarjetas; la última TimeoutException se propaga.
+    """
+    from selenium.common.exceptions import TimeoutException
+
+    timeout = tiempos.timeout(url)
+    for intento in range(reintentos + 1):
+        inicio = time.monotonic()
+        driver.get(url)
+        try:
+            tarjetas = esperar_tarjetas_estables(driver, selector, timeout)
+        except TimeoutException:
+            if intento == reintentos:
+                raise
+            time.sleep(espera_base * 2 ** intento + random.uniform(0, espera_base))
+            timeout = min(tiempos.maximo, timeout * 2)
+            continue
+        tiempos.registrar(url, time.monotonic() - inicio)
+        return tarjetas
+
+
+def guardar_pagina_fallida(page_source, clave, directorio='paginas_fallidas'):
+    """
+    Guarda el HTML de una página que no se pudo procesar en un archivo .html.gz para revisarlo
+    después, en lugar de imprimirlo en la consola. Devuelve la ruta del archivo.
+    """
+    os.makedirs(directorio, exist_ok=True)
+    nombre = re.sub(r'[^\w.-]+', '_', '-'.join(str(parte) for parte in clave))
+    ruta = os.path.join(directorio, f"{nombre}-{time.strftime('%Y%m%d-%H%M%S')}.html.gz")
+    with gzip.open(ruta, 'wt', encoding='utf-8') as f:
+        f.write(page_source or '')
+    return ruta
+
+
+# Bytes transferidos (documento + recursos) y tiempos de la navegación según la API de Performance.
+# transferSize es 0 en los recursos de otros dominios sin Timing-Allow-Origin: los bytes de la
+# API de Performance son solo un respaldo para cuando no hay registro de red (ver bytes_de_red).
+SCRIPT_METRICAS = """
+    const nav = performance.getEntriesByType('navigation')[0] || {};
+    const recursos = performance.getEntriesByType('resource');
+    return [
+        (nav.transferSize || 0) + recursos.reduce((total, r) => total + (r.transferSize || 0), 0),
+        recursos.length,
+        (nav.loadEventEnd || nav.domContentLoadedEventEnd || performance.now()) / 1000
+    ];
+"""
+
+
+def bytes_de_red(driver):
+    """
+    Suma 'encodedDataLength' de los eventos Network.loadingFinished del registro 'performance'
+    (ver setup_driver), que cuentan los bytes de todos los dominios. Leer el registro lo vacía,
+    así que cada llamada cubre las solicitudes terminadas desde la anterior. Devuelve
+    (bytes, solicitudes), o None si el navegador no guarda ese registro.
+    """
+    try:
+        entradas = driver.get_log('performance')
+    except Exception:
+        return None
+    transferidos, solicitudes = 0, 0
+    for entrada in entradas:
+        mensaje = json.loads(entrada['message'])['message']
+        if mensaje.get('method') == 'Network.loadingFinished':
+            transferidos += mensaje['params'].get('encodedDataLength', 0)
+            solicitudes += 1
+    return transferidos, solicitudes
+
+
+def medir_carga(driver):
+    """
+    Devuelve los bytes transferidos, el número de recursos y el tiempo de carga (segundos)
+    de la página actual, para comparar perfiles de navegador. Los bytes y recursos salen de
+    los eventos de red de CDP (bytes_de_red) y, si no hay registro, de la API de Performance.
+    """
+    transferidos, recursos, segundos = driver.execute_script(SCRIPT_METRICAS)
+    red = bytes_de_red(driver)
+    if red is not None:
+        transferidos, recursos = red
+    return {'bytes': transferidos, 'recursos': recursos, 'segundos': segundos}
@@ -0,0 +1,101 @@
+from collections import namedtuple
+
+try:
+    from lxml import etree
+    from lxml import html as lxml_html
+except ImportError:  # Sin lxml se usa el extractor con BeautifulSoup
+    etree = None
+
+# Registro compacto con los campos crudos de una tarjeta 'ciencuadras-card'
+Tarjeta = namedtuple('Tarjeta', ['ubicacion', 'nombre', 'precio', 'imagen', 'tamano', 'banios'])
+
+
+def _clase(nombre):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {nombre} ')"
+
+
+if etree is not None:
+    # Expresiones XPath compiladas una sola vez para todo el proceso
+    XPATH_TARJETAS = etree.XPath('//ciencuadras-card')
+    XPATH_CAMPOS = {
+        'ubicacion': etree.XPath(f"(.//span[{_clase('card__location-label')}])[1]"),
+        'nombre': etree.XPath(f"(.//p[{_clase('card__location')}])[1]"),
+        'precio': etree.XPath(f"(.//span[{_clase('card__price-big')}])[1]"),
+        'imagen': etree.XPath("(.//img)[1]/@src"),
+        'tamano': etree.XPath(f"(((.//ciencuadras-specs-results)[1]//div[{_clase('specs')}])[1]//p)[1]//span[1]"),
+        'specs': etree.XPath("(.//ciencuadras-specs-results)[1]//span"),
+    }
+
+
+def _texto_lxml(nodos):
+    return nodos[0].text_content().strip() if nodos else 'N/A'
+
+
+def _banios(textos):
+    for texto in textos:
+        if texto.startswith('Baños'):
+            # Extraer el número después de 'Baños'
+            return texto.replace('Baños', '').strip()
+    return 'N/A'
+
+
+def extraer_tarjetas_lxml(page_source):
+    """
+    Parsea la página una sola vez con lxml y aplica las expresiones XPath precompiladas
+    a cada tarjeta. Genera un registro 'Tarjeta' por propiedad.
+    """
+    if not page_source:
+        return
+    arbol = lxml_html.fromstring(page_source)
+    campos = XPATH_CAMPOS
+    for card in XPATH_TARJETAS(arbol):
+        imagen = campos['imagen'](card)
+        yield Tarjeta(
+            ubicacion=_texto_lxml(campos['ubicacion'](card)),
+            nombre=_texto_lxml(campos['nombre'](card)),
+            precio=_texto_lxml(campos['precio'](card)),
+            imagen=str(imagen[0]) if imagen else 'N/A',
+            tamano=_texto_lxml(campos['tamano'](card)),
+            banios=_banios(span.text_content().strip() for span in campos['specs'](card))
+        )
+
+
+def extraer_tarjetas_bs4(page_source):
+    """
+    Extractor original basado en BeautifulSoup con 'html.parser'. Se mantiene como respaldo
+    cuando lxml no está instalado y como referencia para el benchmark.
+    """
+    from bs4 import BeautifulSoup  # Solo se importa si se usa este extractor
+
+    soup = BeautifulSoup(page_source, 'html.parser')
+    for card in soup.find_all('ciencuadras-card'):
+        location_label = card.find('span', class_='card__location-label')
+        ubicacion = location_label.text.strip() if location_label else 'N/A'
+
+        # Nombre (asume que 'p' tag con class 'card__location' tiene más info)
+        nombre_tag = card.find('p', class_='card__location')
+        nombre = nombre_tag.text.strip() if nombre_tag else 'N/A'
+
+        precio_tag = card.find('span', class_='card__price-big')
+        precio = precio_tag.text.strip() if precio_tag else 'N/A'
+
+        img_tag = card.find('img')
+        imagen = img_tag['src'] if img_tag and 'src' in img_tag.attrs else 'N/A'
+
+        # Extraer el tamaño en m2
+        tamano = 'N/A'
+        specs_results = card.find('ciencuadras-specs-results')
+        if specs_results:
+            specs_div = specs_results.find('div', class_='specs')
+            tamano_tag = specs_div.find('p') if specs_div else None
+            span_tamano = tamano_tag.find('span') if tamano_tag else None
+            if span_tamano:
+                tamano = span_tamano.text.strip()
+
+        banios = _banios(span.text.strip() for span in specs_results.find_all('span')) if specs_results else 'N/A'
+
+        yield Tarjeta(ubicacion, nombre, precio, imagen, tamano, banios)
+
+
+# Extractor por defecto: lxml si está disponible
+extraer_tarjetas = extraer_tarjetas_lxml if etree is not None else extraer_tarjetas_bs4
@@ -0,0 +1,63 @@
+import json
+import os
+from geocache import normalizar_direccion
+
+CENTROIDES_BOGOTA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'datos', 'centroides_bogota.json')
+
+
+def _normalizar(texto):
+    return normalizar_direccion(texto or '').replace(',', '')
+
+
+class Gazetteer:
+    """
+    Tabla local de centroides de barrios y localidades de una ciudad (por defecto Bogotá,
+    ver datos/centroides_bogota.json). Resuelve direcciones sin red; las coordenadas son
+    aproximadas y se devuelven como texto, igual que las de Nominatim.
+    """
+
+    def __init__(self, ruta=CENTROIDES_BOGOTA):
+        with open(ruta, encoding='utf-8') as f:
+            datos = json.load(f)
+        self.ciudad = _normalizar(datos['ciudad'])
+        self.localidades = {_normalizar(nombre): coordenadas for nombre, coordenadas in datos['localidades'].items()}
+        self.barrios = {}
+        por_nombre = {}
+        for fila in datos['barrios']:
+            coordenadas = [fila['lat'], fila['lon']]
+            self.barrios[(_normalizar(fila['barrio']), _normalizar(fila['localidad']))] = coordenadas
+            por_nombre.setdefault(_normalizar(fila['barrio']), []).append(coordenadas)
+        # Un barrio sin localidad conocida solo se resuelve si el nombre no se repite en la ciudad
+        self.barrios_unicos = {nombre: lista[0] for nombre, lista in por_nombre.items() if len(lista) == 1}
+        # Nombres legibles -> (latitud, longitud), para elegir un punto de referencia en la vista
+        self.lugares = {nombre: tuple(coordenadas) for nombre, coordenadas in datos['localidades'].items()}
+        for fila in datos['barrios']:
+            self.lugares[f"{fila['barrio']} ({fila['localidad']})"] = (fila['lat'], fila['lon'])
+
+    def buscar(self, barrio, localidad, ciudad, nivel='barrio'):
+        """
+        Devuelve (latitud, longitud) del barrio (nivel='barrio') o de la localidad
+        (nivel='localidad'), o None si no está en la tabla o la ciudad es otra.
+        """
+        if not _normalizar(ciudad).startswith(self.ciudad):
+            return None
+        if nivel == 'barrio':
+            barrio = _normalizar(barrio)
+            coordenadas = self.barrios.get((barrio, _normalizar(localidad))) or self.barrios_unicos.get(barrio)
+        else:
+            coordenadas = self.localidades.get(_normalizar(localidad))
+        if coordenadas is None:
+            return None
+        return f"{coordenadas[0]:.4f}", f"{coordenadas[1]:.4f}"
+
+
+_gazetteers = {}
+
+
+def obtener_gazetteer(ruta=CENTROIDES_BOGOTA):
+    """
+    Devuelve el gazetteer de 'ruta', cargándolo una sola vez por proceso.
+    """
+    if ruta not in _gazetteers:
+        _gazetteers[ruta] = Gazetteer(ruta)
+    return _gazetteers[ruta]
@@ -0,0 +1,94 @@
+import sqlite3
+import threading
+import time
+import unicodedata
+
+
+def normalizar_direccion(direccion):
+    """
+    Normaliza una dirección para usarla como llave del caché:
+    minúsculas, sin tildes y con espacios/comas compactados.
+    """
+    texto = unicodedata.normalize('NFKD', direccion)
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    partes = [' '.join(parte.split()) for parte in texto.lower().split(',')]
+    return ', '.join(parte for parte in partes if parte)
+
+
+class GeocodeCache:
+    """
+    Caché persistente en SQLite para los resultados de geocodificación.
+
+    Los resultados positivos se guardan de forma indefinida; los negativos
+    (direcciones sin coordenadas) expiran después de 'ttl_negativo' segundos
+    para volver a intentarlos en una corrida posterior.
+    """
+
+    def __init__(self, ruta='geocache.sqlite', ttl_negativo=7 * 24 * 3600):
+        self.ruta = ruta
+        self.ttl_negativo = ttl_negativo
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(ruta, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS geocodificacion (
+                direccion TEXT PRIMARY KEY,
+                latitud TEXT,
+                longitud TEXT,
+                encontrado INTEGER NOT NULL,
+                actualizado REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+    def get(self, direccion):
+        """
+        Devuelve (latitud, longitud) si la dirección está en caché y no ha expirado,
+        ('N/A', 'N/A') para un negativo vigente, o None si hay que consultar la red.
+        """
+        llave = normalizar_direccion(direccion)
+        with self._lock:
+            fila = self._conn.execute(
+                "SELECT latitud, longitud, encontrado, actualizado FROM geocodificacion WHERE direccion = ?",
+                (llave,)
+            ).fetchone()
+            if fila is None:
+                self.misses += 1
+                return None
+            latitud, longitud, encontrado, actualizado = fila
+            if not encontrado and time.time() - actualizado > self.ttl_negativo:
+                self.misses += 1
+                return None
+            self.hits += 1
+            if not encontrado:
+                return 'N/A', 'N/A'
+            return latitud, longitud
+
+    def set(self, direccion, latitud, longitud):
+        """
+        Guarda el resultado de una geocodificación. 'N/A' se registra como negativo.
+        """
+        llave = normalizar_direccion(direccion)
+        encontrado = int(latitud != 'N/A' and longitud != 'N/A')
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO geocodificacion VALUES (?, ?, ?, ?, ?)",
+                (llave, latitud if encontrado else None, longitud if encontrado else None, encontrado, time.time())
+            )
+            self._conn.commit()
+
+    def stats(self):
+        """
+        Devuelve los contadores de aciertos y fallos del caché.
+        """
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
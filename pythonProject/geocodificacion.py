@@ -0,0 +1,373 @@
+import asyncio
+import os
+import random
+import threading
+import time
+import requests
+from gazetteer import obtener_gazetteer
+from metricas import metricas_scraper
+
+# aiohttp se importa la primera vez que hay que consultar Nominatim (ver _importar_aiohttp):
+# las corridas que se resuelven con el gazetteer no pagan su importación
+aiohttp = None
+_aiohttp_importado = False
+
+# Se puede apuntar a otro servidor (por ejemplo servidor_local.py) con la variable de entorno NOMINATIM_URL
+NOMINATIM_URL = os.environ.get('NOMINATIM_URL', "https://nominatim.openstreetmap.org/search")
+NOMINATIM_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (compatible; TuNombre/1.0; tuemail@example.com)'  # Reemplaza con tu información
+}
+NOMINATIM_TIMEOUT = 10
+
+# Sesión compartida para reutilizar la conexión entre consultas síncronas
+_sesion = requests.Session()
+_sesion.headers.update(NOMINATIM_HEADERS)
+
+
+class ErrorTransitorio(Exception):
+    """
+    Respuesta que vale la pena reintentar (429 o 5xx).
+    """
+
+
+class LimitadorTasa:
+    """
+    Limitador de tasa tipo token bucket. Por defecto permite 1 solicitud por segundo,
+    que es la política de uso de Nominatim.
+    """
+
+    def __init__(self, tasa=1.0, capacidad=1):
+        self.tasa = tasa
+        self.capacidad = capacidad
+        self._tokens = capacidad
+        self._ultimo = time.monotonic()
+        self._lock = threading.Lock()
+
+    def adquirir(self):
+        """
+        Bloquea hasta que haya un token disponible y lo consume.
+        """
+        while True:
+            with self._lock:
+                ahora = time.monotonic()
+                self._tokens = min(self.capacidad, self._tokens + (ahora - self._ultimo) * self.tasa)
+                self._ultimo = ahora
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                espera = (1 - self._tokens) / self.tasa
+            time.sleep(espera)
+
+    async def adquirir_async(self):
+        """
+        Igual que 'adquirir', pero cede el event loop mientras espera.
+        """
+        while True:
+            with self._lock:
+                ahora = time.monotonic()
+                self._tokens = min(self.capacidad, self._tokens + (ahora - self._ultimo) * self.tasa)
+                self._ultimo = ahora
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                espera = (1 - self._tokens) / self.tasa
+            await asyncio.sleep(espera)
+
+
+# Limitador compartido por todo el proceso para las consultas a Nominatim
+limitador_nominatim = LimitadorTasa()
+
+
+def formatear_direccion(ciudad, localidad, barrio):
+    return f"{barrio}, {localidad}, {ciudad}, Colombia"
+
+
+def consultar_nominatim(direccion):
+    """
+    Realiza la consulta HTTP a Nominatim para una dirección completa.
+    Devuelve (latitud, longitud) o ('N/A', 'N/A') si Nominatim responde sin resultados.
+    Si la consulta falla lanza la excepción (ErrorTransitorio para 429 y 5xx): un error no
+    es un "sin resultado" y no se debe guardar en el caché como negativo.
+    """
+    params = {
+        'q': direccion,
+        'format': 'json',
+        'limit': 1
+    }
+    response = _sesion.get(NOMINATIM_URL, params=params, timeout=NOMINATIM_TIMEOUT)
+    if response.status_code == 429 or response.status_code >= 500:
+        raise ErrorTransitorio(f"HTTP {response.status_code}")
+    response.raise_for_status()
+    data = response.json()
+    if len(data) > 0:
+        latitud = data[0]['lat']
+        longitud = data[0]['lon']
+        return latitud, longitud
+    print(f"No se encontraron coordenadas para la dirección: {direccion}")
+    return 'N/A', 'N/A'
+
+
+def resolver_direccion(direccion, cache=None, limitador=limitador_nominatim, reintentos=3):
+    """
+    Resuelve una dirección consultando primero el caché; solo las consultas
+    reales a Nominatim pasan por el limitador de tasa. Los errores de red, timeouts,
+    429 y 5xx se reintentan hasta 'reintentos' veces con backoff; si la consulta no se
+    logra se devuelve ('N/A', 'N/A') sin guardarlo en el caché.
+    """
+    if cache is not None:
+        cacheado = cache.get(direccion)
+        metricas_scraper.contar('geocache', resultado='acierto' if cacheado is not None else 'fallo')
+        if cacheado is not None:
+            return cacheado
+
+    for intento in range(reintentos + 1):
+        with metricas_scraper.medir('espera_nominatim'):
+            limitador.adquirir()
+        try:
+            with metricas_scraper.medir('consulta_nominatim'):
+                latitud, longitud = consultar_nominatim(direccion)
+            break
+        except (requests.ConnectionError, requests.Timeout, ErrorTransitorio) as e:
+            if intento < reintentos:
+                time.sleep(espera_con_jitter(intento))
+                continue
+            error = e
+        except (requests.RequestException, ValueError, LookupError) as e:
+            error = e
+        print(f"Error al obtener coordenadas para {direccion}: {error}")
+        metricas_scraper.contar('consultas_nominatim', resultado='error')
+        return 'N/A', 'N/A'
+    metricas_scraper.contar('consultas_nominatim', resultado='ok' if latitud != 'N/A' else 'sin_resultado')
+    if cache is not None:
+        cache.set(direccion, latitud, longitud)
+    return latitud, longitud
+
+
+def espera_con_jitter(intento, base=0.5):
+    """
+    Espera del backoff exponencial con azar, para que los reintentos no lleguen todos juntos.
+    """
+    return base * 2 ** intento * random.uniform(0.5, 1.5)
+
+
+class ProveedorGazetteer:
+    """
+    Resuelve con la tabla local de centroides (ver gazetteer.py), sin red.
+    'nivel' es 'barrio' o 'localidad' (más gruesa, útil como último recurso).
+    """
+
+    remoto = False
+
+    def __init__(self, nivel='barrio', gazetteer=None):
+        self.nivel = nivel
+        self.nombre = f'gazetteer_{nivel}'
+        self.gazetteer = gazetteer or obtener_gazetteer()
+
+    def buscar(self, barrio, localidad, ciudad):
+        return self.gazetteer.buscar(barrio, localidad, ciudad, nivel=self.nivel)
+
+    async def resolver(self, sesion, barrio, localidad, ciudad):
+        return self.buscar(barrio, localidad, ciudad)
+
+
+class ProveedorNominatim:
+    """
+    Consulta Nominatim respetando el limitador de tasa y el caché persistente. Con aiohttp las
+    consultas son asíncronas sobre una sesión compartida, con timeout y hasta 'reintentos'
+    reintentos con backoff y jitter ante errores de red, 429 y 5xx. Un 4xx o una respuesta que no
+    es el JSON esperado (una página de error o un captcha) no se reintenta; ni estos ni los
+    errores transitorios se guardan en el caché como negativos. Sin aiohttp se usa 'resolver_direccion'
+    en un hilo.
+    """
+
+    nombre = 'nominatim'
+    remoto = True
+
+    def __init__(self, cache=None, limitador=limitador_nominatim, url=None, reintentos=3, timeout=NOMINATIM_TIMEOUT):
+        self.cache = cache
+        self.limitador = limitador
+        self.url = url
+        self.reintentos = reintentos
+        self.timeout = timeout
+
+    async def resolver(self, sesion, barrio, localidad, ciudad):
+        if barrio == 'N/A':
+            return None
+        direccion = formatear_direccion(ciudad, localidad, barrio)
+        if sesion is None:
+            coordenadas = await asyncio.to_thread(resolver_direccion, direccion, self.cache, self.limitador)
+            return None if 'N/A' in coordenadas else coordenadas
+
+        if self.cache is not None:
+            cacheado = self.cache.get(direccion)
+            metricas_scraper.contar('geocache', resultado='acierto' if cacheado is not None else 'fallo')
+            if cacheado is not None:
+                return None if 'N/A' in cacheado else cacheado
+
+        for intento in range(self.reintentos + 1):
+            try:
+                coordenadas = await self._consultar(sesion, direccion)
+                break
+            except (aiohttp.ClientResponseError, ValueError, LookupError) as e:
+                # 4xx o una respuesta que no es el JSON esperado: reintentar no la cambia
+                error = e
+            except (aiohttp.ClientError, asyncio.TimeoutError, ErrorTransitorio) as e:
+                if intento < self.reintentos:
+                    await asyncio.sleep(espera_con_jitter(intento))
+                    continue
+                error = e
+            print(f"Error al obtener coordenadas para {direccion}: {error}")
+            metricas_scraper.contar('consultas_nominatim', resultado='error')
+            return None
+        metricas_scraper.contar('consultas_nominatim', resultado='ok' if coordenadas else 'sin_resultado')
+        if self.cache is not None:
+            self.cache.set(direccion, *(coordenadas or ('N/A', 'N/A')))
+        return coordenadas
+
+    async def _consultar(self, sesion, direccion):
+        with metricas_scraper.medir('espera_nominatim'):
+            await self.limitador.adquirir_async()
+        with metricas_scraper.medir('consulta_nominatim'):
+            async with sesion.get(
+                self.url or NOMINATIM_URL,
+                params={'q': direccion, 'format': 'json', 'limit': 1},
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            ) as response:
+                if response.status == 429 or response.status >= 500:
+                    raise ErrorTransitorio(f"HTTP {response.status}")
+                response.raise_for_status()
+                data = await response.json(content_type=None)
+        return (data[0]['lat'], data[0]['lon']) if data else None
+
+
+def proveedores_por_defecto(cache=None, limitador=limitador_nominatim):
+    """
+    Cadena de proveedores en orden: centroide local del barrio, Nominatim (caché + red)
+    y, si todo falla, el centroide de la localidad.
+    """
+    return [ProveedorGazetteer('barrio'), ProveedorNominatim(cache, limitador), ProveedorGazetteer('localidad')]
+
+
+def _importar_aiohttp():
+    global aiohttp, _aiohttp_importado
+    if not _aiohttp_importado:
+        try:
+            import aiohttp as modulo
+        except ImportError:  # Sin aiohttp las consultas a Nominatim se hacen con requests en hilos
+            modulo = None
+        aiohttp, _aiohttp_importado = modulo, True
+    return aiohttp
+
+
+async def _resolver_tripletas_async(tripletas, proveedores, concurrencia):
+    async def resolver(sesion, semaforo, tripleta):
+        async with semaforo:
+            for proveedor in proveedores:
+                coordenadas = await proveedor.resolver(sesion, *tripleta)
+                if coordenadas is not None:
+                    metricas_scraper.contar('geocodificacion_proveedor', proveedor=proveedor.nombre)
+                    return tripleta, coordenadas, proveedor.nombre
+            metricas_scraper.contar('geocodificacion_proveedor', proveedor='ninguno')
+            return tripleta, ('N/A', 'N/A'), None
+
+    semaforo = asyncio.Semaphore(concurrencia)
+    if _importar_aiohttp() is None:
+        return await asyncio.gather(*(resolver(None, semaforo, tripleta) for tripleta in tripletas))
+    conector = aiohttp.TCPConnector(limit=concurrencia)
+    async with aiohttp.ClientSession(connector=conector, headers=NOMINATIM_HEADERS) as sesion:
+        return await asyncio.gather(*(resolver(sesion, semaforo, tripleta) for tripleta in tripletas))
+
+
+def _ejecutar(corrutina):
+    """
+    Ejecuta 'corrutina' hasta terminar. asyncio.run no se puede llamar con un event loop
+    corriendo en el hilo (Jupyter, una aplicación asíncrona): en ese caso corre en otro hilo.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(corrutina)
+    resultado = []
+    hilo = threading.Thread(target=lambda: resultado.append(asyncio.run(corrutina)))
+    hilo.start()
+    hilo.join()
+    return resultado[0]
+
+
+def resolver_tripletas(tripletas, proveedores=None, concurrencia=8):
+    """
+    Resuelve las tripletas (barrio, localidad, ciudad) con la cadena de 'proveedores' (por defecto
+    'proveedores_por_defecto()'), hasta 'concurrencia' a la vez. Devuelve una lista de
+    (tripleta, (latitud, longitud), nombre del proveedor o None si ninguno la resolvió).
+    Es síncrona aunque se llame desde código asíncrono: bloquea el hilo mientras resuelve.
+    """
+    proveedores = proveedores or proveedores_por_defecto()
+    # Los proveedores locales del inicio de la cadena se consultan sin abrir un event loop ni una sesión HTTP
+    locales = []
+    for proveedor in proveedores:
+        if proveedor.remoto:
+            break
+        locales.append(proveedor)
+
+    resultados, pendientes = [], []
+    for tripleta in tripletas:
+        for proveedor in locales:
+            coordenadas = proveedor.buscar(*tripleta)
+            if coordenadas is not None:
+                metricas_scraper.contar('geocodificacion_proveedor', proveedor=proveedor.nombre)
+                resultados.append((tripleta, coordenadas, proveedor.nombre))
+                break
+        else:
+            pendientes.append(tripleta)
+
+    if pendientes:
+        resultados.extend(_ejecutar(_resolver_tripletas_async(pendientes, proveedores[len(locales):], concurrencia)))
+    return resultados
+
+
+def geocodificar_propiedades(propiedades, cache=None, limitador=limitador_nominatim, resueltas=None, proveedores=None):
+    """
+    Etapa de geocodificación: reúne las tripletas (barrio, localidad, ciudad) únicas
+    de todas las propiedades, las resuelve una sola vez y asigna 'Latitud' y 'Longitud'
+    a cada registro. Devuelve la lista de direcciones que no se pudieron resolver.
+    'resueltas' es un diccionario opcional {direccion: (latitud, longitud)} que se consulta
+    y se completa entre llamadas, por ejemplo el de un checkpoint. Las direcciones pendientes se
+    resuelven con 'resolver_tripletas' y la cadena de 'proveedores' (por defecto, gazetteer local,
+    Nominatim y centroide de la localidad).
+    """
+    tripletas = {}
+    for prop in propiedades:
+        llave = (prop['Barrio'], prop['Localidad'], prop['Ciudad'])
+        if llave[1] != 'N/A' and llave[2] != 'N/A':  # Sin barrio aún se puede ubicar la localidad
+            tripletas.setdefault(llave, None)
+
+    print(f"Geocodificando {len(tripletas)} direcciones únicas para {len(propiedades)} propiedades")
+    pendientes = []
+    for barrio, localidad, ciudad in tripletas:
+        direccion = formatear_direccion(ciudad, localidad, barrio)
+        if resueltas is not None and direccion in resueltas:
+            tripletas[(barrio, localidad, ciudad)] = resueltas[direccion]
+        else:
+            pendientes.append((barrio, localidad, ciudad))
+
+    por_proveedor = {}
+    for tripleta, coordenadas, proveedor in resolver_tripletas(pendientes, proveedores or proveedores_por_defecto(cache, limitador)):
+        tripletas[tripleta] = coordenadas
+        por_proveedor[proveedor or 'sin resolver'] = por_proveedor.get(proveedor or 'sin resolver', 0) + 1
+        if resueltas is not None:
+            resueltas[formatear_direccion(tripleta[2], tripleta[1], tripleta[0])] = coordenadas
+    if por_proveedor:
+        print(f"Resueltas por proveedor: {por_proveedor}")
+
+    fallidas = [
+        formatear_direccion(ciudad, localidad, barrio)
+        for (barrio, localidad, ciudad), (latitud, longitud) in tripletas.items()
+        if latitud == 'N/A' or longitud == 'N/A'
+    ]
+
+    for prop in propiedades:
+        latitud, longitud = tripletas.get((prop['Barrio'], prop['Localidad'], prop['Ciudad'])) or ('N/A', 'N/A')
+        prop['Latitud'] = latitud
+        prop['Longitud'] = longitud
+
+    return fallidas
@@ -0,0 +1,238 @@
+import html
+import json
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from metricas import metricas_scraper
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+                  'Chrome/120.0 Safari/537.36',
+    'Accept-Language': 'es-CO,es;q=0.9'
+}
+
+# Scripts con el estado que la aplicación deja embebido en el HTML (Angular TransferState, Next.js)
+ESTADO_EMBEBIDO = re.compile(
+    r'<script[^>]+id="(?:serverApp-state|ng-state|__NEXT_DATA__)"[^>]*>(.*?)</script>',
+    re.DOTALL
+)
+
+# Escapes que usa Angular TransferState en versiones anteriores a la 14
+ESCAPES_ANGULAR = {'&a;': '&', '&q;': '"', '&s;': "'", '&l;': '<', '&g;': '>'}
+
+# Nombres de campo con los que se reconocen los listados en el JSON embebido
+CAMPOS_PRECIO = ('leaseFee', 'price', 'precio', 'canon', 'valorArriendo', 'salePrice')
+CAMPOS_AREA = ('builtArea', 'area', 'areaConstruida', 'privateArea')
+CAMPOS_BANIOS = ('bathrooms', 'banos', 'baños', 'numberBathrooms')
+CAMPOS_IMAGEN = ('image', 'mainImage', 'imagen', 'photo', 'urlImage')
+CAMPOS_NOMBRE = ('title', 'titulo', 'name', 'nombre')
+CAMPOS_BARRIO = ('neighborhood', 'barrio', 'neighbourhood')
+CAMPOS_LOCALIDAD = ('locality', 'localidad', 'zone', 'zona')
+CAMPOS_CIUDAD = ('city', 'ciudad')
+
+
+def crear_sesion(pool_size=10):
+    """
+    Crea una sesión HTTP con conexiones persistentes y reintentos ante errores transitorios.
+    """
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    retry = Retry(total=3, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504))
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def _primer_valor(datos, campos):
+    for campo in campos:
+        valor = datos.get(campo)
+        if valor not in (None, '', [], {}):
+            return valor
+    return None
+
+
+def _texto(valor):
+    if isinstance(valor, dict):
+        valor = _primer_valor(valor, ('name', 'nombre', 'url', 'value'))
+    if isinstance(valor, list):
+        valor = _texto(valor[0]) if valor else None
+    return str(valor).strip() if valor not in (None, '') else 'N/A'
+
+
+def _formatear_precio(valor):
+    if isinstance(valor, (int, float)):
+        return '$' + f"{int(valor):,}".replace(',', '.')
+    return _texto(valor)
+
+
+def _formatear_area(valor):
+    if isinstance(valor, (int, float)):
+        return f"{valor:g} m²"
+    return _texto(valor)
+
+
+def _parece_listado(datos):
+    return isinstance(datos, dict) and _primer_valor(datos, CAMPOS_PRECIO) is not None \
+        and (_primer_valor(datos, CAMPOS_BARRIO) is not None or _primer_valor(datos, CAMPOS_AREA) is not None)
+
+
+def buscar_listados(datos):
+    """
+    Recorre el JSON embebido y devuelve la lista más larga de objetos que parecen listados.
+    """
+    mejor = []
+    pendientes = [datos]
+    while pendientes:
+        actual = pendientes.pop()
+        if isinstance(actual, dict):
+            pendientes.extend(actual.values())
+        elif isinstance(actual, list):
+            candidatos = [item for item in actual if _parece_listado(item)]
+            if len(candidatos) > len(mejor):
+                mejor = candidatos
+            pendientes.extend(item for item in actual if isinstance(item, (dict, list)))
+    return mejor
+
+
+def extraer_estado_embebido(page_source):
+    """
+    Devuelve el JSON de estado embebido en la página, o None si no existe o no es válido.
+    """
+    for bloque in ESTADO_EMBEBIDO.findall(page_source):
+        texto = bloque.strip()
+        for escape, caracter in ESCAPES_ANGULAR.items():
+            texto = texto.replace(escape, caracter)
+        try:
+            return json.loads(html.unescape(texto) if texto.startswith('&') else texto)
+        except ValueError:
+            continue
+    return None
+
+
+def listado_a_propiedad(listado, tipo_de_propiedad, categoria):
+    """
+    Convierte un listado del JSON embebido al mismo diccionario que produce el scraping con Selenium.
+    """
+    nombre = _texto(_primer_valor(listado, CAMPOS_NOMBRE))
+    banios = _primer_valor(listado, CAMPOS_BANIOS)
+    return {
+        'Nombre': nombre,
+        'Precio': _formatear_precio(_primer_valor(listado, CAMPOS_PRECIO)),
+        'Tamaño': _formatear_area(_primer_valor(listado, CAMPOS_AREA)),
+        'Imagen': _texto(_primer_valor(listado, CAMPOS_IMAGEN)),
+        'Ciudad': _texto(_primer_valor(listado, CAMPOS_CIUDAD)),
+        'Localidad': _texto(_primer_valor(listado, CAMPOS_LOCALIDAD)),
+        'Barrio': _texto(_primer_valor(listado, CAMPOS_BARRIO)),
+        'Baños': str(banios) if banios is not None else 'N/A',
+        'Tipo': tipo_de_propiedad(nombre, categoria),
+        'Categoria': categoria,
+        'Latitud': 'N/A',  # Se completa en la etapa de geocodificación
+        'Longitud': 'N/A'
+    }
+
+
+def descargar_http(session, url, clave):
+    """
+    Descarga una página con la sesión (que ya reintenta los 429 y 5xx). 'clave' es la tupla
+    (categoria, page). Devuelve el HTML, o None si la solicitud falla.
+    """
+    categoria, page = clave
+    try:
+        with metricas_scraper.medir('carga_pagina', fetcher='http', categoria=categoria):
+            response = session.get(url, timeout=20)
+        response.raise_for_status()
+    except Exception as e:
+        print(f"Error HTTP en la página {page} de '{categoria}': {e}")
+        metricas_scraper.contar('paginas', fetcher='http', resultado='fallida')
+        return None
+    metricas_scraper.contar('bytes_transferidos', len(response.content), fetcher='http')
+    return response.text
+
+
+def extraer_http(page_source, clave, parse_page, tipo_de_propiedad):
+    """
+    Lee los listados de una página descargada: primero las tarjetas renderizadas en el
+    servidor con 'parse_page' y, si no hay, el estado JSON embebido. Devuelve la lista de
+    propiedades (vacía si la página no los trae). Los errores de 'parse_page' se propagan.
+    """
+    categoria, _ = clave
+    properties = parse_page(page_source, categoria)
+    if properties:
+        return properties
+
+    estado = extraer_estado_embebido(page_source)
+    if estado is not None:
+        return [listado_a_propiedad(listado, tipo_de_propiedad, categoria) for listado in buscar_listados(estado)]
+    return []
+
+
+def scrape_page_http(session, url, clave, parse_page, tipo_de_propiedad):
+    """
+    Obtiene una página de resultados sin navegador con 'descargar_http' y 'extraer_http'.
+    'clave' es la tupla (categoria, page). Devuelve la lista de propiedades, o None si la
+    página necesita Selenium: la descarga falló, no trae los listados en el HTML o no se
+    pudieron leer (una tarjeta o un estado embebido con otra estructura).
+    """
+    categoria, page = clave
+    page_source = descargar_http(session, url, clave)
+    if page_source is None:
+        return None
+
+    try:
+        properties = extraer_http(page_source, clave, parse_page, tipo_de_propiedad)
+    except Exception as e:
+        print(f"Error al leer la página {page} de '{categoria}': {type(e).__name__}: {e}; se usará Selenium")
+        metricas_scraper.contar('paginas', fetcher='http', resultado='error_extraccion')
+        return None
+    if properties:
+        metricas_scraper.contar('paginas', fetcher='http', resultado='ok')
+        return properties
+
+    print(f"La página {page} de '{categoria}' no trae los listados en el HTML; se usará Selenium")
+    metricas_scraper.contar('paginas', fetcher='http', resultado='requiere_selenium')
+    return None
+
+
+def scrape_pages_http(paginas, parse_page, tipo_de_propiedad, workers=4, al_completar=None, omitir=None,
+                      por_categoria=False):
+    """
+    Descarga las páginas (clave, url) con una sesión HTTP compartida, en el orden de 'paginas'.
+    Como en driver_pool.scrape_pages_concurrently, 'omitir(clave)' se consulta justo antes de
+    pedir cada página (si devuelve True no se pide y se reporta con propiedades None) y
+    'al_completar(clave, propiedades)' se llama apenas se resuelve cada página.
+    Con 'por_categoria' las páginas de cada categoría (clave[0]) se piden una tras otra, así
+    'omitir' ya conoce el resultado de la página anterior; las categorías van en paralelo.
+    Devuelve un diccionario {clave: propiedades} solo con las páginas resueltas sin navegador;
+    las que lo necesitan no se reportan.
+    """
+    grupos = {}
+    for clave, url in paginas:
+        grupos.setdefault(clave[0] if por_categoria else clave, []).append((clave, url))
+    session = crear_sesion(pool_size=workers)
+    resultados = {}
+    lock = threading.Lock()
+
+    def recorrer(grupo):
+        for clave, url in grupo:
+            if omitir is not None and omitir(clave):
+                if al_completar is not None:
+                    al_completar(clave, None)
+                continue
+            propiedades = scrape_page_http(session, url, clave, parse_page, tipo_de_propiedad)
+            if propiedades:
+                with lock:
+                    resultados[clave] = propiedades
+                if al_completar is not None:
+                    al_completar(clave, propiedades)
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for futuro in [executor.submit(recorrer, grupo) for grupo in grupos.values()]:
+                futuro.result()
+    finally:
+        session.close()
+    return resultados
@@ -0,0 +1,141 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from listados import id_listado
+
+# Campos de la tarjeta que definen si un listado cambió entre corridas
+CAMPOS_HUELLA = ('Nombre', 'Precio', 'Tamaño', 'Baños', 'Imagen', 'Ciudad', 'Localidad', 'Barrio', 'Tipo')
+
+
+def huella(prop):
+    """
+    Hash de los campos visibles de la tarjeta. Si cualquiera cambia, el listado se vuelve a procesar.
+    """
+    base = '|'.join((prop.get(campo) or '').strip() for campo in CAMPOS_HUELLA)
+    return hashlib.sha1(base.encode('utf-8')).hexdigest()
+
+
+class RegistroListados:
+    """
+    Registro persistente en SQLite de los listados vistos en corridas anteriores, con la
+    huella de cada uno, y de los eventos de cambio (nuevo, cambio de precio, modificado,
+    eliminado). Permite que una corrida incremental solo geocodifique y escriba lo que cambió.
+    """
+
+    def __init__(self, ruta='listados.sqlite'):
+        self.ruta = ruta
+        self.inicio_corrida = time.time()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(ruta, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS listados (
+                id_listado TEXT PRIMARY KEY,
+                categoria TEXT,
+                huella TEXT NOT NULL,
+                precio TEXT,
+                activo INTEGER NOT NULL DEFAULT 1,
+                primera_vez REAL NOT NULL,
+                visto_en REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS listados_categoria_idx ON listados (categoria, activo, visto_en);
+            CREATE TABLE IF NOT EXISTS eventos (
+                id_listado TEXT NOT NULL,
+                tipo TEXT NOT NULL,
+                precio_anterior TEXT,
+                precio_nuevo TEXT,
+                fecha REAL NOT NULL
+            );
+        """)
+        self._conn.commit()
+
+    def clasificar(self, propiedades):
+        """
+        Compara las propiedades de una página con el registro sin modificarlo.
+        Devuelve (propiedades nuevas o cambiadas, eventos). Los eventos son tuplas
+        (id_listado, tipo, precio_anterior, precio_nuevo).
+        """
+        claves = [id_listado(prop) for prop in propiedades]
+        with self._lock:
+            conocidos = {}
+            for inicio in range(0, len(claves), 500):
+                parte = claves[inicio:inicio + 500]
+                conocidos.update((fila[0], fila[1:]) for fila in self._conn.execute(
+                    f"SELECT id_listado, huella, precio, activo FROM listados "
+                    f"WHERE id_listado IN ({', '.join('?' * len(parte))})", parte
+                ))
+
+        cambiadas, eventos = [], []
+        for clave, prop in zip(claves, propiedades):
+            anterior = conocidos.get(clave)
+            precio = prop.get('Precio')
+            if anterior is None or not anterior[2]:
+                eventos.append((clave, 'nuevo', None, precio))
+            elif anterior[0] == huella(prop):
+                continue
+            elif anterior[1] != precio:
+                eventos.append((clave, 'cambio_precio', anterior[1], precio))
+            else:
+                eventos.append((clave, 'modificado', None, None))
+            cambiadas.append(prop)
+        return cambiadas, eventos
+
+    def registrar(self, propiedades, eventos=()):
+        """
+        Marca como vistas en esta corrida las propiedades de una página (cambiadas o no) y
+        guarda sus eventos. Se llama después de escribir la página para no perder cambios
+        si la corrida se interrumpe.
+        """
+        ahora = time.time()
+        filas = [
+            (id_listado(prop), prop.get('Categoria'), huella(prop), prop.get('Precio'), ahora, ahora)
+            for prop in propiedades
+        ]
+        with self._lock:
+            self._conn.executemany("""
+                INSERT INTO listados (id_listado, categoria, huella, precio, primera_vez, visto_en)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (id_listado) DO UPDATE SET
+                    categoria = excluded.categoria, huella = excluded.huella,
+                    precio = excluded.precio, activo = 1, visto_en = excluded.visto_en
+            """, filas)
+            self._conn.executemany(
+                "INSERT INTO eventos VALUES (?, ?, ?, ?, ?)",
+                [evento + (ahora,) for evento in eventos]
+            )
+            self._conn.commit()
+
+    def cerrar_categoria(self, categoria):
+        """
+        Marca como eliminados los listados activos de 'categoria' que no se vieron en esta
+        corrida. Solo se debe llamar cuando la categoría se recorrió completa; si la corrida
+        se detuvo antes, los listados de las páginas no visitadas no se pueden dar por eliminados.
+        Devuelve el número de listados eliminados.
+        """
+        with self._lock:
+            eliminados = [fila[0] for fila in self._conn.execute(
+                "SELECT id_listado FROM listados WHERE categoria = ? AND activo = 1 AND visto_en < ?",
+                (categoria, self.inicio_corrida)
+            )]
+            ahora = time.time()
+            self._conn.executemany(
+                "UPDATE listados SET activo = 0 WHERE id_listado = ?", [(clave,) for clave in eliminados]
+            )
+            self._conn.executemany(
+                "INSERT INTO eventos VALUES (?, 'eliminado', NULL, NULL, ?)", [(clave, ahora) for clave in eliminados]
+            )
+            self._conn.commit()
+        return len(eliminados)
+
+    def resumen_corrida(self):
+        """
+        Devuelve el número de eventos de cada tipo registrados desde el inicio de esta corrida.
+        """
+        with self._lock:
+            return dict(self._conn.execute(
+                "SELECT tipo, count(*) FROM eventos WHERE fecha >= ? GROUP BY tipo", (self.inicio_corrida,)
+            ).fetchall())
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,162 @@
+import argparse
+import glob
+import json
+import os
+import threading
+import time
+import pandas as pd
+from almacen import compactar
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+# Directorio de las instantáneas: locales_<version>.arrow (para mapear en memoria),
+# locales_<version>.parquet (comprimido, para descargar) y actual.json con la última versión.
+# Por defecto junto al módulo, para que el exportador y el tablero lo encuentren sin importar
+# desde qué directorio se lancen.
+DIRECTORIO = os.environ.get(
+    'INSTANTANEAS_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instantaneas')
+)
+CONSERVAR = 3  # Versiones que se guardan; las anteriores se borran al exportar una nueva
+FILAS_POR_LOTE = 50000
+
+_tablas = {}
+_lock = threading.Lock()
+
+
+def _ruta(directorio, version, extension):
+    return os.path.join(directorio, f"locales_{version}.{extension}")
+
+
+def _escribir_atomico(ruta, escribir):
+    """
+    Llama escribir(ruta_temporal) y luego reemplaza 'ruta', para que un lector nunca vea
+    un archivo a medio escribir.
+    """
+    temporal = ruta + '.tmp'
+    escribir(temporal)
+    os.replace(temporal, ruta)
+
+
+def exportar_instantanea(conn, directorio=DIRECTORIO, conservar=CONSERVAR):
+    """
+    Exporta locales_unicos (locales_comerciales sin duplicados) como una nueva versión en
+    Arrow IPC y Parquet, con las columnas compactadas (ver almacen.compactar), y la marca
+    como actual. Devuelve la versión.
+    """
+    if pa is None:
+        raise RuntimeError("Las instantáneas requieren pyarrow (pip install pyarrow)")
+    os.makedirs(directorio, exist_ok=True)
+    datos = compactar(pd.read_sql("SELECT * FROM locales_unicos ORDER BY id_local", conn))
+    tabla = pa.Table.from_pandas(datos, preserve_index=False)
+    ahora = time.time()
+    version = time.strftime('%Y%m%dT%H%M%S', time.localtime(ahora)) + f"_{int(ahora * 1000) % 1000:03d}"
+
+    def escribir_arrow(ruta):
+        with pa.OSFile(ruta, 'wb') as destino, pa.ipc.new_file(destino, tabla.schema) as escritor:
+            escritor.write_table(tabla, max_chunksize=FILAS_POR_LOTE)
+
+    _escribir_atomico(_ruta(directorio, version, 'arrow'), escribir_arrow)
+    _escribir_atomico(_ruta(directorio, version, 'parquet'), lambda ruta: pq.write_table(tabla, ruta))
+
+    def escribir_actual(ruta):
+        with open(ruta, 'w', encoding='utf-8') as f:
+            json.dump({'version': version, 'filas': tabla.num_rows, 'creado': time.strftime('%Y-%m-%dT%H:%M:%S')}, f)
+
+    _escribir_atomico(os.path.join(directorio, 'actual.json'), escribir_actual)
+
+    # Borrar versiones viejas (los procesos que aún las tengan mapeadas no se ven afectados)
+    versiones = sorted({os.path.basename(ruta).split('.')[0][len('locales_'):]
+                        for ruta in glob.glob(os.path.join(directorio, 'locales_*.*'))})
+    for vieja in versiones[:-conservar]:
+        for ruta in glob.glob(os.path.join(directorio, f"locales_{vieja}.*")):
+            os.remove(ruta)
+    return version
+
+
+def instantanea_actual(directorio=DIRECTORIO):
+    """
+    Devuelve {'version', 'filas', 'creado'} de la última instantánea, o None si no hay.
+    """
+    try:
+        with open(os.path.join(directorio, 'actual.json'), encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def abrir_instantanea(version, directorio=DIRECTORIO):
+    """
+    Tabla de Arrow de la versión, mapeada en memoria: no se copia al leerla y el sistema
+    operativo comparte sus páginas entre todos los procesos que la abren.
+    """
+    with _lock:
+        if version not in _tablas:
+            fuente = pa.memory_map(_ruta(directorio, version, 'arrow'))
+            _tablas[version] = pa.ipc.open_file(fuente).read_all()
+            for vieja in sorted(_tablas)[:-CONSERVAR]:
+                del _tablas[vieja]
+        return _tablas[version]
+
+
+def _sin_diccionarios(lote, esquema):
+    """
+    Lote con las columnas de diccionario (categóricas) convertidas a sus valores, para el CSV.
+    """
+    columnas = [
+        columna.dictionary_decode() if pa.types.is_dictionary(columna.type) else columna
+        for columna in lote.columns
+    ]
+    return pa.RecordBatch.from_arrays(columnas, schema=esquema)
+
+
+def ruta_csv(version, directorio=DIRECTORIO):
+    """
+    Ruta del CSV de la versión. Se genera la primera vez que se pide, lote por lote desde
+    la tabla mapeada (sin tener el CSV completo en memoria), y luego se reutiliza.
+    """
+    ruta = _ruta(directorio, version, 'csv')
+    with _lock:
+        if os.path.exists(ruta):
+            return ruta
+    tabla = abrir_instantanea(version, directorio)
+
+    esquema = pa.schema([
+        pa.field(campo.name, campo.type.value_type if pa.types.is_dictionary(campo.type) else campo.type)
+        for campo in tabla.schema
+    ])
+
+    def escribir_csv(temporal):
+        with pa_csv.CSVWriter(temporal, esquema) as escritor:
+            for lote in tabla.to_batches(max_chunksize=FILAS_POR_LOTE):
+                escritor.write_batch(_sin_diccionarios(lote, esquema))
+
+    with _lock:
+        if not os.path.exists(ruta):
+            _escribir_atomico(ruta, escribir_csv)
+    return ruta
+
+
+def ruta_parquet(version, directorio=DIRECTORIO):
+    return _ruta(directorio, version, 'parquet')
+
+
+if __name__ == "__main__":
+    from conexion_bd import conectar
+
+    parser = argparse.ArgumentParser(description="Exporta una instantánea de locales_comerciales en Arrow y Parquet")
+    parser.add_argument('--directorio', default=DIRECTORIO)
+    parser.add_argument('--conservar', type=int, default=CONSERVAR, help="Versiones a conservar")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    conexion = conectar()
+    try:
+        version = exportar_instantanea(conexion, args.directorio, args.conservar)
+    finally:
+        conexion.close()
+    print(f"Instantánea {version} exportada en '{args.directorio}' en {time.perf_counter() - inicio:.1f}s")
@@ -0,0 +1,17 @@
+import hashlib
+
+
+def id_listado(prop):
+    """
+    Llave estable de un listado scrapeado. La URL de la imagen incluye el identificador del
+    inmueble en el portal, así que se usa cuando existe; si no, se combinan los campos que
+    no cambian entre corridas (nombre, ubicación y tamaño). El precio no forma parte de la
+    llave para que un cambio de precio actualice el mismo listado.
+    """
+    imagen = (prop.get('Imagen') or 'N/A').strip()
+    if imagen != 'N/A':
+        base = imagen
+    else:
+        base = '|'.join((prop.get(campo) or '').strip().lower()
+                        for campo in ('Nombre', 'Barrio', 'Localidad', 'Ciudad', 'Tamaño'))
+    return hashlib.sha1(base.encode('utf-8')).hexdigest()
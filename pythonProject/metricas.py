@@ -0,0 +1,151 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _etiquetas_prometheus(etiquetas):
+    if not etiquetas:
+        return ''
+    return '{' + ','.join(f'{nombre}="{_escapar(valor)}"' for nombre, valor in etiquetas) + '}'
+
+
+class Metricas:
+    """
+    Temporizadores y contadores del pipeline de scraping, seguros entre hilos.
+
+    Cada medición se guarda por nombre y etiquetas (por ejemplo categoria='local'). Si se
+    configura 'log_json', cada etapa medida y cada evento se escribe además como una línea
+    JSON. Al final de la corrida se puede obtener un resumen o un texto en formato Prometheus.
+    """
+
+    def __init__(self, prefijo='scraper'):
+        self.prefijo = prefijo
+        self._lock = threading.Lock()
+        self._log = None
+        self.reiniciar()
+
+    def reiniciar(self):
+        with self._lock:
+            self._tiempos = {}
+            self._contadores = {}
+
+    def configurar(self, log_json=None):
+        """
+        'log_json' es una ruta o un archivo abierto donde escribir los eventos en JSON Lines; None lo desactiva.
+        """
+        if self._log is not None and self._log.get('propio'):
+            self._log['archivo'].close()
+        if log_json is None:
+            self._log = None
+        elif isinstance(log_json, str):
+            self._log = {'archivo': open(log_json, 'a', encoding='utf-8'), 'propio': True}
+        else:
+            self._log = {'archivo': log_json, 'propio': False}
+
+    def evento(self, nombre, **campos):
+        """
+        Escribe un evento estructurado en el log JSON (si está configurado).
+        """
+        if self._log is None:
+            return
+        linea = json.dumps({'ts': round(time.time(), 3), 'evento': nombre, **campos}, ensure_ascii=False, default=str)
+        with self._lock:
+            self._log['archivo'].write(linea + '\n')
+            self._log['archivo'].flush()
+
+    def contar(self, nombre, valor=1, **etiquetas):
+        llave = (nombre, tuple(sorted(etiquetas.items())))
+        with self._lock:
+            self._contadores[llave] = self._contadores.get(llave, 0) + valor
+
+    def registrar_tiempo(self, nombre, segundos, **etiquetas):
+        llave = (nombre, tuple(sorted(etiquetas.items())))
+        with self._lock:
+            total, n, maximo = self._tiempos.get(llave, (0.0, 0, 0.0))
+            self._tiempos[llave] = (total + segundos, n + 1, max(maximo, segundos))
+        self.evento('etapa', etapa=nombre, segundos=round(segundos, 4), **etiquetas)
+
+    @contextmanager
+    def medir(self, nombre, **etiquetas):
+        """
+        Mide el tiempo del bloque como una ejecución de la etapa 'nombre' (también si lanza una excepción).
+        """
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar_tiempo(nombre, time.perf_counter() - inicio, **etiquetas)
+
+    def resumen(self):
+        """
+        Devuelve {'etapas': {nombre: {segundos, llamadas, maximo}}, 'contadores': {nombre: valor}}
+        con las etiquetas sumadas.
+        """
+        etapas, contadores = {}, {}
+        with self._lock:
+            for (nombre, _), (total, n, maximo) in self._tiempos.items():
+                etapa = etapas.setdefault(nombre, {'segundos': 0.0, 'llamadas': 0, 'maximo': 0.0})
+                etapa['segundos'] += total
+                etapa['llamadas'] += n
+                etapa['maximo'] = max(etapa['maximo'], maximo)
+            for (nombre, _), valor in self._contadores.items():
+                contadores[nombre] = contadores.get(nombre, 0) + valor
+        return {'etapas': etapas, 'contadores': contadores}
+
+    def texto_prometheus(self):
+        """
+        Exporta las métricas en el formato de texto de Prometheus: las etapas como summary
+        (_sum, _count) más un gauge con el máximo, y los contadores como counter (_total).
+        """
+        lineas = []
+        with self._lock:
+            tiempos = sorted(self._tiempos.items())
+            contadores = sorted(self._contadores.items())
+
+        metrica = f"{self.prefijo}_etapa_segundos"
+        if tiempos:
+            lineas.append(f"# HELP {metrica} Tiempo por etapa del pipeline")
+            lineas.append(f"# TYPE {metrica} summary")
+            for (nombre, etiquetas), (total, n, _) in tiempos:
+                texto = _etiquetas_prometheus((('etapa', nombre),) + etiquetas)
+                lineas.append(f"{metrica}_sum{texto} {total:.6f}")
+                lineas.append(f"{metrica}_count{texto} {n}")
+            lineas.append(f"# HELP {metrica}_max Tiempo máximo de una ejecución de la etapa")
+            lineas.append(f"# TYPE {metrica}_max gauge")
+            for (nombre, etiquetas), (_, _, maximo) in tiempos:
+                lineas.append(f"{metrica}_max{_etiquetas_prometheus((('etapa', nombre),) + etiquetas)} {maximo:.6f}")
+
+        nombres = []
+        for (nombre, _), _ in contadores:
+            if nombre not in nombres:
+                nombres.append(nombre)
+        for nombre in nombres:
+            lineas.append(f"# TYPE {self.prefijo}_{nombre}_total counter")
+            for (otro, etiquetas), valor in contadores:
+                if otro == nombre:
+                    lineas.append(f"{self.prefijo}_{nombre}_total{_etiquetas_prometheus(etiquetas)} {valor}")
+        return '\n'.join(lineas) + '\n'
+
+    def guardar_prometheus(self, ruta):
+        with open(ruta, 'w', encoding='utf-8') as f:
+            f.write(self.texto_prometheus())
+
+    def imprimir_resumen(self):
+        """
+        Imprime el tiempo total y las llamadas de cada etapa, de mayor a menor tiempo.
+        """
+        resumen = self.resumen()
+        print("Tiempo por etapa (sumado entre hilos):")
+        for nombre, etapa in sorted(resumen['etapas'].items(), key=lambda item: -item[1]['segundos']):
+            print(f"  {nombre:<20} {etapa['segundos']:>9.2f}s  {etapa['llamadas']:>6} llamadas  máx {etapa['maximo']:.2f}s")
+        if resumen['contadores']:
+            print("Contadores: " + ', '.join(f"{nombre}={valor}" for nombre, valor in sorted(resumen['contadores'].items())))
+
+
+# Métricas compartidas por todo el proceso (los módulos del scraper registran aquí)
+metricas_scraper = Metricas()
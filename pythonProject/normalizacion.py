@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+
+# Valores que los scrapers usan para "sin dato"; no cuentan como rechazo
+VALORES_NULOS = ['', 'N/A', 'n/a', 'NA', 'None', 'nan', '-']
+
+# Columna del scraper -> (columna normalizada, mínimo válido, entero)
+CAMPOS = {
+    'Precio': ('valorarriendo', 1, True),
+    'Tamaño': ('areacuadrada', 0.01, False),
+    'Baños': ('banios', 0, True),
+}
+
+
+def _parsear_unicos(unicos):
+    """
+    Convierte textos como '$ 3.500.000', '$1,500,000', '45,5 m²', '45.5 m²' o 'Baños 2' a número.
+    Los portales usan '.' o ',' tanto de miles como decimal, así que el separador se decide
+    en cada valor: el último '.' o ',' es decimal si lo siguen 1 o 2 dígitos, y los demás
+    son de miles. Devuelve un arreglo float con NaN donde no hay número.
+    """
+    texto = pd.Series(unicos, dtype='object').astype(str)
+    numero = texto.str.extract(r'(\d(?:[\d.,]*\d)?)', expand=False)
+    partes = numero.str.extract(r'^(.*?)(?:[.,](\d{1,2}))?$')
+    entero = partes[0].str.replace(r'[.,]', '', regex=True)
+    numero = entero + '.' + partes[1].fillna('0')
+    return pd.to_numeric(numero, errors='coerce').to_numpy(dtype='float64', copy=True)
+
+
+def parsear_numero(serie, minimo=None):
+    """
+    Parsea una columna de texto completa a float64. Los textos se factorizan primero, así que el
+    trabajo de texto se hace una sola vez por valor distinto (los precios y tamaños se repiten mucho)
+    y el resultado se expande con indexación de NumPy.
+    Devuelve (valores, rechazos): los nulos explícitos quedan en NaN sin contar como rechazo.
+    """
+    codigos, unicos = pd.factorize(serie, use_na_sentinel=True)
+    parseados = _parsear_unicos(unicos)
+    nulos = pd.Series(unicos, dtype='object').astype(str).str.strip().isin(VALORES_NULOS).to_numpy()
+    if minimo is not None:
+        with np.errstate(invalid='ignore'):
+            parseados[parseados < minimo] = np.nan
+    rechazados_unicos = np.isnan(parseados) & ~nulos
+
+    valores = np.full(len(codigos), np.nan)
+    presentes = codigos >= 0
+    valores[presentes] = parseados[codigos[presentes]]
+    rechazos = int(rechazados_unicos[codigos[presentes]].sum())
+    return valores, rechazos
+
+
+def normalizar_propiedades(df):
+    """
+    Agrega a un DataFrame de propiedades scrapeadas las columnas numéricas 'valorarriendo',
+    'areacuadrada', 'banios' y 'precio_m2'. Los enteros usan el tipo Int64 para poder
+    representar nulos. Devuelve (df, rechazos por campo).
+    """
+    df = df.copy()
+    rechazos = {}
+    for origen, (destino, minimo, entero) in CAMPOS.items():
+        if origen not in df.columns:
+            df[destino] = pd.array([pd.NA] * len(df), dtype='Int64' if entero else 'Float64')
+            rechazos[origen] = 0
+            continue
+        valores, rechazos[origen] = parsear_numero(df[origen], minimo)
+        df[destino] = pd.array(np.round(valores) if entero else valores, dtype='Float64')
+        if entero:
+            df[destino] = df[destino].astype('Int64')
+
+    area = df['areacuadrada'].to_numpy(dtype='float64', na_value=np.nan)
+    precio = df['valorarriendo'].to_numpy(dtype='float64', na_value=np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        df['precio_m2'] = pd.array(np.where(area > 0, precio / area, np.nan), dtype='Float64')
+    return df, rechazos
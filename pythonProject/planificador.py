@@ -0,0 +1,290 @@
+import argparse
+import queue
+import threading
+import time
+from collections import namedtuple
+from urllib.parse import urlparse
+import ciencuadras
+from driver_pool import scrape_pages_concurrently
+from geocache import GeocodeCache
+from geocodificacion import LimitadorTasa, geocodificar_propiedades
+from http_fetcher import crear_sesion, descargar_http, extraer_http
+from metricas import metricas_scraper
+from salida import EscritorPropiedades
+
+# Un trabajo del planificador: un portal, una ciudad, una categoría y cuántas páginas recorrer
+Trabajo = namedtuple('Trabajo', ['portal', 'ciudad', 'categoria', 'paginas'])
+
+# Ciudad en las URLs de los portales -> nombre con el que se completa la columna 'Ciudad'
+CIUDADES = {
+    'bogota': 'Bogotá',
+    'medellin': 'Medellín',
+    'cali': 'Cali',
+    'barranquilla': 'Barranquilla'
+}
+
+
+def parse_page_metrocuadrado(page_source, categoria='local'):
+    """
+    Convierte los avisos de una página de metrocuadrado al mismo formato de ciencuadras.
+    """
+    from scraping_locales import extraer_locales  # Trae BeautifulSoup: solo si se recorre metrocuadrado
+
+    properties = []
+    for registro in extraer_locales(page_source):
+        ciudad, localidad, barrio = ciencuadras.parse_location(registro['Ubicacion'])
+        properties.append({
+            'Nombre': registro['Descripcion'],
+            'Precio': registro['Precio'],
+            'Tamaño': registro['Tamaño'],
+            'Imagen': 'N/A',
+            'Ciudad': ciudad,
+            'Localidad': localidad,
+            'Barrio': barrio,
+            'Baños': 'N/A',
+            'Tipo': ciencuadras.tipo_de_propiedad(registro['Descripcion'], categoria),
+            'Categoria': categoria,
+            'Latitud': 'N/A',
+            'Longitud': 'N/A'
+        })
+    return properties
+
+
+# Portales que sabe recorrer el planificador. 'categorias' traduce la categoría interna
+# (la de ciencuadras.CATEGORIAS) al segmento de la URL del portal; 'selenium' es la función
+# de respaldo para las páginas que no traen los listados en el HTML (None si no hay).
+PORTALES = {
+    'ciencuadras': {
+        'url': "https://www.ciencuadras.com/arriendo/{ciudad}/{categoria}?q={ciudad}&page={page}",
+        'categorias': {'local': 'local', 'oficina': 'oficina', 'consultorio': 'consultorio', 'bodega': 'bodega'},
+        'parse': ciencuadras.parse_page,
+        'selenium': ciencuadras.scrape_page
+    },
+    'metrocuadrado': {
+        'url': "https://www.metrocuadrado.com/{categoria}/arriendo/{ciudad}/?page={page}",
+        'categorias': {'local': 'locales', 'oficina': 'oficinas', 'consultorio': 'consultorios', 'bodega': 'bodegas'},
+        'parse': parse_page_metrocuadrado,
+        'selenium': None
+    }
+}
+
+# Cortesía por dominio: solicitudes por segundo y máximo de solicitudes en curso a la vez
+LIMITES_DOMINIO = {
+    'www.ciencuadras.com': {'tasa': 2.0, 'en_vuelo': 4},
+    'www.metrocuadrado.com': {'tasa': 1.0, 'en_vuelo': 2}
+}
+LIMITE_POR_DEFECTO = {'tasa': 1.0, 'en_vuelo': 2}
+REINTENTOS_PAGINA = 2  # Veces que se vuelve a pedir una página cuya descarga falló
+
+FIELDNAMES = ciencuadras.FIELDNAMES + ['Portal']
+
+
+def armar_trabajos(portales, ciudades, categorias, paginas):
+    """
+    Combina portales, ciudades y categorías en una lista de trabajos de 'paginas' páginas cada uno.
+    """
+    return [
+        Trabajo(portal, ciudad, categoria, paginas)
+        for portal in portales for ciudad in ciudades for categoria in categorias
+        if categoria in PORTALES[portal]['categorias']
+    ]
+
+
+def _tareas_por_dominio(trabajos, base_url=None):
+    """
+    Expande los trabajos en páginas (clave, url), agrupadas por dominio. La clave de cada
+    página es (portal, ciudad, categoria, page). Las páginas se intercalan entre trabajos
+    (la 1 de todos, luego la 2...) para que todas las ciudades avancen a la vez.
+    """
+    dominios = {}
+    for page in range(1, max((trabajo.paginas for trabajo in trabajos), default=0) + 1):
+        for trabajo in trabajos:
+            if page > trabajo.paginas:
+                continue
+            portal = PORTALES[trabajo.portal]
+            plantilla = base_url or portal['url']
+            url = plantilla.format(portal=trabajo.portal, ciudad=trabajo.ciudad,
+                                   categoria=portal['categorias'][trabajo.categoria], page=page)
+            clave = (trabajo.portal, trabajo.ciudad, trabajo.categoria, page)
+            dominios.setdefault(urlparse(url).netloc, []).append((clave, url))
+    return dominios
+
+
+def _completar(propiedades, clave):
+    portal, ciudad, _, _ = clave
+    for prop in propiedades:
+        prop['Portal'] = portal
+        if prop.get('Ciudad') in (None, '', 'N/A'):
+            prop['Ciudad'] = CIUDADES.get(ciudad, ciudad)
+    return propiedades
+
+
+def ejecutar_trabajos(trabajos, csv_file='propiedades_todas.csv', parquet_dir=None, limites=None,
+                      base_url=None, headless=True, workers_selenium=1):
+    """
+    Recorre todos los 'trabajos' a la vez y escribe sus propiedades en un solo CSV (más Parquet
+    con 'parquet_dir') con la columna 'Portal'. Cada dominio tiene su propio limitador de tasa
+    y un número fijo de hilos ('en_vuelo' en 'limites', por defecto LIMITES_DOMINIO), así que
+    los portales avanzan en paralelo sin exceder la cortesía de ninguno. Las páginas se
+    geocodifican con un solo caché compartido a medida que llegan. Cuando una página se lee
+    sin listados, se dejan de pedir las siguientes del mismo trabajo. Una descarga fallida
+    se vuelve a encolar hasta REINTENTOS_PAGINA veces y no termina el trabajo. Las páginas
+    que necesitan navegador (o que fallaron por HTTP) se recorren al final con Selenium en
+    los portales que lo soportan; en los demás quedan como fallidas.
+    'base_url' (con {portal}, {ciudad}, {categoria} y {page}) reemplaza las URLs de los portales.
+    Devuelve la lista de claves (portal, ciudad, categoria, page) de las páginas fallidas.
+    """
+    limites = {**LIMITES_DOMINIO, **(limites or {})}
+    dominios = _tareas_por_dominio(trabajos, base_url)
+    total = sum(len(tareas) for tareas in dominios.values())
+    print(f"{len(trabajos)} trabajos, {total} páginas en {len(dominios)} dominios")
+
+    terminadas = queue.Queue()
+    agotados = set()  # Trabajos (portal, ciudad, categoria) que ya no tienen más páginas
+    para_selenium = []
+    fallidas = []
+    intentos = {}
+    lock = threading.Lock()
+
+    def recorrer_dominio(dominio, tareas):
+        limite = limites.get(dominio, LIMITE_POR_DEFECTO)
+        limitador = LimitadorTasa(tasa=limite['tasa'], capacidad=limite['en_vuelo'])
+        sesion = crear_sesion(pool_size=limite['en_vuelo'])
+        cola = queue.Queue()
+        for tarea in tareas:
+            cola.put(tarea)
+
+        def trabajador():
+            while True:
+                try:
+                    clave, url = cola.get_nowait()
+                except queue.Empty:
+                    return
+                portal, _, categoria, page = clave
+                if clave[:3] in agotados:
+                    terminadas.put((clave, None))
+                    continue
+                limitador.adquirir()
+                metricas_scraper.contar('solicitudes_dominio', dominio=dominio)
+                # Como en driver_pool, un error en una página no detiene al trabajador
+                try:
+                    page_source = descargar_http(sesion, url, (categoria, page))
+                    if page_source is None:
+                        with lock:
+                            intentos[clave] = intentos.get(clave, 0) + 1
+                            reintentar = intentos[clave] <= REINTENTOS_PAGINA
+                        if reintentar:
+                            cola.put((clave, url))
+                            continue
+                        propiedades = None
+                    else:
+                        propiedades = extraer_http(page_source, (categoria, page), PORTALES[portal]['parse'],
+                                                   ciencuadras.tipo_de_propiedad)
+                except Exception as e:
+                    print(f"Error en la página {clave}: {type(e).__name__}: {e}")
+                    propiedades = None
+
+                if not propiedades and PORTALES[portal]['selenium'] is not None:
+                    with lock:
+                        para_selenium.append((clave, url))
+                elif propiedades is None:
+                    with lock:
+                        fallidas.append(clave)
+                else:
+                    # Solo una página que se leyó sin listados termina el trabajo
+                    if not propiedades:
+                        agotados.add(clave[:3])
+                    terminadas.put((clave, propiedades))
+
+        hilos = [threading.Thread(target=trabajador, daemon=True) for _ in range(limite['en_vuelo'])]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        sesion.close()
+
+    def productor():
+        try:
+            hilos = [threading.Thread(target=recorrer_dominio, args=(dominio, tareas), daemon=True)
+                     for dominio, tareas in dominios.items()]
+            for hilo in hilos:
+                hilo.start()
+            for hilo in hilos:
+                hilo.join()
+
+            if para_selenium:
+                print(f"{len(para_selenium)} páginas necesitan navegador")
+
+                def scrape_con_driver(driver, url, clave):
+                    propiedades = PORTALES[clave[0]]['selenium'](driver, url, (clave[2], clave[3]))
+                    if not propiedades:
+                        agotados.add(clave[:3])
+                    return propiedades
+
+                scrape_pages_concurrently(
+                    sorted(para_selenium), scrape_con_driver, lambda: ciencuadras.setup_driver(headless=headless),
+                    workers=workers_selenium,
+                    al_completar=lambda clave, propiedades: terminadas.put((clave, propiedades)),
+                    omitir=lambda clave: clave[:3] in agotados
+                )
+        finally:
+            terminadas.put(None)
+
+    metricas_scraper.reiniciar()
+    inicio = time.perf_counter()
+    escritor = EscritorPropiedades(csv_file, FIELDNAMES, parquet_dir=parquet_dir)
+    geocache = GeocodeCache()
+    hilo = threading.Thread(target=productor, daemon=True)
+    hilo.start()
+
+    por_trabajo = {}
+    try:
+        while True:
+            item = terminadas.get()
+            if item is None:
+                break
+            clave, propiedades = item
+            if not propiedades:
+                continue
+            _completar(propiedades, clave)
+            with metricas_scraper.medir('geocodificacion', categoria=clave[2]):
+                geocodificar_propiedades(propiedades, cache=geocache)
+            with metricas_scraper.medir('escritura', categoria=clave[2]):
+                escritor.escribir(propiedades, clave)
+            por_trabajo[clave[:3]] = por_trabajo.get(clave[:3], 0) + len(propiedades)
+        hilo.join()
+    finally:
+        escritor.close()
+        geocache.close()
+
+    segundos = time.perf_counter() - inicio
+    for (portal, ciudad, categoria), cantidad in sorted(por_trabajo.items()):
+        print(f"  {portal:<14} {ciudad:<13} {categoria:<12} {cantidad} propiedades")
+    print(f"{escritor.total} propiedades guardadas en '{csv_file}' en {segundos:.1f}s")
+    if fallidas:
+        print(f"{len(fallidas)} páginas fallidas: {sorted(fallidas)}")
+    metricas_scraper.imprimir_resumen()
+    return sorted(fallidas)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recorre varios portales, ciudades y categorías en una sola corrida")
+    parser.add_argument('--portales', nargs='+', choices=sorted(PORTALES), default=['ciencuadras'])
+    parser.add_argument('--ciudades', nargs='+', default=['bogota'],
+                        help=f"Ciudades como aparecen en las URLs, por ejemplo {' '.join(CIUDADES)}")
+    parser.add_argument('--categorias', nargs='+', choices=sorted(ciencuadras.CATEGORIAS), default=['local'])
+    parser.add_argument('--pages', type=int, default=5, help="Páginas máximas por trabajo")
+    parser.add_argument('--output', default='propiedades_todas.csv', help="Archivo CSV de salida")
+    parser.add_argument('--parquet-dir', help="Directorio donde escribir también la salida en Parquet")
+    parser.add_argument('--base-url', help="URL con {portal}, {ciudad}, {categoria} y {page} (ver servidor_local.py)")
+    parser.add_argument('--workers-selenium', type=int, default=1, help="Sesiones de Chrome para las páginas de respaldo")
+    parser.add_argument('--headless', action='store_true', help="Ejecutar Chrome sin interfaz gráfica")
+    args = parser.parse_args()
+
+    fallidas = ejecutar_trabajos(
+        armar_trabajos(args.portales, args.ciudades, args.categorias, args.pages),
+        csv_file=args.output, parquet_dir=args.parquet_dir, base_url=args.base_url,
+        headless=args.headless, workers_selenium=args.workers_selenium
+    )
+    if fallidas:
+        raise SystemExit(1)
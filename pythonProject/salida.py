@@ -0,0 +1,124 @@
+import csv
+import json
+import os
+
+
+def _fila_completa(fieldnames):
+    return lambda prop: tuple('' if prop.get(campo) is None else str(prop.get(campo)) for campo in fieldnames)
+
+
+class EscritorPropiedades:
+    """
+    Escribe las propiedades a disco a medida que se completa cada página, en lugar de
+    acumularlas en memoria hasta el final. Opcionalmente escribe también un conjunto de
+    archivos Parquet (un archivo por página) en 'parquet_dir'.
+
+    Una página se escribe antes de marcarla en el Checkpoint, así que si la corrida se
+    interrumpe entre las dos cosas, con --resume la página se vuelve a pedir. Para no duplicar
+    esas filas, al reanudar se omiten las que ya están en el CSV según 'llave(prop)' (por
+    defecto, todos los campos de la fila). Los archivos Parquet son uno por página y se
+    reemplazan completos.
+    """
+
+    def __init__(self, csv_file, fieldnames, parquet_dir=None, reanudar=False, tamano_muestra=5, llave=None):
+        self.csv_file = csv_file
+        self.fieldnames = fieldnames
+        self.parquet_dir = parquet_dir
+        self.total = 0
+        self.muestra = []
+        self._tamano_muestra = tamano_muestra
+        self._llave = llave or _fila_completa(fieldnames)
+        self._escritas = set()
+
+        if parquet_dir:
+            # La salida Parquet es opcional: pyarrow solo se importa si se pide
+            try:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+            except ImportError:
+                raise RuntimeError("La salida Parquet requiere instalar 'pyarrow'") from None
+            self._pa, self._pq = pa, pq
+            os.makedirs(parquet_dir, exist_ok=True)
+
+        # Al reanudar se agregan filas al CSV existente sin repetir el encabezado
+        agregar = reanudar and os.path.exists(csv_file) and os.path.getsize(csv_file) > 0
+        if agregar:
+            self._escritas = self._llaves_escritas()
+        self._csvfile = open(csv_file, 'a' if agregar else 'w', newline='', encoding='utf-8')
+        self._writer = csv.DictWriter(self._csvfile, fieldnames=fieldnames)
+        if not agregar:
+            self._writer.writeheader()
+            self._csvfile.flush()
+
+    def _llaves_escritas(self):
+        """
+        Llaves de las filas que ya tiene el CSV. Si la corrida anterior se interrumpió a
+        mitad de una fila, esa fila incompleta se descarta.
+        """
+        with open(self.csv_file, 'rb+') as f:
+            contenido = f.read()
+            if not contenido.endswith(b'\n'):
+                f.truncate(contenido.rfind(b'\n') + 1)
+        with open(self.csv_file, newline='', encoding='utf-8') as f:
+            return {self._llave(fila) for fila in csv.DictReader(f)}
+
+    def escribir(self, propiedades, clave):
+        """
+        Escribe las propiedades de una página (identificada por 'clave') y vacía el buffer a disco.
+        Al reanudar, las filas que ya estaban en el CSV no se repiten.
+        """
+        filas = propiedades
+        if self._escritas:
+            filas = [prop for prop in propiedades if self._llave(prop) not in self._escritas]
+        self._writer.writerows(filas)
+        self._csvfile.flush()
+        os.fsync(self._csvfile.fileno())
+
+        if self.parquet_dir and propiedades:
+            nombre = '-'.join(str(parte) for parte in clave)
+            tabla = self._pa.Table.from_pylist([{campo: prop.get(campo) for campo in self.fieldnames} for prop in propiedades])
+            self._pq.write_table(tabla, os.path.join(self.parquet_dir, f"part-{nombre}.parquet"))
+
+        self.total += len(filas)
+        faltantes = self._tamano_muestra - len(self.muestra)
+        if faltantes > 0:
+            self.muestra.extend(filas[:faltantes])
+
+    def close(self):
+        self._csvfile.close()
+
+
+class Checkpoint:
+    """
+    Registro en JSON de las páginas completadas y las direcciones ya geocodificadas,
+    para que una corrida con --resume continúe donde se detuvo la anterior.
+    """
+
+    def __init__(self, ruta, reanudar=False):
+        self.ruta = ruta
+        self.paginas_completadas = set()
+        self.direcciones = {}
+        if reanudar and os.path.exists(ruta):
+            with open(ruta, encoding='utf-8') as f:
+                datos = json.load(f)
+            self.paginas_completadas = {tuple(clave) for clave in datos.get('paginas_completadas', [])}
+            self.direcciones = {direccion: tuple(coordenadas) for direccion, coordenadas in datos.get('direcciones', {}).items()}
+
+    def completada(self, clave):
+        return tuple(clave) in self.paginas_completadas
+
+    def marcar_completada(self, clave):
+        self.paginas_completadas.add(tuple(clave))
+        self.guardar()
+
+    def guardar(self):
+        """
+        Escribe el checkpoint de forma atómica (archivo temporal + reemplazo).
+        """
+        temporal = self.ruta + '.tmp'
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump({
+                'paginas_completadas': sorted(self.paginas_completadas),
+                'direcciones': self.direcciones
+            }, f, ensure_ascii=False)
+        os.replace(temporal, self.ruta)
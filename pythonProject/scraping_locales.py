@@ -1,46 +1,49 @@
 # scraping_locales.py
 import requests
 from bs4 import BeautifulSoup
-import psycopg2
+from conexion_bd import conectar
+
+
+def extraer_locales(page_source):
+    """
+    Extrae los campos de texto de cada aviso 'local-item' de una página de metrocuadrado.
+    """
+    soup = BeautifulSoup(page_source, 'html.parser')
+    registros = []
+    for local in soup.find_all('div', class_='local-item'):
+        registros.append({
+            'Ubicacion': local.find('div', class_='ubicacion').text.strip(),
+            'Precio': local.find('div', class_='precio').text.strip(),
+            'Tamaño': local.find('div', class_='tamanio').text.strip(),
+            'Descripcion': local.find('div', class_='descripcion').text.strip(),
+        })
+    return registros
 
 
 # Función para hacer scraping de un portal
 def obtener_datos_locales():
+    from planificador import parse_page_metrocuadrado  # planificador importa este módulo
+
     url = "https://www.metrocuadrado.com/apartamentos/arriendo/bogota/"
     response = requests.get(url)
     print(response)
-    soup = BeautifulSoup(response.text, 'html.parser')
-    print(soup)
-    locales = []
-    for local in soup.find_all('div', class_='local-item'):
-        ubicacion = local.find('div', class_='ubicacion').text.strip()
-        precio = local.find('div', class_='precio').text.strip().replace("$", "").replace(",", "")
-        tamanio = local.find('div', class_='tamanio').text.strip().replace("m²", "")
-        descripcion = local.find('div', class_='descripcion').text.strip()
-
-        locales.append((ubicacion, int(precio), int(tamanio), descripcion))
-
-    return locales
+    # Mismo formato de propiedad que ciencuadras, para cargarlas con cargador_bd
+    return parse_page_metrocuadrado(response.text)
 
 
 # Guardar los datos en PostgreSQL
 def guardar_en_base_de_datos(locales):
-    conexion = psycopg2.connect(
-        host="localhost",
-        database="arrendamiento_comercial",
-        user="postgres",
-        password="123456"
-    )
-    cursor = conexion.cursor()
-
-    query = "INSERT INTO locales_comerciales (ubicacion, precio, tamanio, descripcion) VALUES (%s, %s, %s, %s)"
-    cursor.executemany(query, locales)
+    from cargador_bd import cargar_propiedades  # Trae pandas: solo al guardar
 
-    conexion.commit()
-    cursor.close()
-    conexion.close()
+    conexion = conectar()
+    try:
+        # COPY a una tabla temporal y upsert por id_listado; precio y tamaño se limpian al cargar
+        insertados, actualizados = cargar_propiedades(conexion, locales, fuente='metrocuadrado')
+        print(f"Locales insertados: {insertados}, actualizados: {actualizados}")
+    finally:
+        conexion.close()
 
 
 if __name__ == "__main__":
     locales = obtener_datos_locales()
-    guardar_en_base_de_datos(locales)
\ No newline at end of file
+    guardar_en_base_de_datos(locales)
@@ -0,0 +1,123 @@
+import argparse
+import glob
+import json
+import os
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from geocache import normalizar_direccion
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+class ServidorFixtures(ThreadingHTTPServer):
+    """
+    Servidor HTTP local que reemplaza a ciencuadras y a Nominatim en pruebas y benchmarks:
+
+    - /<categoria>?page=N devuelve las páginas guardadas en fixtures/ciencuadras/<categoria>_pN.html.
+      Si se piden más páginas de las guardadas, se repiten en ciclo. La categoría es el último
+      segmento de la ruta, así que /<portal>/<ciudad>/<categoria>?page=N también funciona.
+    - /search?q=... responde como Nominatim con fixtures/nominatim/respuestas.json
+      (lista vacía si la dirección no está).
+
+    'retardo' agrega una latencia fija por solicitud para simular la red. Cuenta las
+    solicitudes recibidas de cada tipo en 'solicitudes', guarda el instante de llegada de
+    cada página en 'llegadas' y el máximo de solicitudes atendidas a la vez en 'max_en_vuelo'.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, direccion=('127.0.0.1', 0), fixtures=FIXTURES, retardo=0.0):
+        super().__init__(direccion, ManejadorFixtures)
+        self.retardo = retardo
+        self.paginas = {}
+        for ruta in glob.glob(os.path.join(fixtures, 'ciencuadras', '*_p*.html')):
+            categoria, page = re.match(r'(.+)_p(\d+)\.html$', os.path.basename(ruta)).groups()
+            with open(ruta, encoding='utf-8') as f:
+                self.paginas.setdefault(categoria, {})[int(page)] = f.read().encode('utf-8')
+        with open(os.path.join(fixtures, 'nominatim', 'respuestas.json'), encoding='utf-8') as f:
+            self.respuestas = json.load(f)
+        self.solicitudes = {'paginas': 0, 'nominatim': 0}
+        self.llegadas = []
+        self.en_vuelo = 0
+        self.max_en_vuelo = 0
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://{self.server_address[0]}:{self.server_address[1]}"
+
+    def contar(self, tipo):
+        with self._lock:
+            self.solicitudes[tipo] += 1
+            if tipo == 'paginas':
+                self.llegadas.append(time.monotonic())
+
+    def sumar_en_vuelo(self, delta):
+        with self._lock:
+            self.en_vuelo += delta
+            self.max_en_vuelo = max(self.max_en_vuelo, self.en_vuelo)
+
+    def iniciar(self):
+        """
+        Atiende solicitudes en un hilo de fondo y devuelve el servidor.
+        """
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+class ManejadorFixtures(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        self.server.sumar_en_vuelo(1)
+        try:
+            self._atender()
+        finally:
+            self.server.sumar_en_vuelo(-1)
+
+    def _atender(self):
+        if self.server.retardo:
+            time.sleep(self.server.retardo)
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+
+        if url.path == '/search':
+            self.server.contar('nominatim')
+            direccion = normalizar_direccion(params.get('q', [''])[0])
+            self._responder(200, 'application/json',
+                            json.dumps(self.server.respuestas.get(direccion, [])).encode('utf-8'))
+            return
+
+        paginas = self.server.paginas.get(url.path.rstrip('/').rsplit('/', 1)[-1])
+        if not paginas:
+            self._responder(404, 'text/plain', b'Not found')
+            return
+        self.server.contar('paginas')
+        page = int(params.get('page', ['1'])[0])
+        guardadas = sorted(paginas)
+        self._responder(200, 'text/html; charset=utf-8', paginas[guardadas[(page - 1) % len(guardadas)]])
+
+    def _responder(self, estado, tipo, cuerpo):
+        self.send_response(estado)
+        self.send_header('Content-Type', tipo)
+        self.send_header('Content-Length', str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def log_message(self, formato, *args):
+        pass  # Sin una línea por solicitud en la consola
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor local con páginas de ciencuadras y respuestas de Nominatim guardadas")
+    parser.add_argument('--puerto', type=int, default=8000)
+    parser.add_argument('--retardo', type=float, default=0.0, help="Latencia simulada por solicitud, en segundos")
+    args = parser.parse_args()
+
+    servidor = ServidorFixtures(('127.0.0.1', args.puerto), retardo=args.retardo)
+    print(f"Sirviendo fixtures en {servidor.url}/<categoria>?page=N y {servidor.url}/search")
+    print(f"Uso: NOMINATIM_URL={servidor.url}/search python ciencuadras.py --fetcher http "
+          f"--base-url '{servidor.url}/{{categoria}}?page={{page}}'")
+    servidor.serve_forever()
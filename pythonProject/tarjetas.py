@@ -0,0 +1,117 @@
+import locale
+import re
+import threading
+from collections import OrderedDict
+import pandas as pd
+from acceso_datos import version_datos
+
+# Validación de enlaces (compilada una sola vez)
+URL_VALIDA = re.compile(
+    r'^(?:http|ftp)s?://'  # esquema
+    r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+(?:[A-Z]{2,6}\.?|[A-Z0-9-]{2,}\.?)|'  # dominio...
+    r'localhost|'  # localhost...
+    r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}|'  # dirección IP
+    r'\[?[A-F0-9]*:[A-F0-9:]+\]?)'  # dirección IPv6
+    r'(?::\d+)?'  # puerto
+    r'(?:/?|[/?]\S+)$', re.IGNORECASE)
+
+ESTILO_TARJETA = "padding: 15px; margin-bottom: 20px; border-radius: 10px;"
+ESTILO_ENLACE = 'target="_blank" style="text-decoration: none;"'
+
+# HTML ya armado por llave de filtros, reutilizado mientras no cambien los datos
+_cache_html = OrderedDict()
+_cache_lock = threading.Lock()
+MAXIMO_CACHE = 128
+
+
+def es_url_valido(url):
+    """
+    Indica si 'url' es un enlace http(s) o ftp bien formado.
+    """
+    return URL_VALIDA.match(url) is not None
+
+
+def _texto(serie):
+    """
+    Texto de cada valor, sin el '.0' de los números enteros y 'N/A' para los nulos.
+    """
+    texto = serie.astype(str).str.replace(r'\.0+$', '', regex=True)
+    return texto.where(serie.notna(), 'N/A')
+
+
+def formatear_moneda(serie):
+    """
+    Formatea una columna de valores como moneda con las convenciones del locale activo
+    (el mismo resultado que locale.currency(valor, grouping=True), sin recorrer fila por fila).
+    """
+    convencion = locale.localeconv()
+    decimales = convencion['frac_digits'] if 0 <= convencion['frac_digits'] < 127 else 2
+    miles = convencion['mon_thousands_sep'] or convencion['thousands_sep']
+    punto = convencion['mon_decimal_point'] or convencion['decimal_point'] or '.'
+    simbolo = convencion['currency_symbol'] or '$'
+    espacio = ' ' if convencion['p_sep_by_space'] == 1 else ''
+
+    valores = pd.to_numeric(serie, errors='coerce').astype('float64')
+    texto = valores.map(f'{{:,.{decimales}f}}'.format)
+    texto = texto.str.translate(str.maketrans({',': miles, '.': punto}))
+    if convencion['p_cs_precedes'] == 0:
+        texto = texto + espacio + simbolo
+    else:
+        texto = simbolo + espacio + texto
+    return texto.where(valores.notna(), 'No disponible')
+
+
+def tarjetas_html(datos):
+    """
+    Arma el HTML de todas las tarjetas de 'datos' en una sola cadena, prioritarios primero.
+    Cada parte de la tarjeta se calcula por columna sobre todo el DataFrame.
+    """
+    if datos.empty:
+        return ''
+    datos = datos.iloc[(datos['prioridad'] != 1).argsort(kind='stable')]
+    borde = pd.Series('gray', index=datos.index).where(datos['prioridad'] != 1, 'gold')
+
+    link = datos['link'].fillna('').astype(str).str.strip()
+    detalles = ('<p><a href="' + link + f'" {ESTILO_ENLACE}>Ver detalles</a></p>').where(
+        link.str.match(URL_VALIDA), '<p>Enlace no disponible</p>')
+
+    garajes = pd.to_numeric(datos['garajes'], errors='coerce').fillna(0)
+    texto_garajes = ('<p><strong>Garajes:</strong> ' + _texto(garajes) + '</p>').where(garajes > 0, '')
+
+    telefono = datos['telefonocontacto'].fillna('').astype(str).str.strip()
+    coordenadas = datos['coordenadas'].fillna('').astype(str).str.strip()
+    mapa = ('<p><a href="https://www.google.com/maps/place/' + coordenadas + f'" {ESTILO_ENLACE}>Ver en el mapa</a></p>').where(
+        coordenadas.str.contains(',', regex=False), '')
+
+    tarjetas = (
+        '<div style="border: 4px solid ' + borde + f'; {ESTILO_TARJETA}">'
+        + '<h3>' + datos['barrio'].fillna('N/A').astype(str) + ', ' + datos['ciudad'].fillna('N/A').astype(str) + '</h3>'
+        + '<img src="' + datos['fotolocal'].fillna('').astype(str) + '" style="width: 100%; height: auto;">'
+        + '<p><strong>Valor Arriendo:</strong> ' + formatear_moneda(datos['valorarriendo']) + '</p>'
+        + '<p><strong>Tamaño:</strong> ' + _texto(pd.to_numeric(datos['areacuadrada'], errors='coerce')) + ' m²</p>'
+        + texto_garajes
+        + '<p><strong>Baños:</strong> ' + _texto(pd.to_numeric(datos['banios'], errors='coerce')) + '</p>'
+        + detalles
+        + '<p><a href="https://wa.me/+57' + telefono + f'" {ESTILO_ENLACE}>Contactar vía WhatsApp</a></p>'
+        + mapa
+        + '</div>'
+    )
+    return '\n'.join(tarjetas.tolist())
+
+
+def tarjetas_en_cache(llave, datos):
+    """
+    Igual que tarjetas_html, pero guarda el resultado por 'llave' (el estado de los filtros
+    y la página) mientras la tabla no cambie, para que los reruns no vuelvan a armarlo.
+    """
+    llave = (llave, version_datos())
+    with _cache_lock:
+        if llave in _cache_html:
+            _cache_html.move_to_end(llave)
+            return _cache_html[llave]
+    html = tarjetas_html(datos)
+    with _cache_lock:
+        _cache_html[llave] = html
+        while len(_cache_html) > MAXIMO_CACHE:
+            _cache_html.popitem(last=False)
+    return html
@@ -0,0 +1,103 @@
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+import pandas as pd
+import pytest
+import acceso_datos
+
+
+@pytest.fixture
+def consultas(monkeypatch):
+    """
+    Caché vacío y sin base de datos: cada consulta devuelve un DataFrame con su texto y
+    parámetros, y se registra en la lista que devuelve el fixture.
+    """
+    ejecutadas = []
+
+    @contextmanager
+    def conexion_falsa():
+        yield None
+
+    def read_sql(query, conn, params=None):
+        ejecutadas.append((query, params))
+        return pd.DataFrame({'query': [query], 'params': [params]})
+
+    monkeypatch.setattr(acceso_datos, '_cache', OrderedDict())
+    monkeypatch.setattr(acceso_datos, '_locks_carga', {})
+    monkeypatch.setattr(acceso_datos, 'metricas', dict.fromkeys(acceso_datos.metricas, 0))
+    monkeypatch.setattr(acceso_datos, '_version_datos', lambda: 1)
+    monkeypatch.setattr(acceso_datos, 'conexion', conexion_falsa)
+    monkeypatch.setattr(acceso_datos.pd, 'read_sql', read_sql)
+    return ejecutadas
+
+
+def test_reutiliza_resultados(consultas):
+    acceso_datos.consultar_df("SELECT 1", [5])
+    acceso_datos.consultar_df("SELECT 1", [5])
+
+    assert consultas == [("SELECT 1", [5])]
+    assert acceso_datos.metricas_cache()['hits'] == 1
+
+
+def test_descarta_las_menos_usadas(consultas, monkeypatch):
+    monkeypatch.setattr(acceso_datos, 'MAXIMO_CACHE', 3)
+    for cursor in range(3):
+        acceso_datos.consultar_df("SELECT * FROM locales_comerciales WHERE id_local > %s", [cursor])
+    acceso_datos.consultar_df("SELECT * FROM locales_comerciales WHERE id_local > %s", [0])  # la 0 pasa a ser reciente
+    for cursor in range(3, 10):
+        acceso_datos.consultar_df("SELECT * FROM locales_comerciales WHERE id_local > %s", [cursor])
+
+    assert len(acceso_datos._cache) == 3
+    assert [params for _, params in acceso_datos._cache] == [(7,), (8,), (9,)]
+    assert set(acceso_datos._locks_carga) <= set(acceso_datos._cache)
+
+    acceso_datos.consultar_df("SELECT * FROM locales_comerciales WHERE id_local > %s", [0])
+    assert consultas[-1][1] == [0]  # se había descartado: se vuelve a consultar
+
+
+def test_descarta_las_vencidas(consultas, monkeypatch):
+    reloj = [1000.0]
+    monkeypatch.setattr(acceso_datos.time, 'monotonic', lambda: reloj[0])
+    acceso_datos.consultar_df("SELECT 1", ttl=10)
+    reloj[0] += 11
+    acceso_datos.consultar_df("SELECT 2", ttl=10)
+
+    assert list(acceso_datos._cache) == [("SELECT 2", None)]
+    assert list(acceso_datos._locks_carga) == [("SELECT 2", None)]
+
+
+def test_no_poda_un_lock_que_un_hilo_va_a_tomar(consultas):
+    tomado, seguir = threading.Event(), threading.Event()
+
+    class LockLento:
+        """
+        Lock que se detiene justo antes de adquirirse, después de que consultar_df lo obtuvo.
+        """
+
+        def __init__(self):
+            self.lock = threading.Lock()
+
+        def __enter__(self):
+            tomado.set()
+            seguir.wait(5)
+            return self.lock.__enter__()
+
+        def __exit__(self, *args):
+            return self.lock.__exit__(*args)
+
+    llave = ("SELECT 1", None)
+    carga = acceso_datos._locks_carga[llave] = {'lock': LockLento(), 'usuarios': 0}
+    hilo = threading.Thread(target=acceso_datos.consultar_df, args=("SELECT 1",))
+    hilo.start()
+    assert tomado.wait(5)
+
+    # Otra consulta poda el caché mientras el hilo aún no adquiere el lock
+    acceso_datos.consultar_df("SELECT 2")
+    assert acceso_datos._locks_carga[llave] is carga
+    acceso_datos.invalidar_cache()
+    assert acceso_datos._locks_carga[llave] is carga
+
+    seguir.set()
+    hilo.join()
+    assert carga['usuarios'] == 0
+    assert [query for query, _ in consultas] == ["SELECT 2", "SELECT 1"]
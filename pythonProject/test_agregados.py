@@ -0,0 +1,42 @@
+from agregados import refrescar_agregados
+from cargador_bd import asegurar_esquema
+
+
+def test_refrescar_en_base_de_datos_nueva(bd):
+    asegurar_esquema(bd)
+    refrescar_agregados(bd)
+
+    with bd.cursor() as cursor:
+        cursor.execute("SELECT count(*) FROM resumen_barrio")
+        assert cursor.fetchone() == (0,)
+
+
+def test_duplicados_cuentan_una_vez(bd):
+    asegurar_esquema(bd)
+    with bd.cursor() as cursor:
+        cursor.execute("""
+            INSERT INTO locales_comerciales (id_listado, id_canonico, barrio, ciudad, valorarriendo, areacuadrada)
+            VALUES ('a', 'a', 'Chapinero', 'Bogotá', 1000000, 40),
+                   ('b', 'a', 'Chapinero', 'Bogotá', 1000000, 40),
+                   ('c', NULL, 'Chapinero', 'Bogotá', 3000000, 60)
+        """)
+    refrescar_agregados(bd, barrios=[('Bogotá', 'Chapinero')])
+
+    with bd.cursor() as cursor:
+        cursor.execute("SELECT n, precio_promedio FROM resumen_barrio WHERE barrio = 'Chapinero'")
+        assert cursor.fetchone() == (2, 2000000)
+        cursor.execute("SELECT n FROM resumen_ciudad WHERE ciudad = 'Bogotá'")
+        assert cursor.fetchone() == (2,)
+
+
+def test_refrescar_sin_cambios_de_esquema(bd):
+    asegurar_esquema(bd)
+    refrescar_agregados(bd, barrios=[('Bogotá', 'Chapinero')], commit=False)
+
+    # Dentro de la transacción de la carga no debe quedar el bloqueo exclusivo de un ALTER TABLE
+    with bd.cursor() as cursor:
+        cursor.execute("""
+            SELECT count(*) FROM pg_locks l JOIN pg_class c ON c.oid = l.relation
+            WHERE l.pid = pg_backend_pid() AND l.mode = 'AccessExclusiveLock' AND c.relname = 'locales_comerciales'
+        """)
+        assert cursor.fetchone() == (0,)
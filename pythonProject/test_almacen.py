@@ -0,0 +1,64 @@
+from decimal import Decimal
+import numpy as np
+import pandas as pd
+from almacen import AlmacenLocales, compactar, pyarrow
+
+
+def _locales():
+    # Como llegan de read_sql: NUMERIC como Decimal, enteros con nulos como float y el POINT como texto
+    return pd.DataFrame({
+        'id_local': [1, 2, 3, 4, 5, 6],
+        'barrio': ['Chapinero', 'Usaquén', 'Chapinero', None, 'Usaquén', 'Chapinero'],
+        'ciudad': ['Bogotá', 'Bogotá', 'Medellín', 'Bogotá', 'Bogotá', 'Bogotá'],
+        'descripcion': ['Local esquinero', 'Oficina amoblada', 'Local', 'Bodega', 'Consultorio', 'Local doble altura'],
+        'fuente': ['ciencuadras'] * 6,
+        'valorarriendo': [Decimal('3500000'), Decimal('5000000'), None, Decimal('900000'), Decimal('2000000'),
+                          Decimal('4100000')],
+        'areacuadrada': [Decimal('40.5'), Decimal('80'), Decimal('35'), None, Decimal('60'), Decimal('120')],
+        'prioridad': [1.0, 0.0, 1.0, 0.0, np.nan, 0.0],
+        'punto': ['(-74.0628,4.6486)', '(-74.03,4.7)', None, '(-74.1,4.6)', '(-74.035,4.71)', '(-74.06,4.65)'],
+    })
+
+
+def test_compactar_tipos():
+    datos = compactar(_locales().drop(columns='punto'))
+
+    assert {nombre: str(tipo) for nombre, tipo in datos.dtypes.items()} == {
+        'id_local': 'UInt8', 'barrio': 'category', 'ciudad': 'category', 'fuente': 'category',
+        # Textos casi todos distintos: no conviene la categórica
+        'descripcion': 'string' if pyarrow is not None else 'object',
+        'valorarriendo': 'UInt32', 'areacuadrada': 'float32', 'prioridad': 'UInt8',
+    }
+    assert datos['valorarriendo'].isna().tolist() == [False, False, True, False, False, False]
+    assert datos['areacuadrada'].tolist()[:2] == [40.5, 80.0]
+
+
+def test_punto_como_latitud_y_longitud():
+    almacen = AlmacenLocales(_locales())
+
+    assert 'punto' not in almacen.datos
+    assert almacen.datos['latitud'].dtype == 'float32'
+    assert almacen.datos['latitud'].tolist()[:2] == [np.float32(4.6486), np.float32(4.7)]
+    assert np.isnan(almacen.datos['longitud'].iloc[2])
+    assert almacen.memoria()['bytes'] < almacen.memoria()['bytes_originales']
+
+
+def test_indice_barrio():
+    almacen = AlmacenLocales(_locales())
+
+    assert almacen.barrios() == ['Chapinero', 'Usaquén']  # Sin el barrio nulo
+    assert {barrio: filas.tolist() for barrio, filas in almacen.indice_barrio.items()} == \
+        {'Chapinero': [0, 2, 5], 'Usaquén': [1, 4]}
+
+
+def test_filtrar():
+    almacen = AlmacenLocales(_locales())
+
+    assert almacen.filtrar(barrio='Chapinero')['id_local'].tolist() == [1, 3, 6]
+    assert almacen.filtrar(barrio='Chapinero', ciudad='Bogotá')['id_local'].tolist() == [1, 6]
+    assert almacen.filtrar(ciudad='Bogotá', prioridad=0)['id_local'].tolist() == [2, 4, 6]
+    assert almacen.filtrar(barrio='Chapinero', prioridad=1, columnas=['id_local', 'barrio']).columns.tolist() == \
+        ['id_local', 'barrio']
+    # Valores que no existen: resultado vacío, no un error
+    assert almacen.filtrar(barrio='Suba').empty
+    assert almacen.filtrar(ciudad='Cali').empty
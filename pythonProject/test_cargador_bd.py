@@ -0,0 +1,51 @@
+from decimal import Decimal
+import pandas as pd
+from cargador_bd import cargar_propiedades, filas_desde_propiedades
+
+
+def _propiedad(nombre, precio, imagen, barrio='Chapinero', **campos):
+    prop = {
+        'Nombre': nombre, 'Precio': precio, 'Tamaño': '80 m²', 'Baños': '1', 'Imagen': imagen,
+        'Ciudad': 'Bogotá', 'Localidad': 'Chapinero', 'Barrio': barrio, 'Tipo': 'Local',
+        'Latitud': '4.6486', 'Longitud': '-74.0628'
+    }
+    prop.update(campos)
+    return prop
+
+
+PROPIEDADES = [
+    _propiedad('Local en arriendo en Chapinero', '$ 3.500.000', 'https://img.cc.com/1.jpg'),
+    _propiedad('Local en arriendo en Chapinero', '$ 2.000.000', 'https://img.cc.com/2.jpg', Latitud='N/A'),
+    _propiedad('Oficina en arriendo en Usaquén', '$ 5.000.000', 'N/A', barrio='Usaquén', Portal='metrocuadrado'),
+]
+
+
+def test_filas_desde_propiedades():
+    filas, rechazos = filas_desde_propiedades(PROPIEDADES)
+
+    assert filas['valorarriendo'].tolist() == [3500000, 2000000, 5000000]
+    assert filas['areacuadrada'].tolist() == [80, 80, 80]
+    assert filas['fuente'].tolist() == ['ciencuadras', 'ciencuadras', 'metrocuadrado']
+    assert filas['coordenadas'].iloc[0] == '4.6486,-74.0628'
+    assert pd.isna(filas['coordenadas'].iloc[1])
+    # La llave no depende del precio: un cambio de precio actualiza el mismo listado
+    cambiada = dict(PROPIEDADES[0], Precio='$ 3.800.000')
+    assert filas_desde_propiedades([cambiada])[0]['id_listado'].iloc[0] == filas['id_listado'].iloc[0]
+    assert filas['id_listado'].nunique() == 3
+    assert sum(rechazos.values()) == 0
+
+
+def test_carga_y_upsert(bd):
+    assert cargar_propiedades(bd, PROPIEDADES) == (3, 0)
+    # Misma carga: no cambia nada
+    assert cargar_propiedades(bd, PROPIEDADES) == (0, 0)
+
+    cambiadas = [dict(PROPIEDADES[0], Precio='$ 3.800.000'), _propiedad('Bodega', '$ 9.000.000', 'https://img.cc.com/9.jpg')]
+    assert cargar_propiedades(bd, cambiadas) == (1, 1)
+
+    with bd.cursor() as cursor:
+        cursor.execute("SELECT count(*), max(valorarriendo) FILTER (WHERE fotolocal LIKE '%/1.jpg') FROM locales_comerciales")
+        assert cursor.fetchone() == (4, Decimal('3800000'))
+        cursor.execute("SELECT n, precio_promedio FROM resumen_barrio WHERE barrio = 'Chapinero'")
+        n, promedio = cursor.fetchone()
+    assert n == 3 and round(promedio) == (3800000 + 2000000 + 9000000) // 3
@@ -0,0 +1,109 @@
+import csv
+import json
+import urllib.request
+import pytest
+import ciencuadras
+import geocodificacion
+from servidor_local import ServidorFixtures
+
+
+class DriverFalso:
+    """
+    Reemplazo de WebDriver: 'get' descarga la página del servidor local con urllib.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.page_source = ''
+
+    def get(self, url):
+        with urllib.request.urlopen(url) as respuesta:
+            self.page_source = respuesta.read().decode('utf-8')
+
+    def quit(self):
+        pass
+
+
+@pytest.fixture
+def servidor(monkeypatch, tmp_path):
+    """
+    Servidor local con las páginas y respuestas de Nominatim guardadas; las corridas escriben en tmp_path.
+    """
+    servidor = ServidorFixtures().iniciar()
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(geocodificacion, 'NOMINATIM_URL', servidor.url + '/search')
+    monkeypatch.setattr(geocodificacion.limitador_nominatim, 'tasa', 1000.0)
+    monkeypatch.setattr(ciencuadras, 'setup_driver', DriverFalso)
+    yield servidor
+    servidor.shutdown()
+    servidor.server_close()
+
+
+def _scrape_page_con_fallo(paginas_con_error):
+    """
+    scrape_page que lee la página con DriverFalso y lanza RuntimeError en 'paginas_con_error'.
+    """
+    def scrape_page(driver, url, clave):
+        if clave in paginas_con_error:
+            raise RuntimeError(f"fallo simulado en {clave}")
+        driver.get(url)
+        return ciencuadras.parse_page(driver.page_source, clave[0])
+    return scrape_page
+
+
+def _tarjetas_por_pagina(servidor, categoria):
+    return {page: len(ciencuadras.parse_page(html.decode('utf-8'), categoria))
+            for page, html in servidor.paginas[categoria].items()}
+
+
+def _filas(ruta):
+    with open(ruta, newline='', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+
+def _correr(servidor, **kwargs):
+    return ciencuadras.scrape_properties(
+        num_pages=3, categorias=['local'], base_url=servidor.url + '/{categoria}?page={page}',
+        csv_file='propiedades.csv', **kwargs
+    )
+
+
+def test_pagina_con_error_no_descarta_las_siguientes(servidor, monkeypatch):
+    monkeypatch.setattr(ciencuadras, 'scrape_page', _scrape_page_con_fallo({('local', 2)}))
+
+    fallidas = _correr(servidor, workers=2)
+
+    tarjetas = _tarjetas_por_pagina(servidor, 'local')
+    assert fallidas == [('local', 2)]
+    # Las páginas guardadas se repiten en ciclo: la página 3 es la 1
+    assert len(_filas('propiedades.csv')) == 2 * tarjetas[1]
+    with open('propiedades.csv.checkpoint.json', encoding='utf-8') as f:
+        assert json.load(f)['paginas_completadas'] == [['local', 1], ['local', 3]]
+
+
+def test_resume_completa_solo_las_paginas_fallidas(servidor, monkeypatch):
+    monkeypatch.setattr(ciencuadras, 'scrape_page', _scrape_page_con_fallo({('local', 2)}))
+    _correr(servidor)
+    solicitudes = servidor.solicitudes['paginas']
+
+    monkeypatch.setattr(ciencuadras, 'scrape_page', _scrape_page_con_fallo(set()))
+    fallidas = _correr(servidor, resume=True)
+
+    tarjetas = _tarjetas_por_pagina(servidor, 'local')
+    assert fallidas == []
+    assert servidor.solicitudes['paginas'] - solicitudes == 1
+    assert len(_filas('propiedades.csv')) == 2 * tarjetas[1] + tarjetas[2]
+    with open('propiedades.csv.checkpoint.json', encoding='utf-8') as f:
+        assert json.load(f)['paginas_completadas'] == [['local', 1], ['local', 2], ['local', 3]]
+
+
+def test_corte_incremental_no_pide_mas_paginas(servidor):
+    kwargs = dict(num_pages=4, categorias=['local', 'oficina'], base_url=servidor.url + '/{categoria}?page={page}',
+                  fetcher='http', incremental=True)
+    ciencuadras.scrape_properties(csv_file='primera.csv', cortar_sin_cambios=False, **kwargs)
+    assert servidor.solicitudes['paginas'] == 8
+
+    fallidas = ciencuadras.scrape_properties(csv_file='segunda.csv', **kwargs)
+
+    # La primera página de cada categoría no trae cambios: no se pide ninguna más
+    assert servidor.solicitudes['paginas'] == 8 + 2
+    assert fallidas == []
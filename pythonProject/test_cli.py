@@ -0,0 +1,12 @@
+import pytest
+from cli import perfil_importacion
+
+# Paquetes que los scrapers importan solo en la función que los usa
+DIFERIDOS = {'selenium', 'webdriver_manager', 'aiohttp', 'pyarrow', 'bs4'}
+
+
+@pytest.mark.parametrize('modulo', ['ciencuadras', 'planificador'])
+def test_scrapers_no_importan_dependencias_pesadas(modulo):
+    _, pesadas = perfil_importacion([modulo])
+
+    assert DIFERIDOS.isdisjoint(paquete for _, paquete in pesadas)
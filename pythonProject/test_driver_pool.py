@@ -0,0 +1,99 @@
+import threading
+import pytest
+from selenium.common.exceptions import WebDriverException
+from driver_pool import merge_pages, scrape_pages_concurrently
+
+
+class DriverFalso:
+    """
+    Reemplazo de WebDriver que solo registra si se cerró.
+    """
+
+    def __init__(self):
+        self.cerrado = False
+
+    def quit(self):
+        self.cerrado = True
+
+
+def _paginas(n):
+    return [(page, f"http://localhost/local?page={page}") for page in range(1, n + 1)]
+
+
+@pytest.mark.parametrize('workers', [1, 3])
+def test_error_en_una_pagina_no_detiene_al_trabajador(workers):
+    def scrape_page(driver, url, clave):
+        if clave == 2:
+            raise RuntimeError("selector roto")
+        return [f"p{clave}"]
+
+    completadas = {}
+    lock = threading.Lock()
+
+    def al_completar(clave, propiedades):
+        with lock:
+            completadas[clave] = propiedades
+
+    resultados = scrape_pages_concurrently(_paginas(5), scrape_page, DriverFalso, workers=workers,
+                                           al_completar=al_completar)
+
+    assert resultados == {1: ['p1'], 2: [], 3: ['p3'], 4: ['p4'], 5: ['p5']}
+    assert completadas == resultados
+    assert merge_pages(resultados) == ['p1', 'p3', 'p4', 'p5']
+
+
+def test_sesion_caida_se_reintenta_con_un_driver_nuevo():
+    drivers = []
+
+    def crear_driver():
+        drivers.append(DriverFalso())
+        return drivers[-1]
+
+    def scrape_page(driver, url, clave):
+        if clave == 1 and len(drivers) == 1:
+            raise WebDriverException("chrome not reachable")
+        return [f"p{clave}"]
+
+    resultados = scrape_pages_concurrently(_paginas(3), scrape_page, crear_driver, workers=1)
+
+    assert resultados == {1: ['p1'], 2: ['p2'], 3: ['p3']}
+    assert len(drivers) == 2
+    assert all(driver.cerrado for driver in drivers)
+
+
+def test_sesion_que_no_se_recupera_deja_la_pagina_fallida():
+    def scrape_page(driver, url, clave):
+        if clave == 2:
+            raise WebDriverException("session deleted")
+        return [f"p{clave}"]
+
+    resultados = scrape_pages_concurrently(_paginas(3), scrape_page, DriverFalso, workers=1, max_reintentos=2)
+
+    assert resultados == {1: ['p1'], 2: [], 3: ['p3']}
+
+
+def test_driver_que_no_arranca_reporta_todas_las_paginas():
+    def crear_driver():
+        raise RuntimeError("chromedriver no encontrado")
+
+    completadas = []
+    resultados = scrape_pages_concurrently(_paginas(4), lambda driver, url, clave: [clave], crear_driver,
+                                           workers=2, al_completar=lambda clave, _: completadas.append(clave))
+
+    assert resultados == {1: [], 2: [], 3: [], 4: []}
+    assert sorted(completadas) == [1, 2, 3, 4]
+
+
+def test_paginas_omitidas_se_reportan_sin_cargar():
+    cargadas = []
+
+    def scrape_page(driver, url, clave):
+        cargadas.append(clave)
+        return [clave]
+
+    completadas = {}
+    scrape_pages_concurrently(_paginas(4), scrape_page, DriverFalso, workers=1,
+                              al_completar=completadas.__setitem__, omitir=lambda clave: clave > 2)
+
+    assert cargadas == [1, 2]
+    assert completadas == {1: [1], 2: [2], 3: None, 4: None}
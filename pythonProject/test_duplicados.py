@@ -0,0 +1,127 @@
+from collections import OrderedDict
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+import acceso_datos
+from busqueda import barrios_disponibles, buscar_locales, contar_locales
+from cargador_bd import cargar_propiedades
+from duplicados import coordenadas_precisas, detectar_duplicados, marcar_duplicados, nombres_distintivos
+from espacial import locales_cercanos, locales_en_radio
+from test_cargador_bd import _propiedad
+
+COLUMNAS = ['id_listado', 'descripcion', 'barrio', 'valorarriendo', 'areacuadrada', 'fotolocal', 'coordenadas']
+CENTROIDE_CHAPINERO = '4.6480,-74.0620'  # El de la localidad en el gazetteer
+
+
+def _detectar(*filas):
+    return detectar_duplicados(pd.DataFrame(filas, columns=COLUMNAS).assign(ciudad='Bogotá')).tolist()
+
+
+def test_plantilla_y_centroide_no_son_duplicado():
+    # Dos locales distintos del mismo barrio: título de plantilla, fotos distintas y el mismo
+    # centroide como coordenadas
+    assert _detectar(
+        ('a', 'Local en arriendo en Chapinero', 'Chapinero', 2000000, 40, 'https://img.cc.com/1.jpg', CENTROIDE_CHAPINERO),
+        ('b', 'Local en arriendo en Chapinero', 'Chapinero', 2050000, 40, 'https://img.cc.com/2.jpg', CENTROIDE_CHAPINERO),
+        ('c', 'Bodega en arriendo en Chicó', 'Chicó', 9000000, 300, 'https://img.cc.com/3.jpg', None),
+    ) == ['a', 'b', 'c']
+
+
+def test_sin_coordenadas_no_estan_cerca():
+    assert _detectar(
+        ('a', 'Oficina en arriendo en Chicó', 'Chicó', 3000000, 60, 'N/A', None),
+        ('b', 'Oficina en arriendo en Chicó', 'Chicó', 3000000, 60, 'N/A', None),
+    ) == ['a', 'b']
+
+
+def test_plantilla_de_otro_barrio_no_cuenta_como_nombre():
+    # Puntos precisos a 50 m, área y precio casi iguales: solo los nombres de plantilla coinciden
+    assert _detectar(
+        ('a', 'Local en arriendo en Chapinero', 'Chapinero', 2000000, 40, 'N/A', '4.651001,-74.061234'),
+        ('b', 'Local en arriendo en Chicó', 'Chicó', 2010000, 40.5, 'N/A', '4.651451,-74.061234'),
+    ) == ['a', 'b']
+
+
+def test_misma_imagen_en_otro_portal():
+    assert _detectar(
+        ('a', 'Local en arriendo en Chapinero', 'Chapinero', 2000000, 40, 'https://img.cc.com/1.jpg', CENTROIDE_CHAPINERO),
+        ('b', 'LOCAL COMERCIAL', 'Chapinero', 2100000, 41, 'http://IMG.cc.com/1.jpg?w=300', CENTROIDE_CHAPINERO),
+    ) == ['a', 'a']
+
+
+def test_misma_imagen_lejos_no_es_duplicado():
+    assert _detectar(
+        ('a', 'Local en arriendo en Chapinero', 'Chapinero', 2000000, 40, 'https://img.cc.com/1.jpg', '4.651001,-74.061234'),
+        ('b', 'Local en arriendo en Chapinero', 'Chapinero', 2000000, 40, 'https://img.cc.com/1.jpg', '4.661234,-74.061234'),
+    ) == ['a', 'b']
+
+
+def test_area_exacta_en_el_mismo_punto():
+    assert _detectar(
+        ('a', 'Local en arriendo en Chapinero', 'Chapinero', 2000000, 40, 'https://img.cc.com/1.jpg', '4.651001,-74.061234'),
+        ('b', 'LOCAL EN ARRIENDO EN CHAPINERO.', 'Chapinero', 2020000, 40, 'https://mc.com/9.jpg', '4.651101,-74.061234'),
+        # Mismo punto y área, pero otro precio
+        ('c', 'Local en arriendo en Chapinero', 'Chapinero', 2500000, 40, 'https://img.cc.com/3.jpg', '4.651051,-74.061234'),
+    ) == ['a', 'a', 'c']
+
+
+def test_nombre_distintivo_parecido():
+    assert _detectar(
+        ('a', 'Local esquinero con mezzanine en Chapinero', 'Chapinero', 2000000, 80, 'N/A', '4.651001,-74.061234'),
+        ('b', 'LOCAL ESQUINERO CON MEZZANINE', 'Chapinero', 2020000, 80.5, 'N/A', '4.651501,-74.061234'),
+    ) == ['a', 'a']
+
+
+def test_coordenadas_precisas():
+    latitud = np.array([np.nan, 4.648, 4.7, 4.7, 4.651234])
+    longitud = np.array([-74.06, -74.062, -74.05, -74.05, -74.061234])
+
+    # Falta, centroide del gazetteer, punto repetido (dos veces) y un punto propio
+    assert coordenadas_precisas(latitud, longitud).tolist() == [False, False, False, False, True]
+
+
+def test_nombres_distintivos():
+    nombres = pd.Series(['oficina en arriendo en chico', 'local esquinero en chico', 'se arrienda bodega'])
+    zonas = pd.Series(['chico bogota', 'chico bogota', 'fontibon bogota'])
+
+    assert nombres_distintivos(nombres, zonas).tolist() == ['', 'esquinero', '']
+
+
+def test_marcar_duplicados(bd):
+    cargar_propiedades(bd, [
+        _propiedad('Local en arriendo en Chapinero', '$ 3.500.000', 'https://img.cc.com/1.jpg'),
+        _propiedad('Local en arriendo en Chapinero', '$ 3.550.000', 'https://img.cc.com/2.jpg'),
+        _propiedad('LOCAL COMERCIAL', '$ 3.600.000', 'https://img.cc.com/1.jpg?w=300', Portal='metrocuadrado'),
+    ])
+
+    assert marcar_duplicados(bd) == (3, 1, 3)
+    assert marcar_duplicados(bd) == (3, 1, 0)
+    with bd.cursor() as cursor:
+        cursor.execute("SELECT count(*) FROM locales_unicos")
+        assert cursor.fetchone()[0] == 2
+        cursor.execute("SELECT n FROM resumen_barrio WHERE barrio = 'Chapinero'")
+        assert cursor.fetchone()[0] == 2
+
+
+def test_busqueda_muestra_un_listado_por_propiedad(bd, monkeypatch):
+    @contextmanager
+    def conexion_prueba():
+        yield bd
+
+    monkeypatch.setattr(acceso_datos, '_cache', OrderedDict())
+    monkeypatch.setattr(acceso_datos, '_locks_carga', {})
+    monkeypatch.setattr(acceso_datos, '_version_datos', lambda: 1)
+    monkeypatch.setattr(acceso_datos, 'conexion', conexion_prueba)
+    cargar_propiedades(bd, [
+        _propiedad('Local en arriendo en Chapinero', '$ 3.500.000', 'https://img.cc.com/1.jpg'),
+        _propiedad('LOCAL COMERCIAL', '$ 3.600.000', 'https://img.cc.com/1.jpg?w=300', Portal='metrocuadrado'),
+        _propiedad('Oficina en arriendo en Usaquén', '$ 5.000.000', 'N/A', barrio='Usaquén', Latitud='4.6951'),
+    ])
+    marcar_duplicados(bd)
+
+    assert contar_locales({}) == 2
+    assert contar_locales({'barrio': 'Chapinero'}) == 1
+    assert len(buscar_locales({'barrio': 'Chapinero'})[0]) == 1
+    assert barrios_disponibles() == ['Chapinero', 'Usaquén']
+    assert len(locales_en_radio(4.6486, -74.0628, 100)) == 1
+    assert locales_cercanos(4.6486, -74.0628, n=5)['barrio'].tolist() == ['Chapinero', 'Usaquén']
@@ -0,0 +1,36 @@
+from cargador_bd import ESQUEMA, cargar_propiedades
+from espacial import asegurar_esquema_espacial, condicion_radio
+from test_cargador_bd import PROPIEDADES
+
+# Tabla con las columnas del scraper original de locales: 'ubicacion' es la dirección en texto
+TABLA_ORIGINAL = ESQUEMA.split(';')[0] + """;
+    ALTER TABLE locales_comerciales ADD COLUMN ubicacion TEXT, ADD COLUMN precio NUMERIC, ADD COLUMN tamanio NUMERIC;
+    INSERT INTO locales_comerciales (ubicacion, precio, tamanio, coordenadas) VALUES ('Chapinero, Bogotá', 1500000, 40, 'N/A');
+"""
+
+def _en_radio(bd, lat=4.6486, lon=-74.0628, metros=100):
+    condicion, params = condicion_radio(lat, lon, metros)
+    with bd.cursor() as cursor:
+        cursor.execute(f"SELECT count(*) FROM locales_comerciales WHERE {condicion}", params)
+        return cursor.fetchone()[0]
+
+
+def test_esquema_sobre_la_tabla_original(bd):
+    with bd.cursor() as cursor:
+        cursor.execute(TABLA_ORIGINAL)
+    bd.commit()
+
+    asegurar_esquema_espacial(bd)
+    cargar_propiedades(bd, PROPIEDADES, fuente='metrocuadrado')
+
+    with bd.cursor() as cursor:
+        cursor.execute(
+            "SELECT indexname FROM pg_indexes WHERE schemaname = current_schema()"
+            " AND tablename = 'locales_comerciales' AND indexdef LIKE '%gist%'"
+        )
+        assert cursor.fetchall() == [('locales_comerciales_punto_idx',)]
+        cursor.execute("SELECT count(*) FROM locales_unicos")
+        total = cursor.fetchone()[0]
+    # La fila previa y las 3 cargadas; la segunda propiedad no tiene coordenadas
+    assert total == 4
+    assert _en_radio(bd) == 2
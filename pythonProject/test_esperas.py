@@ -0,0 +1,82 @@
+import json
+import threading
+import pytest
+from esperas import TiemposAdaptativos, medir_carga
+
+
+class DriverConRegistro:
+    """
+    Reemplazo de WebDriver: la API de Performance solo ve los bytes del mismo origen y el
+    registro 'performance' trae los eventos de red de CDP (None si no se habilitó).
+    """
+
+    def __init__(self, eventos=None):
+        self.eventos = eventos
+
+    def execute_script(self, script):
+        return [15000, 3, 1.25]
+
+    def get_log(self, tipo):
+        if self.eventos is None:
+            raise ValueError(f"log type '{tipo}' not found")
+        entradas, self.eventos = self.eventos, []
+        return [{'message': json.dumps({'message': evento})} for evento in entradas]
+
+
+def test_sin_observaciones_usa_el_maximo():
+    tiempos = TiemposAdaptativos(minimo=5.0, maximo=30.0)
+
+    assert tiempos.timeout('https://www.ciencuadras.com/arriendo/bogota/local?page=1') == 30.0
+
+
+def test_promedio_movil_por_sitio():
+    tiempos = TiemposAdaptativos(minimo=1.0, maximo=30.0, factor=3.0, alfa=0.5)
+    tiempos.registrar('https://www.ciencuadras.com/arriendo/bogota/local?page=1', 2.0)
+    tiempos.registrar('https://www.ciencuadras.com/arriendo/bogota/oficina?page=3', 4.0)
+
+    # Promedio (1 - 0.5) * 2 + 0.5 * 4 = 3 para todo el sitio, sin importar la ruta
+    assert tiempos.timeout('https://www.ciencuadras.com/otra') == pytest.approx(9.0)
+    assert tiempos.timeout('https://www.metrocuadrado.com/locales') == 30.0
+
+
+@pytest.mark.parametrize('segundos, esperado', [(0.1, 5.0), (20.0, 30.0)])
+def test_timeout_acotado(segundos, esperado):
+    tiempos = TiemposAdaptativos(minimo=5.0, maximo=30.0, factor=3.0)
+    tiempos.registrar('http://127.0.0.1:8000/local', segundos)
+
+    assert tiempos.timeout('http://127.0.0.1:8000/oficina') == esperado
+
+
+def test_registro_desde_varios_hilos():
+    tiempos = TiemposAdaptativos(minimo=0.0, maximo=100.0, factor=1.0, alfa=0.1)
+
+    def registrar():
+        for _ in range(500):
+            tiempos.registrar('http://127.0.0.1:8000/local', 2.0)
+
+    hilos = [threading.Thread(target=registrar) for _ in range(4)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    assert tiempos.timeout('http://127.0.0.1:8000/local') == pytest.approx(2.0)
+
+
+def test_medir_carga_con_eventos_de_red():
+    driver = DriverConRegistro([
+        {'method': 'Network.requestWillBeSent', 'params': {'requestId': '1'}},
+        {'method': 'Network.loadingFinished', 'params': {'requestId': '1', 'encodedDataLength': 15000}},
+        # Recurso de otro dominio: la API de Performance lo reporta con transferSize 0
+        {'method': 'Network.loadingFinished', 'params': {'requestId': '2', 'encodedDataLength': 48000}},
+        {'method': 'Network.loadingFinished', 'params': {'requestId': '3', 'encodedDataLength': 2000}},
+        {'method': 'Network.loadingFailed', 'params': {'requestId': '4'}},
+    ])
+
+    assert medir_carga(driver) == {'bytes': 65000, 'recursos': 3, 'segundos': 1.25}
+    # Leer el registro lo vacía: la siguiente medición no repite los bytes
+    assert medir_carga(driver) == {'bytes': 0, 'recursos': 0, 'segundos': 1.25}
+
+
+def test_medir_carga_sin_registro_usa_la_api_de_performance():
+    assert medir_carga(DriverConRegistro()) == {'bytes': 15000, 'recursos': 3, 'segundos': 1.25}
@@ -0,0 +1,170 @@
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import requests
+import geocodificacion
+from geocache import GeocodeCache
+from geocodificacion import LimitadorTasa, ProveedorNominatim, geocodificar_propiedades, resolver_direccion
+
+DIRECCION = "Chapinero, Chapinero, Bogotá, Colombia"
+
+
+class RespuestaFalsa:
+
+    def __init__(self, estado, datos=None):
+        self.status_code = estado
+        self.datos = datos
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"HTTP {self.status_code}")
+
+    def json(self):
+        return self.datos
+
+
+@pytest.fixture
+def nominatim(monkeypatch):
+    """
+    Reemplaza la sesión HTTP de Nominatim: cada consulta toma la siguiente respuesta de la
+    lista que devuelve el fixture (una excepción se lanza). Sin esperas entre reintentos.
+    """
+    respuestas = []
+
+    def get(url, params=None, timeout=None):
+        respuesta = respuestas.pop(0)
+        if isinstance(respuesta, Exception):
+            raise respuesta
+        return respuesta
+
+    monkeypatch.setattr(geocodificacion._sesion, 'get', get)
+    monkeypatch.setattr(geocodificacion, 'espera_con_jitter', lambda intento: 0)
+    return respuestas
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = GeocodeCache(str(tmp_path / 'geocache.sqlite'))
+    yield cache
+    cache.close()
+
+
+def _resolver(cache):
+    return resolver_direccion(DIRECCION, cache, LimitadorTasa(tasa=1000.0), reintentos=2)
+
+
+@pytest.mark.parametrize('error', [
+    requests.Timeout("read timeout"),
+    requests.ConnectionError("connection refused"),
+    RespuestaFalsa(429),
+    RespuestaFalsa(503),
+])
+def test_error_transitorio_no_queda_como_negativo(nominatim, cache, error):
+    nominatim.extend([error] * 3)
+
+    assert _resolver(cache) == ('N/A', 'N/A')
+    assert nominatim == []  # la consulta y sus 2 reintentos
+    assert cache.get(DIRECCION) is None
+
+
+def test_reintento_exitoso_se_guarda(nominatim, cache):
+    nominatim.extend([RespuestaFalsa(429), RespuestaFalsa(200, [{'lat': '4.65', 'lon': '-74.06'}])])
+
+    assert _resolver(cache) == ('4.65', '-74.06')
+    assert cache.get(DIRECCION) == ('4.65', '-74.06')
+
+
+def test_error_permanente_no_se_reintenta_ni_se_guarda(nominatim, cache):
+    nominatim.extend([RespuestaFalsa(403), RespuestaFalsa(200, [])])
+
+    assert _resolver(cache) == ('N/A', 'N/A')
+    assert len(nominatim) == 1
+    assert cache.get(DIRECCION) is None
+
+
+def test_sin_resultado_se_guarda_como_negativo(nominatim, cache):
+    nominatim.append(RespuestaFalsa(200, []))
+
+    assert _resolver(cache) == ('N/A', 'N/A')
+    assert cache.get(DIRECCION) == ('N/A', 'N/A')
+
+
+class ManejadorNominatim(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        estado, cuerpo = self.server.respuestas.pop(0)
+        self.send_response(estado)
+        self.send_header('Content-Length', str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def log_message(self, formato, *args):
+        pass
+
+
+@pytest.fixture
+def nominatim_http(monkeypatch):
+    """
+    Servidor HTTP local para el camino con aiohttp: cada solicitud toma la siguiente
+    (estado, cuerpo) de la lista que devuelve el fixture. Sin esperas entre reintentos.
+    """
+    pytest.importorskip('aiohttp')
+    servidor = ThreadingHTTPServer(('127.0.0.1', 0), ManejadorNominatim)
+    servidor.respuestas = []
+    threading.Thread(target=servidor.serve_forever, args=(0.05,), daemon=True).start()
+    monkeypatch.setattr(geocodificacion, 'espera_con_jitter', lambda intento: 0)
+    monkeypatch.setattr(geocodificacion, 'NOMINATIM_URL', f"http://127.0.0.1:{servidor.server_address[1]}/search")
+    yield servidor.respuestas
+    servidor.shutdown()
+    servidor.server_close()
+
+
+def _geocodificar(cache):
+    propiedades = [{'Barrio': 'Chapinero', 'Localidad': 'Chapinero', 'Ciudad': 'Bogotá'}]
+    proveedores = [ProveedorNominatim(cache, LimitadorTasa(tasa=1000.0), reintentos=2)]
+    fallidas = geocodificar_propiedades(propiedades, proveedores=proveedores)
+    return fallidas, (propiedades[0]['Latitud'], propiedades[0]['Longitud'])
+
+
+@pytest.mark.parametrize('cuerpo', [
+    b'<html><body>Captcha</body></html>',
+    b'[{"display_name": "Chapinero"}]',
+    b'{"error": "Unable to geocode"}',
+])
+def test_async_respuesta_inesperada_no_detiene_la_geocodificacion(nominatim_http, cache, cuerpo):
+    nominatim_http.append((200, cuerpo))
+
+    assert _geocodificar(cache) == ([DIRECCION], ('N/A', 'N/A'))
+    assert cache.get(DIRECCION) is None
+
+
+def test_async_reintenta_errores_transitorios(nominatim_http, cache):
+    nominatim_http.extend([(503, b''), (429, b''), (200, b'[{"lat": "4.65", "lon": "-74.06"}]')])
+
+    assert _geocodificar(cache) == ([], ('4.65', '-74.06'))
+    assert cache.get(DIRECCION) == ('4.65', '-74.06')
+
+
+def test_async_error_permanente_no_se_reintenta(nominatim_http, cache):
+    nominatim_http.extend([(403, b''), (200, b'[]')])
+
+    assert _geocodificar(cache) == ([DIRECCION], ('N/A', 'N/A'))
+    assert len(nominatim_http) == 1
+    assert cache.get(DIRECCION) is None
+
+
+def test_async_sin_resultado_se_guarda_como_negativo(nominatim_http, cache):
+    nominatim_http.append((200, b'[]'))
+
+    assert _geocodificar(cache) == ([DIRECCION], ('N/A', 'N/A'))
+    assert cache.get(DIRECCION) == ('N/A', 'N/A')
+
+
+def test_geocodificar_desde_un_event_loop(nominatim_http, cache):
+    nominatim_http.append((200, b'[{"lat": "4.65", "lon": "-74.06"}]'))
+
+    async def desde_codigo_asincrono():
+        return _geocodificar(cache)
+
+    assert asyncio.run(desde_codigo_asincrono()) == ([], ('4.65', '-74.06'))
@@ -0,0 +1,76 @@
+import os
+import pytest
+import ciencuadras
+from http_fetcher import extraer_estado_embebido, extraer_http, scrape_page_http
+from servidor_local import FIXTURES
+
+
+def _fixture(*ruta):
+    with open(os.path.join(FIXTURES, *ruta), encoding='utf-8') as f:
+        return f.read()
+
+
+class SesionFalsa:
+    """
+    Responde cualquier URL con 'texto' (o lanza 'error').
+    """
+
+    def __init__(self, texto='', error=None):
+        self.texto = texto
+        self.error = error
+
+    def get(self, url, timeout=None):
+        if self.error is not None:
+            raise self.error
+        return self
+
+    def raise_for_status(self):
+        pass
+
+    @property
+    def text(self):
+        return self.texto
+
+    @property
+    def content(self):
+        return self.texto.encode('utf-8')
+
+
+@pytest.mark.parametrize('fixture', ['angular_escapado.html', 'next_data.html'])
+def test_estado_embebido(fixture):
+    propiedades = extraer_http(_fixture('estado_embebido', fixture), ('local', 1),
+                               ciencuadras.parse_page, ciencuadras.tipo_de_propiedad)
+
+    assert [prop['Nombre'] for prop in propiedades] == ['Local en arriendo en Chicó', 'Oficina en arriendo en Usaquén']
+    assert propiedades[0] == {
+        'Nombre': 'Local en arriendo en Chicó', 'Precio': '$4.500.000', 'Tamaño': '62.5 m²',
+        'Imagen': 'https://img.ciencuadras.com/fotos/901/principal.jpg', 'Ciudad': 'Bogotá',
+        'Localidad': 'Chapinero', 'Barrio': 'Chicó', 'Baños': '1', 'Tipo': 'Local', 'Categoria': 'local',
+        'Latitud': 'N/A', 'Longitud': 'N/A'
+    }
+    assert propiedades[1]['Tipo'] == 'Oficina'
+
+
+def test_estado_invalido_requiere_selenium():
+    pagina = _fixture('estado_embebido', 'estado_invalido.html')
+
+    assert extraer_estado_embebido(pagina) is None
+    assert extraer_http(pagina, ('local', 1), ciencuadras.parse_page, ciencuadras.tipo_de_propiedad) == []
+    assert scrape_page_http(SesionFalsa(pagina), 'http://x/local', ('local', 1),
+                            ciencuadras.parse_page, ciencuadras.tipo_de_propiedad) is None
+
+
+def test_tarjetas_renderizadas_en_el_servidor():
+    propiedades = scrape_page_http(SesionFalsa(_fixture('ciencuadras', 'local_p1.html')), 'http://x/local', ('local', 1),
+                                   ciencuadras.parse_page, ciencuadras.tipo_de_propiedad)
+
+    assert len(propiedades) == 24
+    assert propiedades[0]['Precio'] == '$ 5.050.000'
+
+
+def test_error_de_lectura_usa_selenium():
+    def parse_page(page_source, categoria):
+        raise AttributeError("'NoneType' object has no attribute 'text'")
+
+    assert scrape_page_http(SesionFalsa('<html></html>'), 'http://x/local', ('local', 1),
+                            parse_page, ciencuadras.tipo_de_propiedad) is None
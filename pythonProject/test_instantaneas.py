@@ -0,0 +1,56 @@
+import os
+import pandas as pd
+import pytest
+import instantaneas
+from cargador_bd import cargar_propiedades
+from instantaneas import abrir_instantanea, exportar_instantanea, instantanea_actual, ruta_csv, ruta_parquet
+from test_cargador_bd import PROPIEDADES
+
+pq = pytest.importorskip('pyarrow.parquet')
+
+
+@pytest.fixture
+def exportadas(bd, tmp_path, monkeypatch):
+    """
+    Tres instantáneas de las propiedades de prueba en tmp_path, conservando dos.
+    """
+    monkeypatch.setattr(instantaneas, '_tablas', {})
+    cargar_propiedades(bd, PROPIEDADES)
+    return [exportar_instantanea(bd, str(tmp_path), conservar=2) for _ in range(3)]
+
+
+def test_versiones(exportadas, tmp_path):
+    assert len(set(exportadas)) == 3
+    assert instantanea_actual(str(tmp_path))['version'] == exportadas[-1]
+    assert instantanea_actual(str(tmp_path))['filas'] == len(PROPIEDADES)
+    # La versión más vieja se borró
+    assert sorted(os.listdir(tmp_path)) == sorted(
+        ['actual.json'] + [f"locales_{version}.{extension}" for version in exportadas[1:] for extension in ('arrow', 'parquet')]
+    )
+    assert instantanea_actual(str(tmp_path / 'vacio')) is None
+
+
+def test_abrir_instantanea(exportadas, tmp_path):
+    tabla = abrir_instantanea(exportadas[-1], str(tmp_path))
+
+    assert abrir_instantanea(exportadas[-1], str(tmp_path)) is tabla  # Se mapea una sola vez
+    assert tabla.num_rows == len(PROPIEDADES)
+    datos = tabla.to_pandas()
+    assert datos['barrio'].dtype == 'category'
+    assert sorted(datos['valorarriendo']) == [2000000, 3500000, 5000000]
+    parquet = pq.read_table(ruta_parquet(exportadas[-1], str(tmp_path)))
+    assert (parquet.column_names, parquet.num_rows) == (tabla.column_names, tabla.num_rows)
+
+
+def test_csv_se_genera_al_pedirlo(exportadas, tmp_path, monkeypatch):
+    version = exportadas[-1]
+    assert not os.path.exists(tmp_path / f"locales_{version}.csv")
+
+    ruta = ruta_csv(version, str(tmp_path))
+    datos = pd.read_csv(ruta)
+    assert datos['barrio'].tolist() == ['Chapinero', 'Chapinero', 'Usaquén']  # Categóricas como texto
+    assert sorted(datos['valorarriendo']) == [2000000, 3500000, 5000000]
+
+    # La segunda vez se reutiliza el archivo sin leer la tabla
+    monkeypatch.setattr(instantaneas, 'abrir_instantanea', None)
+    assert ruta_csv(version, str(tmp_path)) == ruta
@@ -0,0 +1,80 @@
+import io
+import json
+from metricas import Metricas
+
+
+def _metricas():
+    metricas = Metricas(prefijo='prueba')
+    metricas.registrar_tiempo('carga_pagina', 0.5, categoria='local')
+    metricas.registrar_tiempo('carga_pagina', 1.5, categoria='local')
+    metricas.registrar_tiempo('escritura', 0.25)
+    metricas.contar('paginas', fetcher='http', resultado='ok')
+    metricas.contar('paginas', 2, resultado='fallida', fetcher='http')
+    metricas.contar('bytes_transferidos', 1024, fetcher='http')
+    return metricas
+
+
+def test_texto_prometheus():
+    assert _metricas().texto_prometheus() == (
+        '# HELP prueba_etapa_segundos Tiempo por etapa del pipeline\n'
+        '# TYPE prueba_etapa_segundos summary\n'
+        'prueba_etapa_segundos_sum{etapa="carga_pagina",categoria="local"} 2.000000\n'
+        'prueba_etapa_segundos_count{etapa="carga_pagina",categoria="local"} 2\n'
+        'prueba_etapa_segundos_sum{etapa="escritura"} 0.250000\n'
+        'prueba_etapa_segundos_count{etapa="escritura"} 1\n'
+        '# HELP prueba_etapa_segundos_max Tiempo máximo de una ejecución de la etapa\n'
+        '# TYPE prueba_etapa_segundos_max gauge\n'
+        'prueba_etapa_segundos_max{etapa="carga_pagina",categoria="local"} 1.500000\n'
+        'prueba_etapa_segundos_max{etapa="escritura"} 0.250000\n'
+        '# TYPE prueba_bytes_transferidos_total counter\n'
+        'prueba_bytes_transferidos_total{fetcher="http"} 1024\n'
+        '# TYPE prueba_paginas_total counter\n'
+        'prueba_paginas_total{fetcher="http",resultado="fallida"} 2\n'
+        'prueba_paginas_total{fetcher="http",resultado="ok"} 1\n'
+    )
+
+
+def test_prometheus_escapa_etiquetas_y_sin_datos():
+    metricas = Metricas(prefijo='prueba')
+    assert metricas.texto_prometheus() == '\n'
+
+    metricas.contar('paginas', ruta='C:\\datos\n"local"')
+    assert metricas.texto_prometheus().splitlines()[-1] == r'prueba_paginas_total{ruta="C:\\datos\n\"local\""} 1'
+
+
+def test_resumen_suma_etiquetas():
+    assert _metricas().resumen() == {
+        'etapas': {'carga_pagina': {'segundos': 2.0, 'llamadas': 2, 'maximo': 1.5},
+                   'escritura': {'segundos': 0.25, 'llamadas': 1, 'maximo': 0.25}},
+        'contadores': {'paginas': 3, 'bytes_transferidos': 1024},
+    }
+
+
+def test_log_json_lines(tmp_path):
+    ruta = tmp_path / 'eventos.jsonl'
+    metricas = Metricas()
+    metricas.configurar(log_json=str(ruta))
+    metricas.registrar_tiempo('carga_pagina', 0.123456, categoria='local')
+    with metricas.medir('escritura'):
+        pass
+    metricas.evento('pagina', categoria='oficina', page=2, tarjetas=24)
+    metricas.configurar(log_json=None)  # Cierra el archivo
+    metricas.evento('pagina', page=3)  # Ya sin log: no se escribe
+
+    eventos = [json.loads(linea) for linea in ruta.read_text(encoding='utf-8').splitlines()]
+    assert all(isinstance(evento.pop('ts'), float) for evento in eventos)
+    assert eventos[0] == {'evento': 'etapa', 'etapa': 'carga_pagina', 'segundos': 0.1235, 'categoria': 'local'}
+    assert eventos[1]['etapa'] == 'escritura'
+    assert eventos[2] == {'evento': 'pagina', 'categoria': 'oficina', 'page': 2, 'tarjetas': 24}
+    assert len(eventos) == 3
+
+
+def test_log_json_en_archivo_abierto():
+    destino = io.StringIO()
+    metricas = Metricas()
+    metricas.configurar(log_json=destino)
+    metricas.evento('pagina', barrio='Chicó')
+    metricas.configurar(log_json=None)
+
+    assert not destino.closed  # Un archivo ajeno no se cierra
+    assert json.loads(destino.getvalue())['barrio'] == 'Chicó'
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+from http_fetcher import _formatear_area, _formatear_precio
+from normalizacion import normalizar_propiedades, parsear_numero
+
+
+@pytest.mark.parametrize('texto, esperado', [
+    # ciencuadras (HTML de las tarjetas)
+    ('$ 3.500.000', 3500000),
+    ('$3.500.000', 3500000),
+    ('$ 950.000', 950000),
+    ('$ 3.500.000,00', 3500000),
+    # metrocuadrado y el scraper original de locales ('.' decimal y ',' de miles)
+    ('$1,500,000', 1500000),
+    ('1,500,000', 1500000),
+    ('$ 12,000,000.00', 12000000),
+    # Estado JSON embebido (http_fetcher)
+    (_formatear_precio(2750000), 2750000),
+    (_formatear_precio(2750000.0), 2750000),
+])
+def test_precios_de_cada_portal(texto, esperado):
+    valores, rechazos = parsear_numero(pd.Series([texto]), minimo=1)
+    assert valores.tolist() == [esperado]
+    assert rechazos == 0
+
+
+@pytest.mark.parametrize('texto, esperado', [
+    ('80 m²', 80),
+    ('45,5 m²', 45.5),
+    ('45.5 m²', 45.5),
+    ('1.200 m²', 1200),
+    ('1,200 m2', 1200),
+    ('Área 120.75 m²', 120.75),
+    (_formatear_area(45.5), 45.5),
+    (_formatear_area(120), 120),
+])
+def test_areas_de_cada_portal(texto, esperado):
+    valores, _ = parsear_numero(pd.Series([texto]), minimo=0.01)
+    assert valores.tolist() == [esperado]
+
+
+def test_nulos_y_rechazos():
+    valores, rechazos = parsear_numero(pd.Series(['N/A', '', None, '-', 'Consultar', '$ 0', '2']), minimo=1)
+
+    assert np.isnan(valores[:6]).all()
+    assert valores[6] == 2
+    # 'Consultar' no es número y '$ 0' está bajo el mínimo; los nulos explícitos no cuentan
+    assert rechazos == 2
+
+
+def test_normalizar_propiedades():
+    datos = pd.DataFrame({
+        'Precio': ['$ 3.500.000', '$1,500,000', 'N/A'],
+        'Tamaño': ['70 m²', '45.5 m²', '30 m²'],
+        'Baños': ['Baños 2', 'N/A', '1'],
+    })
+
+    datos, rechazos = normalizar_propiedades(datos)
+
+    assert datos['valorarriendo'].tolist() == [3500000, 1500000, pd.NA]
+    assert datos['areacuadrada'].tolist() == [70, 45.5, 30]
+    assert datos['banios'].tolist() == [2, pd.NA, 1]
+    assert datos['precio_m2'].iloc[0] == 50000
+    assert pd.isna(datos['precio_m2'].iloc[2])
+    assert rechazos == {'Precio': 0, 'Tamaño': 0, 'Baños': 0}
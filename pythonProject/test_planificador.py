@@ -0,0 +1,110 @@
+import csv
+from urllib.parse import urlparse
+import pytest
+import geocodificacion
+import planificador
+from planificador import PORTALES, Trabajo, ejecutar_trabajos
+from servidor_local import ServidorFixtures
+
+
+@pytest.fixture
+def servidores(monkeypatch, tmp_path):
+    """
+    Dos servidores locales (dos dominios) con las páginas guardadas. El portal 'ciencuadras'
+    apunta al primero y 'espejo' (las mismas páginas, sin respaldo de Selenium, como
+    metrocuadrado) al segundo; Nominatim responde desde un tercero, para no sumar sus
+    solicitudes a las de las páginas. Las corridas escriben en tmp_path.
+    """
+    servidores = [ServidorFixtures(retardo=0.02).iniciar() for _ in range(3)]
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(geocodificacion, 'NOMINATIM_URL', servidores[2].url + '/search')
+    monkeypatch.setattr(geocodificacion.limitador_nominatim, 'tasa', 1000.0)
+    monkeypatch.setitem(PORTALES, 'ciencuadras', dict(
+        PORTALES['ciencuadras'], url=servidores[0].url + "/ciencuadras/{ciudad}/{categoria}?page={page}"))
+    monkeypatch.setitem(PORTALES, 'espejo', dict(
+        PORTALES['ciencuadras'], url=servidores[1].url + "/espejo/{ciudad}/{categoria}?page={page}", selenium=None))
+    yield servidores
+    for servidor in servidores:
+        servidor.shutdown()
+        servidor.server_close()
+
+
+def _dominio(servidor):
+    return urlparse(servidor.url).netloc
+
+
+def _paginas_escritas(ruta='propiedades_todas.csv'):
+    with open(ruta, newline='', encoding='utf-8') as f:
+        return len(list(csv.DictReader(f))) // 24  # Las páginas guardadas traen 24 tarjetas
+
+
+def test_limites_por_dominio(servidores):
+    limites = {
+        _dominio(servidores[0]): {'tasa': 40.0, 'en_vuelo': 2},
+        _dominio(servidores[1]): {'tasa': 1000.0, 'en_vuelo': 3},
+    }
+    trabajos = [Trabajo(portal, 'bogota', categoria, 6)
+                for portal in ('ciencuadras', 'espejo') for categoria in ('local', 'oficina')]
+
+    assert ejecutar_trabajos(trabajos, limites=limites) == []
+
+    assert [servidor.solicitudes['paginas'] for servidor in servidores[:2]] == [12, 12]
+    # Hasta 'en_vuelo' solicitudes a la vez en cada dominio, sin que uno frene al otro
+    assert [servidor.max_en_vuelo for servidor in servidores[:2]] == [2, 3]
+    # Token bucket de capacidad 'en_vuelo': las 10 solicitudes después de las 2 primeras toman al menos 10 / 40 s
+    llegadas = servidores[0].llegadas
+    assert llegadas[-1] - llegadas[0] >= 0.9 * 10 / 40
+    assert _paginas_escritas() == 24
+
+
+def test_falla_transitoria_se_reintenta(servidores, monkeypatch):
+    descargar_http = planificador.descargar_http
+    llamadas = []
+
+    def descargar_con_fallos(sesion, url, clave):
+        llamadas.append(clave)
+        # La página 1 falla una vez; la 2, siempre
+        if clave == ('local', 2) or (clave == ('local', 1) and llamadas.count(clave) == 1):
+            return None
+        return descargar_http(sesion, url, clave)
+
+    monkeypatch.setattr(planificador, 'descargar_http', descargar_con_fallos)
+    limites = {_dominio(servidores[1]): {'tasa': 1000.0, 'en_vuelo': 2}}
+
+    assert ejecutar_trabajos([Trabajo('espejo', 'bogota', 'local', 4)], limites=limites) == \
+        [('espejo', 'bogota', 'local', 2)]
+    # La página 2 se pide 1 + REINTENTOS_PAGINA veces y el trabajo sigue con las demás
+    assert llamadas.count(('local', 2)) == 1 + planificador.REINTENTOS_PAGINA
+    assert _paginas_escritas() == 3
+
+
+def test_error_de_lectura_no_detiene_el_trabajador(servidores, monkeypatch):
+    extraer_http = planificador.extraer_http
+
+    def extraer_con_error(page_source, clave, parse_page, tipo_de_propiedad):
+        if clave == ('local', 2):
+            raise AttributeError("'NoneType' object has no attribute 'text'")
+        return extraer_http(page_source, clave, parse_page, tipo_de_propiedad)
+
+    monkeypatch.setattr(planificador, 'extraer_http', extraer_con_error)
+    limites = {_dominio(servidores[1]): {'tasa': 1000.0, 'en_vuelo': 1}}
+
+    # Con un solo trabajador, un error que lo detuviera dejaría sin pedir las páginas 3 y 4
+    assert ejecutar_trabajos([Trabajo('espejo', 'bogota', 'local', 4)], limites=limites) == \
+        [('espejo', 'bogota', 'local', 2)]
+    assert servidores[1].solicitudes['paginas'] == 4
+    assert _paginas_escritas() == 3
+
+
+def test_pagina_sin_listados_termina_el_trabajo(servidores, monkeypatch):
+    extraer_http = planificador.extraer_http
+
+    def extraer_sin_listados(page_source, clave, parse_page, tipo_de_propiedad):
+        return [] if clave == ('local', 2) else extraer_http(page_source, clave, parse_page, tipo_de_propiedad)
+
+    monkeypatch.setattr(planificador, 'extraer_http', extraer_sin_listados)
+    limites = {_dominio(servidores[1]): {'tasa': 1000.0, 'en_vuelo': 1}}
+
+    assert ejecutar_trabajos([Trabajo('espejo', 'bogota', 'local', 6)], limites=limites) == []
+    assert servidores[1].solicitudes['paginas'] == 2
+    assert _paginas_escritas() == 1
@@ -0,0 +1,54 @@
+import csv
+from salida import EscritorPropiedades
+
+CAMPOS = ['Nombre', 'Precio', 'Barrio']
+
+
+def _pagina(page):
+    return [{'Nombre': f"Local {page}-{i}", 'Precio': f"${i}.000.000", 'Barrio': 'Chicó'} for i in range(3)]
+
+
+def _filas(ruta):
+    with open(ruta, newline='', encoding='utf-8') as f:
+        return [fila['Nombre'] for fila in csv.DictReader(f)]
+
+
+def test_reanudar_no_repite_filas(tmp_path):
+    ruta = tmp_path / 'propiedades.csv'
+    escritor = EscritorPropiedades(ruta, CAMPOS)
+    escritor.escribir(_pagina(1), ('local', 1))
+    escritor.close()
+
+    # La corrida se detuvo antes de marcar la página 1: con --resume se vuelve a escribir
+    escritor = EscritorPropiedades(ruta, CAMPOS, reanudar=True)
+    escritor.escribir(_pagina(1), ('local', 1))
+    escritor.escribir(_pagina(2), ('local', 2))
+    escritor.close()
+
+    assert _filas(ruta) == [prop['Nombre'] for prop in _pagina(1) + _pagina(2)]
+    assert escritor.total == 3
+
+
+def test_reanudar_descarta_una_fila_incompleta(tmp_path):
+    ruta = tmp_path / 'propiedades.csv'
+    escritor = EscritorPropiedades(ruta, CAMPOS)
+    escritor.escribir(_pagina(1), ('local', 1))
+    escritor.close()
+    with open(ruta, 'a', encoding='utf-8') as f:
+        f.write('Local 2-0,$0.0')
+
+    escritor = EscritorPropiedades(ruta, CAMPOS, reanudar=True)
+    escritor.escribir(_pagina(2), ('local', 2))
+    escritor.close()
+
+    assert _filas(ruta) == [prop['Nombre'] for prop in _pagina(1) + _pagina(2)]
+
+
+def test_sin_reanudar_se_escribe_todo(tmp_path):
+    ruta = tmp_path / 'propiedades.csv'
+    escritor = EscritorPropiedades(ruta, CAMPOS)
+    escritor.escribir(_pagina(1), ('local', 1))
+    escritor.escribir(_pagina(1), ('local', 1))
+    escritor.close()
+
+    assert len(_filas(ruta)) == 6
@@ -0,0 +1,71 @@
+import locale
+from collections import OrderedDict
+import pandas as pd
+import pytest
+import tarjetas
+from tarjetas import formatear_moneda, tarjetas_en_cache, tarjetas_html
+
+# Convenciones monetarias de es_CO.UTF-8 y en_US.UTF-8 (glibc), para no depender de los
+# locales instalados en la máquina
+ES_CO = {
+    'currency_symbol': '$', 'mon_decimal_point': ',', 'mon_thousands_sep': '.', 'mon_grouping': [3, 3, 0],
+    'decimal_point': ',', 'thousands_sep': '.', 'grouping': [3, 3, 0], 'frac_digits': 2, 'int_frac_digits': 2,
+    'p_cs_precedes': 1, 'p_sep_by_space': 1, 'n_cs_precedes': 1, 'n_sep_by_space': 1,
+    'p_sign_posn': 1, 'n_sign_posn': 1, 'positive_sign': '', 'negative_sign': '-', 'int_curr_symbol': 'COP ',
+}
+EN_US = dict(ES_CO, mon_decimal_point='.', mon_thousands_sep=',', decimal_point='.', thousands_sep=',',
+             p_sep_by_space=0, n_sep_by_space=0, int_curr_symbol='USD ')
+
+
+@pytest.mark.parametrize('convencion', [ES_CO, EN_US], ids=['es_CO', 'en_US'])
+def test_formatear_moneda_igual_a_locale_currency(monkeypatch, convencion):
+    monkeypatch.setattr(locale, 'localeconv', lambda: convencion)
+    valores = [3500000, 1250.5, 999, 0]
+
+    assert formatear_moneda(pd.Series(valores)).tolist() == [locale.currency(v, grouping=True) for v in valores]
+
+
+def test_formatear_moneda_sin_valor(monkeypatch):
+    monkeypatch.setattr(locale, 'localeconv', lambda: ES_CO)
+
+    assert formatear_moneda(pd.Series([None, 'sin precio', '2000000'])).tolist() == \
+        ['No disponible', 'No disponible', '$ 2.000.000,00']
+
+
+def _locales(*barrios):
+    return pd.DataFrame({
+        'barrio': list(barrios), 'ciudad': 'Bogotá', 'fotolocal': 'https://img.cc.com/1.jpg',
+        'valorarriendo': 2000000, 'areacuadrada': 40.0, 'garajes': 0, 'banios': 1.0, 'link': '',
+        'telefonocontacto': '3001234567', 'coordenadas': '4.6486,-74.0628', 'prioridad': 0,
+    })
+
+
+@pytest.fixture
+def cache_html(monkeypatch):
+    """
+    Caché de HTML vacío, con la versión de los datos en una lista que la prueba puede cambiar.
+    """
+    version = [1]
+    monkeypatch.setattr(tarjetas, '_cache_html', OrderedDict())
+    monkeypatch.setattr(tarjetas, 'version_datos', lambda: version[0])
+    return version
+
+
+def test_cache_por_llave_y_version(cache_html):
+    chapinero = tarjetas_en_cache(('Chapinero', 1), _locales('Chapinero'))
+
+    # Misma llave y misma versión: no se vuelve a armar aunque se pasen otros datos
+    assert tarjetas_en_cache(('Chapinero', 1), _locales('Usaquén')) == chapinero
+    assert tarjetas_en_cache(('Usaquén', 1), _locales('Usaquén')) == tarjetas_html(_locales('Usaquén'))
+
+    cache_html[0] = 2  # Cambió la tabla
+    assert tarjetas_en_cache(('Chapinero', 1), _locales('Usaquén')) == tarjetas_html(_locales('Usaquén'))
+    assert list(tarjetas._cache_html) == [(('Chapinero', 1), 1), (('Usaquén', 1), 1), (('Chapinero', 1), 2)]
+
+
+def test_cache_descarta_las_menos_usadas(cache_html, monkeypatch):
+    monkeypatch.setattr(tarjetas, 'MAXIMO_CACHE', 2)
+    for pagina in (1, 2, 1, 3):
+        tarjetas_en_cache(('Chapinero', pagina), _locales('Chapinero'))
+
+    assert [llave for llave, _ in tarjetas._cache_html] == [('Chapinero', 1), ('Chapinero', 3)]